@@ -2,7 +2,21 @@ from fastapi import FastAPI
 from .home    import router as home_router
 from .upload  import router as upload_router
 from .detect  import router as detect_router
+from .metrics import router as metrics_router
+from .jobs    import router as jobs_router
+from .events  import router as events_router
+from .v1      import router as v1_router
+from .thumbnails import router as thumbnails_router
 
 def register_routers(app: FastAPI) -> None:
-    for r in (home_router, upload_router, detect_router):
+    for r in (
+        home_router,
+        upload_router,
+        detect_router,
+        metrics_router,
+        jobs_router,
+        events_router,
+        v1_router,
+        thumbnails_router,
+    ):
         app.include_router(r)
@@ -4,7 +4,6 @@ from fastapi import (
     UploadFile,
     File,
     Form,
-    BackgroundTasks,
     HTTPException,
 )
 from starlette.status import HTTP_429_TOO_MANY_REQUESTS
@@ -12,155 +11,274 @@ from fastapi.responses import JSONResponse, RedirectResponse
 from pathlib import Path
 from datetime import datetime
 import logging
+import re
+import secrets
+import shutil
+import sqlite3
+from ml_object_detector.domain.errors import InvalidImageError, UploadRejected
+from ml_object_detector.models.artifacts import ANNOTATED, parse_artifacts
+from ml_object_detector.models.decode import SharedImage
+from ml_object_detector.services import jobs
 from ml_object_detector.services.detector import (
-    acquire_lock,
-    run_yolo_and_report,
-    save_uploads,
-    model,
+    detect,
     ROOT,
     PROCESSED,
     cfg,
 )
+from ml_object_detector.services.file_inspection import (
+    ingest_decoded,
+    ingest_uploads,
+    rejection,
+)
+from ml_object_detector.services.scheduler import QueueFull, get_scheduler
 from ml_object_detector.utils.fs import ensure_directory_exists
 from ml_object_detector.utils.clean_query_names import slugify
-from ml_object_detector.etl.download_images import download_image
 
 router = APIRouter(tags=["Detect"])
 log = logging.getLogger(__name__)
 
-def release_lock_then(lock, fn, *args, **kw):
+CLIENT_HEADER = (cfg.get("scheduler") or {}).get("client_header", "X-Client-ID")
+IMGSZ = int(cfg.get("imgsz", 640))
+# what new_run() hands out (older runs have no token)
+RUN_ID_RE = re.compile(r"[a-z0-9-]+_\d{4}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2}(?:_[0-9a-f]{6})?")
+
+
+def client_key(request: Request) -> str:
+    """
+    Scheduler key of the caller: the header set by the load balancer when
+    present (many users share one IP behind it), else the peer IP.
+    """
+    return request.headers.get(CLIENT_HEADER) or request.client.host
+
+
+def busy_response() -> JSONResponse:
+    return JSONResponse(
+        {"detail": "Too many detections queued for this client, retry later."},
+        status_code=HTTP_429_TOO_MANY_REQUESTS,
+    )
+
+
+def rejected_response(e: UploadRejected) -> JSONResponse:
+    return JSONResponse(
+        {
+            "detail": "Some files were rejected, nothing was processed.",
+            "errors": e.errors,
+            "confirm_required": e.confirm_required,  # resend with confirm_large=true
+        },
+        status_code=422,
+    )
+
+
+def new_run(slug_base: str) -> tuple[str, Path]:
+    """
+    Fresh ``<slug>_<timestamp>_<token>`` run id and its (new, empty) raw
+    directory. The random token keeps runs started in the same second
+    apart; the directory is created exclusively, so it belongs to this
+    run alone.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+    while True:
+        run_id = f"{slugify(slug_base)}_{timestamp}_{secrets.token_hex(3)}"
+        run_raw_dir = ROOT / cfg["input_dir"] / run_id  # data/raw/<run_id>/
+        run_raw_dir.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            run_raw_dir.mkdir()
+        except FileExistsError:
+            continue
+        return run_id, run_raw_dir
+
+
+def discard_run(run_id: str) -> None:
+    """Remove what a run that was not queued left on disk."""
+    shutil.rmtree(ROOT / cfg["input_dir"] / run_id, ignore_errors=True)
+    shutil.rmtree(PROCESSED / run_id, ignore_errors=True)
+
+
+def submit_job(run_id: str, kind: str, payload: dict, client: str, **kw) -> None:
     """
-    Run fn(*args, **kw) and always release the lock afterwards.
+    Queue a job for *client*. Raises :class:`QueueFull` when the client's
+    queue is full; whatever the failure, the run's files are removed.
     """
     try:
-        fn(*args, **kw)
-    finally:
-        lock.release()
+        jobs.submit(run_id, kind, payload, client, **kw)
+    except sqlite3.IntegrityError:
+        discard_run(run_id)
+        raise HTTPException(409, f"Run {run_id} already exists, retry.")
+    except BaseException:
+        discard_run(run_id)
+        raise
 
 
 @router.post("/detect_upload")
 async def detect_upload(
     request: Request,
-    background: BackgroundTasks,
     files: list[UploadFile] = File(...),
     conf: float = Form(0.8),
+    confirm_large: bool = Form(False),
+    artifacts: str | None = Form(None),
 ):
+    """
+    *artifacts* (``json`` | ``labels`` | ``annotated``, comma-separated)
+    picks the files written per image; default ``artifacts.default`` in
+    ``config.yaml``. A single image without ``annotated`` is answered with
+    JSON instead of a redirect to the annotated copy.
+    """
     logger = getattr(request.state, "log", log)   # fallback to module-level log
-    client_ip = request.client.host
-    lock = acquire_lock(client_ip)
+    client = client_key(request)
 
-    if lock.locked():
-        return JSONResponse(
-            {"detail": "Previous detection still processing."},
-            status_code=HTTP_429_TOO_MANY_REQUESTS,
-        )
-
-    await lock.acquire()
+    # Validation -----------------------------------
+    if not files:
+        raise HTTPException(400, "At least one image is required")
+    if not (0.0 <= conf <= 1.0):
+        raise HTTPException(400, "Confidence threshold must be between 0 and 1!")
+    try:
+        kinds = parse_artifacts(artifacts)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
     try:
-        # Validation -----------------------------------
-        if not files:
-            raise HTTPException(400, "At least one image is required")
-        if not (0.0 <= conf <= 1.0):
-            raise HTTPException(400, "Confidence threshold must be between 0 and 1!")
-
-        # Build run_id ----------------
-        timestamp = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
-        slug_base = Path(files[0].filename).stem if len(files) == 1 else "bulk_upload"
-        run_id = f"{slugify(slug_base)}_{timestamp}"
-
-        # Save uploads ----------------
-        run_raw_dir = ROOT / cfg["input_dir"] / run_id  # data/raw/<run_id>/
-        ensure_directory_exists(run_raw_dir)
-        paths = save_uploads(files, dest_dir=run_raw_dir)
-
-        # Single-image path (single input, fast response) ----------------
-        if len(paths) == 1:
-            processed_dir = PROCESSED / run_id
-            ensure_directory_exists(processed_dir)
-
-            one = model.predict_one(img_path=paths[0], out_dir=processed_dir, conf=conf)
-            boxed_path = one.boxed_path
-
-            # Write entry in the log file
-            logger.info(
-                "run_id=%s file=%s detections=%d inference_ms=%.1f saved_to=%s",
-                run_id,
-                boxed_path.name,
-                one.labels,
-                one.speed_ms,
-                boxed_path,
+        get_scheduler().check(client)  # cheap early 429, before saving anything
+    except QueueFull:
+        return busy_response()
+
+    # Build run_id ----------------
+    slug_base = Path(files[0].filename).stem if len(files) == 1 else "bulk_upload"
+    run_id, run_raw_dir = new_run(slug_base)  # data/raw/<run_id>/
+
+    # Single-image path (single input, fast response) ----------------
+    if len(files) == 1:
+        # Decoded once while validating, already reduced towards imgsz;
+        # the worker gets these pixels instead of re-reading the file
+        try:
+            upload = await ingest_decoded(
+                files[0], run_raw_dir, IMGSZ, confirm_large=confirm_large
             )
+        except InvalidImageError as e:
+            shutil.rmtree(run_raw_dir, ignore_errors=True)
+            return rejected_response(UploadRejected([rejection(files[0].filename, e)]))
+
+        processed_dir = PROCESSED / run_id
+        ensure_directory_exists(processed_dir)
+
+        # Waits for a fair share of the workers; inference runs in a worker
+        # process (batched with concurrent requests), the event loop stays free
+        shared = SharedImage.from_decoded(upload.image)
+        try:
+            async with get_scheduler().slot(client):
+                # The annotated copy is the response: wait for it only then
+                one = await detect(
+                    img_path=upload.path,
+                    out_dir=processed_dir,
+                    conf=conf,
+                    shared=shared,
+                    digest=upload.sha1,
+                    artifacts=",".join(kinds) or "json",
+                    wait_artifacts=ANNOTATED in kinds,
+                )
+        except QueueFull:
+            discard_run(run_id)
+            return busy_response()
+        finally:
+            shared.unlink()
+        boxed_path = one.boxed_path
+
+        # Write entry in the log file
+        logger.info(
+            "run_id=%s file=%s detections=%d inference_ms=%.1f saved_to=%s",
+            run_id,
+            upload.path.name,
+            one.labels,
+            one.speed_ms,
+            boxed_path,
+        )
 
-            # Heavy report / e-mail re runs in the background
-            # Will release lock when done
-            public_url = f"/processed/{run_id}/{boxed_path.name}"
-            background.add_task(
-                release_lock_then, lock, run_yolo_and_report, run_raw_dir, conf, run_id
-            )
+        # Report / e-mail run as a queued job, reusing the result above
+        # (no second inference); already admitted, so never rejected
+        submit_job(
+            run_id,
+            "report",
+            {"src_dir": str(run_raw_dir), "conf": conf},
+            client,
+            results=[one.detections],
+            force=True,
+        )
 
+        if boxed_path is not None:
+            public_url = f"/processed/{run_id}/{boxed_path.name}"
             return RedirectResponse(url=public_url, status_code=303)
+        return JSONResponse(
+            {
+                "run_id": run_id,
+                "detections": one.labels,
+                "inference_ms": one.speed_ms,
+                "status_url": f"/jobs/{run_id}",
+            }
+        )
 
-        # Multi-image path (bulk, background) -------------------------------
-        background.add_task(
-            release_lock_then, lock, run_yolo_and_report, run_raw_dir, conf, run_id
+    # Stream + validate uploads into the run directory ----------------
+    try:
+        paths = await ingest_uploads(
+            files, dest_dir=run_raw_dir, confirm_large=confirm_large
         )
+    except UploadRejected as e:
+        # Nothing is kept and nothing reaches YOLO; list what to fix
+        shutil.rmtree(run_raw_dir, ignore_errors=True)
+        return rejected_response(e)
 
-        report_name = f"report_{run_id}.html"
-        accepts_html = "text/html" in request.headers.get("accept", "").lower()
+    # Multi-image path (bulk, queued job) -------------------------------
+    try:
+        submit_job(
+            run_id,
+            "report",
+            {"src_dir": str(run_raw_dir), "conf": conf, "artifacts": ",".join(kinds) or "json"},
+            client,
+        )
+    except QueueFull:  # files already removed by submit_job
+        return busy_response()
 
-        if accepts_html:
-            # Brower to the processing page like detect_query endpoint
-            return RedirectResponse(
-                url=f"/processing/{run_id}/{report_name}", status_code=303
-            )
+    report_name = f"report_{run_id}.html"
+    accepts_html = "text/html" in request.headers.get("accept", "").lower()
 
-        # Fallback to JSON if not HTML client
-        return JSONResponse(
-            {
-                "run_id": run_id,
-                "status": "processing",
-                "images": [p.name for p in paths],
-                "poll_url": f"/processing/{run_id}/{report_name}",
-                "report_hint": f"Check {cfg['uploads_dir']} soon.",
-                "log_file": "/logs/upload_images.log",
-            }
+    if accepts_html:
+        # Brower to the processing page like detect_query endpoint
+        return RedirectResponse(
+            url=f"/processing/{run_id}/{report_name}", status_code=303
         )
 
-    except Exception:
-        # Make sure we don't leave the lock hanging on unexpected errors
-        lock.release()
-        raise
+    # Fallback to JSON if not HTML client
+    return JSONResponse(
+        {
+            "run_id": run_id,
+            "status": "processing",
+            "images": [p.name for p in paths],
+            "poll_url": f"/processing/{run_id}/{report_name}",
+            "status_url": f"/jobs/{run_id}",
+            "events_url": f"/events/{run_id}",
+            "report_hint": f"Check {cfg['uploads_dir']} soon.",
+            "log_file": "/logs/upload_images.log",
+        }
+    )
 
 
 @router.post("/detect_query")
 async def detect_query(
     request: Request,
-    background: BackgroundTasks,
     query: str = Form(...),
     n: int = Form(5),
     conf: float = Form(0.8),
 ):
     """
-    1. Downloads <n> images from Pexels for every comma-separated term
-       in *query*.
-    2. Kicks off YOLO + HTML-report generation **in the background**.
-    3. Immediately redirects the browser to a lightweight “processing…”
-       page that polls until the report is ready.
+    1. Queues a job (see ``GET /jobs/{run_id}``) for the download of <n> images from
+       Pexels for every comma-separated term in *query*, followed by
+       YOLO + HTML-report generation.
+    2. Immediately redirects the browser to a lightweight “processing…”
+       page that follows the job's progress events until the report is
+       ready.
+
+    Nothing blocking runs on the event loop, so other clients are served
+    while the images download.
     """
-    logger = getattr(request.state, "log", log)   # fallback to module-level log
-    client_ip = request.client.host
-    lock = acquire_lock(client_ip)
-
-    if lock.locked():
-        return JSONResponse(
-            {"detail": "Previous detection stil precessing."},
-            status_code=HTTP_429_TOO_MANY_REQUESTS,
-        )
-
-    await lock.acquire()
-
-    # Validation --------------------
+    # Validation ------------------------------------------------------
     if not query:
         raise HTTPException(
             400, "A query is required in order to process de object detector."
@@ -168,34 +286,38 @@ async def detect_query(
 
     query_terms = [q.strip() for q in query.split(",") if q.strip()]
     if len(query_terms) > 3:
-        # Release lock and return error for popup display
-        lock.release()
+        # Return error for popup display
         return JSONResponse(
             {"error": "Maximum of 3 query terms allowed per request. Please reduce your query."},
             status_code=400
         )
 
-    if not (0 <= n <= 15):
-        raise HTTPException(400, "The number of images must be between 0 and 15.")
+    if not (1 <= n <= 15):
+        raise HTTPException(400, "The number of images must be between 1 and 15.")
 
     if not (0.0 <= conf <= 1.0):
         raise HTTPException(400, "Confidence threshold must be between 0 and 1!")
 
-    # Folder set-up ───────────────────────────────────────────────
-    timestamp = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
-    query_slug = slugify(query.replace(",", " "))
-
-    run_id = f"{query_slug}_{timestamp}"
-    run_raw_dir = ROOT / cfg["input_dir"] / run_id
-    ensure_directory_exists(run_raw_dir)
-
-    for term in [q.strip() for q in query.split(",") if q.strip()]:
-        download_image(term, n=n, log=logger, dest_dir=run_raw_dir)
+    client = client_key(request)
+    try:
+        get_scheduler().check(client)
+    except QueueFull:
+        return busy_response()
 
-    # Kick off heavy task ───────────────────────────────────────────────
+    # Folder set-up ───────────────────────────────────────────────
+    run_id, run_raw_dir = new_run(query.replace(",", " "))
 
-    background.add_task(release_lock_then, lock, run_yolo_and_report, run_raw_dir, conf, run_id)
+    # Queue download + heavy task ─────────────────────────────────────
 
+    try:
+        submit_job(
+            run_id,
+            "query",
+            {"query_terms": query_terms, "n": n, "src_dir": str(run_raw_dir), "conf": conf},
+            client,
+        )
+    except QueueFull:  # files already removed by submit_job
+        return busy_response()
 
     report_name = f"report_{run_id}.html"
     accepts_html = "text/html" in request.headers.get("accept", "").lower()
@@ -210,6 +332,8 @@ async def detect_query(
         "run_id": run_id,
         "status": "processing",
         "poll_url": f"/processing/{run_id}/{report_name}",
+        "status_url": f"/jobs/{run_id}",
+        "events_url": f"/events/{run_id}",
         "report_hint": f"/reports/{report_name} (once ready)",
         "log_file": "/logs/download_images.log",
     }
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from ml_object_detector.services.events import sse_stream
+from ml_object_detector.services.jobs import get_store
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+@router.get("/{run_id}")
+async def job_events(run_id: str, request: Request):
+    """
+    Server-Sent Events for one run: ``progress`` after every image, then a
+    single ``done`` (with ``report_url``) or ``failed`` event.
+    """
+    job = await run_in_threadpool(get_store().get, run_id)  # SQLite, off the loop
+    if job is None:
+        raise HTTPException(404, f"No job with run_id {run_id}")
+    return StreamingResponse(
+        sse_stream(run_id, job.event(), request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
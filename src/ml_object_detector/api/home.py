@@ -1,7 +1,12 @@
-from fastapi import APIRouter
+import json
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse
 from pathlib import Path
+from ml_object_detector.api.detect import RUN_ID_RE
 from ml_object_detector.config.load_config import load_config
+from ml_object_detector.services.jobs import DONE, get_store
 
 cfg = load_config()
 ROOT = Path(cfg["ROOT"])
@@ -112,18 +117,26 @@ async def docs_page():
 
 @router.get("/processing/{run_id}/{report_name}", response_class=HTMLResponse)
 async def processing(report_name: str, run_id: str):
-    report_path = REPORTS_DIR / report_name
-
-    if report_path.exists():
+    # Both end up in the page's script: only accept what the API hands out
+    if not RUN_ID_RE.fullmatch(run_id) or report_name != f"report_{run_id}.html":
+        raise HTTPException(404, "Unknown run")
+    # SQLite lookup / stat: off the event loop
+    job = await run_in_threadpool(get_store().get, run_id)
+
+    if job is None:
+        # Not a queued run (e.g. older than the job store): plain check
+        if await run_in_threadpool((REPORTS_DIR / report_name).exists):
+            return RedirectResponse(url=f"/reports/{report_name}", status_code=303)
+        raise HTTPException(404, f"No run {run_id}")
+    if job.state == DONE:
         # Work finished → jump to the real report
         return RedirectResponse(url=f"/reports/{report_name}", status_code=303)
 
-    # Still crunching – show spinner + auto refresh
+    # Still crunching – spinner, progress pushed by /events/{run_id}
     return f"""
     <html>
       <head>
         <title>Processing…</title>
-        <meta http-equiv="refresh" content="2">
         <style>
           @keyframes spin {{ 0% {{transform:rotate(0deg)}} 100% {{transform:rotate(360deg)}} }}
           .loader {{
@@ -136,8 +149,50 @@ async def processing(report_name: str, run_id: str):
       </head>
       <body>
         <h2>Running object detection…</h2>
-        <p>This page will refresh automatically.</p>
+        <p id="status">Waiting for a free worker…</p>
         <div class="loader"></div>
+        <script>
+          const status = document.getElementById("status");
+          const runId = {json.dumps(run_id)};
+          const reportUrl = {json.dumps("/reports/" + report_name)};
+          const events = new EventSource(`/events/${{runId}}`);
+
+          events.addEventListener("progress", (e) => {{
+            const d = JSON.parse(e.data);
+            status.textContent = d.total
+              ? `Processed ${{d.done}} of ${{d.total}} images`
+              : `Processed ${{d.done}} images`;
+          }});
+          events.addEventListener("done", (e) => {{
+            events.close();
+            const d = JSON.parse(e.data);
+            window.location.href = d.report_url || reportUrl;
+          }});
+          const fail = (error) => {{
+            document.querySelector(".loader").remove();
+            status.textContent = "Detection failed: " + (error || "unknown error");
+          }};
+          events.addEventListener("failed", (e) => {{
+            events.close();
+            fail(JSON.parse(e.data).error);
+          }});
+
+          // The stream was refused (no retry in that case): poll the job instead
+          const poll = async () => {{
+            try {{
+              const r = await fetch(`/jobs/${{runId}}`);
+              if (r.status === 404) return fail("run not found");
+              const job = await r.json();
+              if (job.state === "done") return (window.location.href = reportUrl);
+              if (job.state === "failed") return fail(job.error);
+              status.textContent = `Processed ${{job.progress.done}} images`;
+            }} catch (err) {{}}
+            setTimeout(poll, 2000);
+          }};
+          events.onerror = () => {{
+            if (events.readyState === EventSource.CLOSED) poll();
+          }};
+        </script>
       </body>
     </html>
     """
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+
+from ml_object_detector.services.jobs import STATES, get_store
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def _list_jobs(state: str | None, limit: int) -> dict:
+    store = get_store()
+    return {
+        "counts": store.counts(),
+        "jobs": [job.to_dict() for job in store.list_jobs(state, limit)],
+    }
+
+
+@router.get("")
+async def list_jobs(
+    state: str | None = Query(None, description=f"one of {', '.join(STATES)}"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Most recent jobs (newest first) plus the number of jobs per state."""
+    if state is not None and state not in STATES:
+        raise HTTPException(400, f"state must be one of {', '.join(STATES)}")
+    return await run_in_threadpool(_list_jobs, state, limit)  # SQLite, off the loop
+
+
+@router.get("/{run_id}")
+async def job_status(run_id: str):
+    """State and progress (images done / total) of one run."""
+    job = await run_in_threadpool(get_store().get, run_id)
+    if job is None:
+        raise HTTPException(404, f"No job with run_id {run_id}")
+    return job.to_dict()
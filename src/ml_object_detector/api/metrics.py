@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+from ml_object_detector.services.detector import batch_stats, model_stats
+from ml_object_detector.services.scheduler import get_scheduler
+from ml_object_detector.services.thumbnails import get_thumbnails
+from ml_object_detector.services.workers import worker_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+SUMMED = {
+    "cache": ("hits", "misses"),
+    "artifacts": ("pending", "written", "failed"),
+}
+
+
+def aggregate(per_process: list[dict]) -> dict:
+    """Add up the cache/artifact counters of several processes."""
+    totals: dict[str, dict] = {}
+    for stats in per_process:
+        for section, keys in SUMMED.items():
+            part = stats.get(section)
+            if not part:
+                continue
+            total = totals.setdefault(section, dict.fromkeys(keys, 0))
+            for key in keys:
+                total[key] += part.get(key, 0)
+            if section == "cache":
+                # every process opens the same sqlite file: its size is not additive
+                total["entries"] = max(total.get("entries", 0), part.get("entries", 0))
+                total["max_entries"] = part.get("max_entries")
+
+    cache = totals.get("cache")
+    if cache:
+        lookups = cache["hits"] + cache["misses"]
+        cache["hit_rate"] = cache["hits"] / lookups if lookups else 0.0
+    return totals
+
+
+@router.get("")
+async def metrics():
+    """
+    Runtime counters for ops dashboards.
+
+    batching : batch size histogram and queue wait times of the
+               dispatcher grouping concurrent detections.
+    cache    : hit/miss counters of the persistent detection cache.
+    artifacts: annotated images / label files waiting, written or failed.
+    workers  : the two above per inference worker process (by pid).
+    scheduler: running/queued detections and admission rejections.
+    thumbnails: preview cache size, hits, misses and evictions.
+
+    Cache and artifact counters add up this process and the last values
+    each worker reported (after warm-up and after every batch).
+    """
+    workers = worker_stats()
+    totals = aggregate([model_stats(), *workers.values()])
+    return {
+        "batching": batch_stats(),
+        "cache": totals.get("cache", {}),
+        "artifacts": totals.get("artifacts", {}),
+        "workers": {str(pid): stats for pid, stats in workers.items()},
+        "scheduler": get_scheduler().stats(),
+        "thumbnails": get_thumbnails().stats(),
+    }
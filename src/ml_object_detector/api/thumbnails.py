@@ -0,0 +1,68 @@
+"""
+Downscaled previews of the annotated images.
+
+``GET /thumbnails/<run_id>/<image>.jpg?size=160`` answers with a WebP (or
+JPEG) preview of ``/processed/<run_id>/<image>.jpg``, rendered on first
+request and cached on disk (see :mod:`ml_object_detector.services.thumbnails`).
+Responses carry a strong ETag and are revalidated with ``If-None-Match``
+without touching the image. Every filesystem call (even a ``stat``) runs
+in the threadpool, never on the event loop.
+"""
+
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+
+from ml_object_detector.config.load_config import load_config
+from ml_object_detector.services.thumbnails import SIZES, get_thumbnails
+
+cfg = load_config()
+PROCESSED_IMAGES_DIR = (Path(cfg["ROOT"]) / cfg["output_dir"]).resolve()
+
+# The URL does not change when a run is re-processed, so caches keep a
+# preview for a day and then revalidate it against the ETag.
+CACHE_CONTROL = "public, max-age=86400"
+
+router = APIRouter(prefix="/thumbnails", tags=["Thumbnails"])
+
+
+def resolve_source(image: str) -> Path:
+    """``<run_id>/<image>`` -> file under the processed folder, or 404."""
+    src = (PROCESSED_IMAGES_DIR / image).resolve()
+    if not src.is_relative_to(PROCESSED_IMAGES_DIR) or not src.is_file():
+        raise HTTPException(404, "Image not found")
+    return src
+
+
+def locate(image: str, size: int) -> tuple[Path, str]:
+    """Source file and cache key of a thumbnail (blocking: stats the file)."""
+    src = resolve_source(image)
+    try:
+        return src, get_thumbnails().key(src, size)
+    except OSError:  # removed in between
+        raise HTTPException(404, "Image not found")
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match", "")
+    return header.strip() == "*" or etag in (t.strip() for t in header.split(","))
+
+
+@router.get("/{image:path}")
+async def thumbnail(request: Request, image: str, size: int = Query(SIZES[0])):
+    if size not in SIZES:
+        raise HTTPException(400, f"size must be one of {list(SIZES)}")
+    src, key = await run_in_threadpool(locate, image, size)
+    cache = get_thumbnails()
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        path = await run_in_threadpool(cache.get, src, size, key)
+    except OSError:
+        raise HTTPException(404, "Image not found")
+    return FileResponse(path, media_type=cache.media_type, headers=headers)
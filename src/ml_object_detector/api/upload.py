@@ -1,22 +1,36 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator
+
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from ml_object_detector.config.load_config import load_config
 from ml_object_detector.services.file_inspection import inspect_uploaded_file
 from ml_object_detector.domain.errors import InvalidImageError
+from ml_object_detector.utils.fs import ensure_directory_exists
 from fastapi.responses import JSONResponse
 
+cfg = load_config()
+UPLOADS_DIR = Path(cfg["ROOT"]) / cfg["uploads_dir"]
+
 router = APIRouter(prefix="/images", tags=["Upload"])
 
-async def guard_image(file: UploadFile = File(...)) -> bytes:
-    try:
-        await inspect_uploaded_file(file)
-        # Reset file pointer after inspection
-        await file.seek(0)
-        data = await file.read()
-    except InvalidImageError as e:
-        raise HTTPException(status_code=422, detail=str(e))
-    return data  # Verified image bytes
+async def guard_image(
+    file: UploadFile = File(...), confirm_large: bool = Form(False)
+) -> AsyncIterator[Path]:
+    ensure_directory_exists(UPLOADS_DIR)
+    # One directory per request, removed with the file once the response is done
+    with tempfile.TemporaryDirectory(dir=UPLOADS_DIR, prefix="request-") as tmp:
+        try:
+            # Streamed to disk and verified chunk by chunk, never held in memory
+            _, path = await inspect_uploaded_file(file, Path(tmp), confirm_large)
+        except InvalidImageError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        yield path  # Verified image on disk
 
 @router.post("/upload_image")
-async def upload_image(img: bytes = Depends(guard_image)):
-    # This endpoint receives a verified image file as bytes.
+async def upload_image(img: Path = Depends(guard_image)):
+    # This endpoint receives the path of a verified image file.
     # You can plug into model.predict_one() here if needed.
-    return JSONResponse(content={"status": "received", "size_bytes": len(img)})
+    return JSONResponse(
+        content={"status": "received", "size_bytes": img.stat().st_size, "file": img.name}
+    )
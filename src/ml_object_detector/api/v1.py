@@ -0,0 +1,166 @@
+"""
+Machine-facing detection API.
+
+``POST /v1/detect`` takes one or many images and answers with the boxes
+directly: no run directory, no annotated copies, no report, no redirect.
+Images are validated and decoded in memory (see
+:func:`ml_object_detector.services.file_inspection.decode_uploads`) and
+handed to the inference workers through shared memory.
+
+The body is JSON, or msgpack when the client sends
+``Accept: application/x-msgpack`` (needs ``pip install msgpack``).
+
+A request carries at most ``v1.max_files`` images. It is admitted by the
+scheduler as a whole, one unit per image, and its images run as one batch
+in one worker. When the client's queue has no room for all of them, the
+request is answered with 429 before anything is decoded.
+"""
+
+import logging
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, Response
+
+from ml_object_detector.api.detect import (
+    IMGSZ,
+    busy_response,
+    client_key,
+    rejected_response,
+)
+from ml_object_detector.config.load_config import load_config
+from ml_object_detector.domain.errors import UploadRejected
+from ml_object_detector.models.decode import SharedImage
+from ml_object_detector.services import detector
+from ml_object_detector.services.file_inspection import DecodedUpload, decode_uploads
+from ml_object_detector.services.scheduler import QueueFull, get_scheduler
+
+if TYPE_CHECKING:  # heavy: torch + ultralytics
+    from ml_object_detector.models.predictor import OneResult
+
+try:  # optional: binary responses for clients that ask for them
+    import msgpack
+except ImportError:
+    msgpack = None
+
+cfg = load_config()
+router = APIRouter(prefix="/v1", tags=["Detect v1"])
+log = logging.getLogger(__name__)
+
+MSGPACK = "application/x-msgpack"
+MAX_FILES = int((cfg.get("v1") or {}).get("max_files", 4))  # images per request
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def wants_msgpack(request: Request) -> bool:
+    return MSGPACK in request.headers.get("accept", "").lower()
+
+
+async def _detect_all(uploads: list[tuple[str, DecodedUpload]], conf: float) -> list[dict]:
+    """One batched inference over every decoded image of the request."""
+    shared: list[SharedImage] = []
+    try:
+        for _, upload in uploads:
+            shared.append(SharedImage.from_decoded(upload.image))
+        # inference only, no files written
+        results = await detector.detect_many(
+            [
+                {
+                    "img_path": Path(name),
+                    "out_dir": None,
+                    "conf": conf,
+                    "shared": image,
+                    "digest": upload.sha1,
+                    "artifacts": "json",
+                }
+                for (name, upload), image in zip(uploads, shared)
+            ]
+        )
+    finally:
+        for image in shared:
+            image.unlink()
+
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return [_image_body(name, upload, one) for (name, upload), one in zip(uploads, results)]
+
+
+def _image_body(name: str, upload: DecodedUpload, one: "OneResult") -> dict:
+    det = one.detections
+    height, width = upload.image.orig_shape
+    return {
+        "file": name,
+        "width": width,
+        "height": height,
+        "detections": det.to_records(),
+        "timing_ms": {k: round(float(v), 2) for k, v in det.speed.items()},
+    }
+
+
+@router.post("/detect")
+async def detect(
+    request: Request,
+    files: list[UploadFile] = File(...),
+    conf: float = Form(0.8),
+    confirm_large: bool = Form(False),
+):
+    """
+    Per image: ``file``, ``width``/``height`` (original pixels),
+    ``detections`` (``class_id``, ``label``, ``score``, ``box`` as
+    ``[x1, y1, x2, y2]``) and ``timing_ms`` per inference stage.
+    ``decode_ms`` and ``total_ms`` cover the whole request.
+    """
+    t0 = time.perf_counter()
+
+    # Validation -----------------------------------
+    if not files:
+        raise HTTPException(400, "At least one image is required")
+    if len(files) > MAX_FILES:
+        raise HTTPException(413, f"At most {MAX_FILES} images per request")
+    if not (0.0 <= conf <= 1.0):
+        raise HTTPException(400, "Confidence threshold must be between 0 and 1!")
+    msgpack_requested = wants_msgpack(request)
+    if msgpack_requested and msgpack is None:
+        raise HTTPException(406, "msgpack responses are not available, ask for JSON")
+
+    client = client_key(request)
+    try:
+        # one unit per image, reserved for the whole request or not at all
+        async with get_scheduler().slot(client, units=len(files)):
+            # Decode in memory, all or nothing ----------------
+            try:
+                uploads = await decode_uploads(files, IMGSZ, confirm_large=confirm_large)
+            except UploadRejected as e:
+                return rejected_response(e)
+            decode_ms = (time.perf_counter() - t0) * 1000
+
+            names = [upfile.filename or f"image{i}" for i, upfile in enumerate(files)]
+            images = await _detect_all(list(zip(names, uploads)), conf)
+    except QueueFull:
+        return busy_response()
+
+    body = {
+        "conf": conf,
+        "images": list(images),
+        "decode_ms": round(decode_ms, 2),
+        "total_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }
+    log.info(
+        "client=%s images=%d detections=%d total_ms=%.1f",
+        client,
+        len(images),
+        sum(len(img["detections"]) for img in images),
+        body["total_ms"],
+    )
+    if msgpack_requested:
+        return MsgpackResponse(body)
+    return JSONResponse(body)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+"""
+run_benchmark.py
+-----------------
+
+Time every inference backend on the same images so the fastest one for
+this hardware can be picked in ``config.yaml`` (``inference.backend``).
+
+    $ ml-benchmark                                   # all backends, input_images/
+    $ ml-benchmark --backends torch onnx --runs 5 --folder data/raw/<run_id>
+
+Numbers are logged as a table and written to
+``reports/benchmark_<timestamp>.json``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+from ml_object_detector.config.load_config import load_config
+from ml_object_detector.models.backends import BACKENDS
+from ml_object_detector.models.predictor import IMGSZ, YoloPredictor
+from ml_object_detector.utils.fs import ensure_directory_exists
+from ml_object_detector.utils.logging import setup_logs
+
+
+def benchmark_backend(backend: str, folder: Path, runs: int, batch: int) -> dict:
+    """
+    Load *backend* (exporting it if needed) and time ``runs`` passes over
+    *folder*. The first pass is a warm-up and is not counted. Artifacts
+    are not written and the detection cache is bypassed, so only the
+    model is measured.
+    """
+    t0 = time.perf_counter()
+    predictor = YoloPredictor(backend=backend)
+    load_s = time.perf_counter() - t0
+
+    stages = {"preprocess": 0.0, "inference": 0.0, "postprocess": 0.0}
+    n_images = 0
+    wall = 0.0
+    for i in range(runs + 1):
+        started = time.perf_counter()
+        seen = 0
+        for res in predictor.model.predict(
+            source=folder, stream=True, imgsz=IMGSZ, batch=batch, verbose=False
+        ):
+            seen += 1
+            if i:
+                for k in stages:
+                    stages[k] += float(res.speed.get(k) or 0.0)
+        if i:  # skip warm-up
+            wall += time.perf_counter() - started
+            n_images += seen
+
+    per_image = {f"{k}_ms": v / n_images if n_images else 0.0 for k, v in stages.items()}
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "images": n_images,
+        "images_per_s": n_images / wall if wall else 0.0,
+        **per_image,
+    }
+
+
+def main() -> None:
+    log = setup_logs()
+    cfg = load_config()
+    root = Path(cfg["ROOT"])
+
+    parser = argparse.ArgumentParser(description="Benchmark YOLO inference backends")
+    parser.add_argument(
+        "--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS
+    )
+    parser.add_argument("--folder", type=Path, default=root / "input_images")
+    parser.add_argument("--runs", type=int, default=3, help="timed passes per backend")
+    parser.add_argument("--batch", type=int, default=1)
+    args = parser.parse_args()
+
+    if not any(args.folder.iterdir()):
+        log.error("No images found in %s - aborting.", args.folder)
+        return
+
+    rows = []
+    for backend in args.backends:
+        log.info("Benchmarking backend %s on %s ...", backend, args.folder)
+        try:
+            rows.append(benchmark_backend(backend, args.folder, args.runs, args.batch))
+        except Exception as e:  # missing onnxruntime/openvino, export failure ...
+            log.error("Backend %s failed: %s", backend, e)
+            rows.append({"backend": backend, "error": str(e)})
+
+    log.info(
+        "%-9s %8s %8s %10s %10s %10s",
+        "backend", "load_s", "img/s", "pre_ms", "infer_ms", "post_ms",
+    )
+    for r in rows:
+        if "error" in r:
+            log.info("%-9s failed: %s", r["backend"], r["error"])
+            continue
+        log.info(
+            "%-9s %8.1f %8.1f %10.1f %10.1f %10.1f",
+            r["backend"],
+            r["load_s"],
+            r["images_per_s"],
+            r["preprocess_ms"],
+            r["inference_ms"],
+            r["postprocess_ms"],
+        )
+
+    report_dir = root / cfg["reports_dir"]
+    ensure_directory_exists(report_dir)
+    out = report_dir / f"benchmark_{datetime.now().strftime('%Y-%m-%dT%H-%M-%S')}.json"
+    out.write_text(
+        json.dumps({"imgsz": IMGSZ, "batch": args.batch, "results": rows}, indent=2),
+        encoding="utf-8",
+    )
+    log.info("Benchmark written in %s", out.resolve())
+
+
+if __name__ == "__main__":
+    main()
@@ -12,15 +12,16 @@ from __future__ import annotations
 from pathlib import Path
 
 import importlib
+import requests
 
 from ml_object_detector.config.load_config import load_config
-from ml_object_detector.etl.download_images import download_image
+from ml_object_detector.etl.download_images import download_queries
 from ml_object_detector.utils.logging import setup_logs
 # from ml_object_detector.utils.fs import ensure_directory_exists
 from ml_object_detector.models.predictor import YoloPredictor
 from ml_object_detector.postprocess.analysis import (
     summarise_predictions,
-    build_summaries,
+    build_table,
 )
 from ml_object_detector.postprocess.html_report import write_html_report
 
@@ -43,9 +44,9 @@ def run_custom_etl(queries: list[str], n: int, log) -> None:
         log.info("Image predictor has been canceled, no images will be downloaded.")
         return False
 
-    for query in queries:
-        log.info("Downloading %d images for query: %s", n, query)
-        download_image(query, n=n, log=log)
+    # All terms are fetched concurrently through one pooled downloader
+    log.info("Downloading %d images for queries: %s", n, ", ".join(queries))
+    download_queries(queries, n=n, log=log)
 
     log.info("ETL finished for: %s", ", ".join(queries))
     return True
@@ -114,7 +115,7 @@ def main() -> None:
     except ModuleNotFoundError as e:
         log.error("Could not locate ETL module: %s", e)
         return
-    except RuntimeError as e:  # e.g. network failure in download_image
+    except (RuntimeError, requests.RequestException) as e:  # e.g. network failure
         log.error("Download failed: %s", e)
         return
 
@@ -152,16 +153,19 @@ def main() -> None:
         log.warning("No images found in %s - skipping prediction step.", images_dir)
         return
 
-    results = YoloPredictor().predict_images_in_folder(folder=images_dir, conf=conf)
+    # One pass over the stream: images are folded into the table as they
+    # come, decoded pixels are released as we go
+    table = build_table(
+        YoloPredictor().stream_images_in_folder(folder=images_dir, conf=conf),
+        conf_threshold=conf,
+    )
     log.info("Prediction finished, processing results...")
 
-    summaries = build_summaries(results, conf_threshold=conf)
-
-    for line in summarise_predictions(results, conf_threshold=conf):
+    for line in summarise_predictions(table, conf_threshold=conf):
         log.info(line)
 
     report_dir = Path(cfg["ROOT"]) / cfg["reports_dir"]
-    report = write_html_report(summaries, out_dir=report_dir)
+    report = write_html_report(table.rows(), reports_dir=report_dir)
 
     print(f"HTML report written in {report.resolve()}")
     log.info("Pipeline finished successfully.")
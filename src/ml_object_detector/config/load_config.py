@@ -1,11 +1,74 @@
+"""
+ml_object_detector.config.load_config
+-------------------------------------
+
+The YAML configuration, parsed and validated once per process.
+
+:func:`load_config` returns the same :class:`Config` object on every call,
+so reading a setting is a dict lookup, not disk I/O and YAML parsing; the
+file is located (resolved, checked to exist) only when it is first read.
+:func:`reload_config` re-reads the file and updates that object *in
+place*: modules that kept ``cfg = load_config()`` see the new values the
+next time they look a key up, and callbacks registered with
+:func:`on_reload` can rebuild what they derived from it (policies,
+template environments). A broken file is rejected and the previous
+values stay in effect.
+
+:func:`watch_config` starts a :class:`ConfigWatcher` when
+``hot_reload.enabled`` is set; it polls the file's mtime and reloads it
+when it changes. Settings copied into constants at import time
+(pool sizes, paths) still need a restart.
+"""
+
+from __future__ import annotations
+
+import logging
 import os
+import threading
 from pathlib import Path
+from typing import Any, Callable
+
 import yaml
 
+log = logging.getLogger(__name__)
 
 # locate config.yaml next to this file
 _DEFAULT_CFG = Path(__file__).resolve().with_name("config.yaml")
 
+PATH_KEYS = ("input_dir", "output_dir", "model_dir", "logs_dir")
+REQUIRED_KEYS = (*PATH_KEYS, "model_name", "confidence_threshold", "file_inspection")
+
+
+class ConfigError(ValueError):
+    """Raised when config.yaml is missing settings or has invalid values."""
+
+
+class Config(dict):
+    """Parsed ``config.yaml``: a plain dict plus where it was read from."""
+
+    def __init__(self, data: dict, path: Path, mtime_ns: int) -> None:
+        super().__init__(data)
+        self.path = path
+        self.mtime_ns = mtime_ns
+
+    @property
+    def confidence_threshold(self) -> float:
+        return float(self["confidence_threshold"])
+
+    def replace(self, other: "Config") -> None:
+        """Take over the values of *other* (no moment without a key)."""
+        self.update(other)
+        for key in set(self) - set(other):
+            del self[key]
+        self.mtime_ns = other.mtime_ns
+
+
+_cache: dict[Path, Config] = {}
+# load_config() argument / CONFIG_FILE value as given -> its Config
+_by_arg: dict[str | None, Config] = {}
+_listeners: list[Callable[[Config], None]] = []
+_lock = threading.RLock()
+
 
 def _pick_cfg_file(explicit: str | Path | None) -> Path:
     """
@@ -25,21 +88,168 @@ def _pick_cfg_file(explicit: str | Path | None) -> Path:
     return cfg_file
 
 
-def load_config(config_path: str | Path | None = None) -> dict:
-    """ """
-    config_file = _pick_cfg_file(config_path)
+def validate(cfg: dict) -> None:
+    """Check the settings the app cannot run without; raise :class:`ConfigError`."""
+    problems = [f"missing key {key!r}" for key in REQUIRED_KEYS if key not in cfg]
+
+    try:
+        if not 0.0 <= float(cfg.get("confidence_threshold", 0.0)) <= 1.0:
+            problems.append("confidence_threshold must be between 0 and 1")
+    except (TypeError, ValueError):
+        problems.append("confidence_threshold must be a number")
 
+    section = cfg.get("file_inspection") or {}
+    if not isinstance(section, dict):
+        problems.append("file_inspection must be a mapping")
+        section = {}
+    if "file_inspection" in cfg and not section.get("allowed_mime"):
+        problems.append("file_inspection.allowed_mime must list at least one type")
+    try:
+        hard = float(section.get("hard_limit_mb", 1))
+        soft = section.get("soft_limit_mb")
+        if hard <= 0:
+            problems.append("file_inspection.hard_limit_mb must be > 0")
+        if soft is not None and not 0 < float(soft) <= hard:
+            problems.append("file_inspection.soft_limit_mb must be > 0 and <= hard_limit_mb")
+    except (TypeError, ValueError):
+        problems.append("file_inspection limits must be numbers")
+
+    if problems:
+        raise ConfigError("Invalid configuration: " + "; ".join(problems))
+
+
+def _read(config_file: Path) -> Config:
+    mtime_ns = config_file.stat().st_mtime_ns
     with open(config_file, "r") as f:
-        cfg = yaml.safe_load(f)
+        data = yaml.safe_load(f)
+    if not isinstance(data, dict):
+        raise ConfigError(f"{config_file} does not hold a mapping")
+    validate(data)
 
     # -- anchor every relative path to "base_dir" interpreted relative to *this* file
     project_root = Path(__file__).resolve().parents[3]
-    cfg["ROOT"] = project_root
+    data["ROOT"] = project_root
 
     def abs_path_(rel_path: str | Path) -> Path:
         return (project_root / rel_path).expanduser().resolve()
 
-    for key in ["input_dir", "output_dir", "model_dir", "logs_dir"]:
-        cfg[key] = abs_path_(cfg[key])
+    for key in PATH_KEYS:
+        data[key] = abs_path_(data[key])
+
+    return Config(data, config_file, mtime_ns)
+
+
+def load_config(config_path: str | Path | None = None) -> Config:
+    """
+    The cached configuration, read and validated on first use.
+
+    Cached by *config_path* (or ``CONFIG_FILE``) as given, so a hit touches
+    no file; the path is resolved once, when it is first seen.
+    """
+    arg = str(config_path) if config_path else os.getenv("CONFIG_FILE")
+    cfg = _by_arg.get(arg)
+    if cfg is not None:
+        return cfg
+    with _lock:
+        config_file = _pick_cfg_file(config_path)
+        cfg = _cache.get(config_file)
+        if cfg is None:
+            cfg = _cache[config_file] = _read(config_file)
+        _by_arg[arg] = cfg
+        return cfg
+
+
+def reload_config(config_path: str | Path | None = None) -> Config:
+    """
+    Re-read the file into the cached object and notify :func:`on_reload`
+    callbacks. Raises (and keeps the current values) if the file is invalid.
+    """
+    config_file = _pick_cfg_file(config_path)
+    with _lock:
+        fresh = _read(config_file)
+        cfg = _cache.setdefault(config_file, fresh)
+        if cfg is not fresh:
+            cfg.replace(fresh)
+        listeners = list(_listeners)
 
+    for callback in listeners:
+        try:
+            callback(cfg)
+        except Exception:
+            log.exception("Config reload callback %r failed", callback)
+    log.info("Configuration reloaded from %s", config_file)
     return cfg
+
+
+def clear_config_cache() -> None:
+    """Forget every loaded file; the next :func:`load_config` reads from disk."""
+    with _lock:
+        _cache.clear()
+        _by_arg.clear()
+
+
+def on_reload(callback: Callable[[Config], Any]) -> Callable[[Config], Any]:
+    """Register *callback(cfg)* to run after each reload (usable as a decorator)."""
+    with _lock:
+        _listeners.append(callback)
+    return callback
+
+
+class ConfigWatcher:
+    """
+    Daemon thread reloading the configuration when its file changes.
+
+    Parameters
+    ----------
+    interval_s  : seconds between two mtime checks
+    config_path : file to watch, default as for :func:`load_config`
+    """
+
+    def __init__(self, interval_s: float = 2.0, config_path: str | Path | None = None) -> None:
+        self.interval_s = float(interval_s)
+        self.config_path = config_path
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._seen_ns = 0  # mtime of the last file tried, valid or not
+
+    def start(self) -> "ConfigWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s + 1)
+            self._thread = None
+
+    def check(self) -> bool:
+        """Reload if the file changed since it was last seen; True when reloaded."""
+        cfg = load_config(self.config_path)
+        try:
+            mtime_ns = cfg.path.stat().st_mtime_ns
+        except OSError:
+            return False
+        if mtime_ns == max(cfg.mtime_ns, self._seen_ns):
+            return False
+        self._seen_ns = mtime_ns
+        try:
+            reload_config(self.config_path)
+            return True
+        except (OSError, yaml.YAMLError, ConfigError) as e:
+            # keep serving the last good values, retry on the next change
+            log.error("Config not reloaded: %s", e)
+            return False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.check()
+
+
+def watch_config(config_path: str | Path | None = None) -> ConfigWatcher | None:
+    """Started :class:`ConfigWatcher` if ``hot_reload.enabled`` is set, else None."""
+    settings = load_config(config_path).get("hot_reload") or {}
+    if not settings.get("enabled", False):
+        return None
+    return ConfigWatcher(float(settings.get("interval_s", 2.0)), config_path).start()
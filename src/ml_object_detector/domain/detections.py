@@ -0,0 +1,101 @@
+"""
+ml_object_detector.domain.detections
+------------------------------------
+
+Lightweight, picklable per-image detection record.
+
+An ``ultralytics`` ``Results`` object keeps the decoded original image
+(``orig_img``) alive, which is several MB per photo. Converting to
+:class:`ImageDetections` keeps only what reports and exports need, so
+the image array can be garbage-collected as soon as inference is done.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import Any, Mapping
+
+import numpy as np
+
+
+def _to_numpy(values: Any) -> np.ndarray:
+    """torch.Tensor / np.ndarray / list -> np.ndarray on CPU."""
+    if hasattr(values, "cpu"):
+        values = values.cpu()
+    if hasattr(values, "numpy"):
+        values = values.numpy()
+    return np.asarray(values)
+
+
+@dataclass
+class ImageDetections:
+    path: str  # source image path
+    names: Mapping[int, str]  # class id -> label
+    cls: np.ndarray  # (N,) int class ids
+    conf: np.ndarray  # (N,) float scores
+    xyxy: np.ndarray  # (N, 4) boxes in original pixel coordinates
+    speed: dict[str, float] = field(default_factory=dict)  # ms per stage
+    orig_shape: tuple[int, int] | None = None
+
+    def __len__(self) -> int:
+        return int(self.cls.shape[0])
+
+    def above(self, conf: float) -> "ImageDetections":
+        """Copy keeping only detections with ``score >= conf``."""
+        keep = self.conf >= conf
+        if keep.all():
+            return self
+        return replace(
+            self, cls=self.cls[keep], conf=self.conf[keep], xyxy=self.xyxy[keep]
+        )
+
+    def rescaled(
+        self, sx: float, sy: float, orig_shape: tuple[int, int]
+    ) -> "ImageDetections":
+        """Copy with boxes scaled by ``(sx, sy)``, e.g. back to full-size pixels."""
+        factors = np.array([sx, sy, sx, sy], dtype=np.float32)
+        return replace(self, xyxy=self.xyxy * factors, orig_shape=tuple(orig_shape))
+
+    def to_records(self, ndigits: int = 2) -> list[dict]:
+        """One plain dict per box (JSON / msgpack ready)."""
+        boxes = np.round(self.xyxy.astype(np.float64), ndigits).tolist()
+        return [
+            {
+                "class_id": int(c),
+                "label": self.names[int(c)],
+                "score": round(float(s), 4),
+                "box": box,  # x1, y1, x2, y2 in original pixels
+            }
+            for c, s, box in zip(self.cls, self.conf, boxes)
+        ]
+
+    @classmethod
+    def from_result(cls, result: Any) -> "ImageDetections":
+        """Copy the boxes out of an ultralytics ``Results`` (drops the image)."""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            cls_ids = np.empty(0, dtype=np.int64)
+            scores = np.empty(0, dtype=np.float32)
+            xyxy = np.empty((0, 4), dtype=np.float32)
+        else:
+            cls_ids = _to_numpy(boxes.cls).astype(np.int64)
+            scores = _to_numpy(boxes.conf).astype(np.float32)
+            xyxy = _to_numpy(boxes.xyxy).astype(np.float32).reshape(-1, 4)
+
+        orig_shape = getattr(result, "orig_shape", None)
+        return cls(
+            path=str(result.path),
+            names=dict(result.names),
+            cls=cls_ids,
+            conf=scores,
+            xyxy=xyxy,
+            speed=dict(getattr(result, "speed", None) or {}),
+            orig_shape=tuple(orig_shape[:2]) if orig_shape is not None else None,
+        )
+
+
+def as_detections(result: Any) -> ImageDetections:
+    """Accept either a ``Results`` or an ``ImageDetections``."""
+    if isinstance(result, ImageDetections):
+        return result
+    return ImageDetections.from_result(result)
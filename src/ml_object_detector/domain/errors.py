@@ -1,2 +1,22 @@
 class InvalidImageError(Exception):
     """Raised when a payload fails the image inspection pipeline."""
+
+
+class ConfirmationRequired(InvalidImageError):
+    """Raised when a file exceeds the soft size limit without confirmation."""
+
+
+class UploadRejected(InvalidImageError):
+    """Raised when files of a multi-file upload fail inspection."""
+
+    def __init__(self, errors: list[dict]):
+        self.errors = errors  # [{"file": ..., "error": ..., "confirm_required": ...}]
+        super().__init__(
+            f"{len(errors)} file(s) rejected: "
+            + "; ".join(f"{e['file']}: {e['error']}" for e in errors)
+        )
+
+    @property
+    def confirm_required(self) -> bool:
+        """True if confirming large files would make the upload acceptable."""
+        return all(e.get("confirm_required") for e in self.errors)
@@ -0,0 +1,142 @@
+"""
+ml_object_detector.domain.table
+-------------------------------
+
+Columnar detections of a whole run.
+
+:class:`DetectionTable` keeps one NumPy array per column (image index,
+class id, score, box) instead of one dict per box. Filtering by the
+confidence threshold is a single mask per image, and consumers that work
+on columns (counts, exports) never build per-box Python objects. The
+row-per-detection dicts the HTML template iterates over are produced
+lazily by :meth:`DetectionTable.rows`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from ml_object_detector.domain.detections import ImageDetections, as_detections
+
+
+@dataclass
+class DetectionTable:
+    paths: list[str]  # one entry per image, including images without boxes
+    names: dict[int, str]  # class id -> label
+    image: np.ndarray  # (N,) int32 index into `paths`
+    cls: np.ndarray  # (N,) int64 class ids
+    conf: np.ndarray  # (N,) float32 scores
+    xyxy: np.ndarray  # (N, 4) float32 boxes in original pixel coordinates
+
+    def __len__(self) -> int:
+        return int(self.cls.shape[0])
+
+    @property
+    def n_images(self) -> int:
+        return len(self.paths)
+
+    @classmethod
+    def from_detections(
+        cls, results: Iterable[Any], conf_threshold: float = 0.0
+    ) -> "DetectionTable":
+        """Results or ImageDetections (consumed once) -> table of boxes >= threshold."""
+        builder = TableBuilder(conf_threshold)
+        for result in results:
+            builder.add(result)
+        return builder.build()
+
+    def rows(self, run_id: str = "") -> "SummaryRows":
+        """Lazy ``{"image", "object", "conf"}`` rows, see ``build_summaries``."""
+        return SummaryRows(self, run_id)
+
+
+@dataclass
+class TableBuilder:
+    """Accumulate per-image columns, concatenate once in :meth:`build`."""
+
+    conf_threshold: float = 0.0
+    n_rows: int = 0  # detections kept so far
+    paths: list[str] = field(default_factory=list)
+    names: dict[int, str] = field(default_factory=dict)
+    _chunks: list[tuple[np.ndarray, ...]] = field(default_factory=list)
+
+    def add(self, result: Any) -> ImageDetections:
+        """Add one image (Results or ImageDetections); returns its detections."""
+        det = as_detections(result)
+        keep = det.conf >= self.conf_threshold
+        if keep.any():
+            n = int(keep.sum())
+            self.n_rows += n
+            self._chunks.append(
+                (
+                    np.full(n, len(self.paths), dtype=np.int32),
+                    det.cls[keep],
+                    det.conf[keep],
+                    det.xyxy[keep],
+                )
+            )
+        self.paths.append(det.path)
+        self.names.update(det.names)
+        return det
+
+    def build(self) -> DetectionTable:
+        if self._chunks:
+            image, cls_ids, scores, xyxy = (np.concatenate(c) for c in zip(*self._chunks))
+        else:
+            image = np.empty(0, dtype=np.int32)
+            cls_ids = np.empty(0, dtype=np.int64)
+            scores = np.empty(0, dtype=np.float32)
+            xyxy = np.empty((0, 4), dtype=np.float32)
+        return DetectionTable(
+            paths=list(self.paths),
+            names=dict(self.names),
+            image=image,
+            cls=cls_ids.astype(np.int64, copy=False),
+            conf=scores.astype(np.float32, copy=False),
+            xyxy=xyxy.astype(np.float32, copy=False).reshape(-1, 4),
+        )
+
+
+class SummaryRows(Sequence):
+    """Read-only list-like view of a table as one dict per detection."""
+
+    def __init__(self, table: DetectionTable, run_id: str = "") -> None:
+        self.table = table
+        prefix = f"{run_id}/" if run_id else ""
+        # annotated copies are always saved as <stem>.jpg
+        self._images = [f"{prefix}{Path(p).stem}.jpg" for p in table.paths]
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def columns(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``image``, ``object`` and ``conf`` of every row as arrays, no dicts."""
+        t = self.table
+        images = np.array(self._images, dtype=object).take(t.image)
+        class_ids, inverse = np.unique(t.cls, return_inverse=True)
+        labels = np.array([t.names[c] for c in class_ids.tolist()], dtype=object)
+        return images, labels.take(inverse), t.conf
+
+    def _row(self, image: int, cls_id: int, score: float) -> dict:
+        return {
+            "image": self._images[image],
+            "object": self.table.names[cls_id],
+            "conf": score,
+        }
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        t = self.table
+        return self._row(int(t.image[i]), int(t.cls[i]), float(t.conf[i]))
+
+    def __iter__(self) -> Iterator[dict]:
+        t = self.table
+        # one C-level conversion per column instead of one per scalar
+        for image, cls_id, score in zip(t.image.tolist(), t.cls.tolist(), t.conf.tolist()):
+            yield self._row(image, cls_id, score)
@@ -5,22 +5,59 @@ import requests
 import logging
 import logging.config
 import hashlib
+import json
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from ml_object_detector.config.load_config import load_config
+from ml_object_detector.etl.photo_index import PhotoIndex, link_into
 from ml_object_detector.utils.fs import ensure_directory_exists
 from dotenv import load_dotenv
 
 load_dotenv()
 cfg = load_config()
-PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
-if not PEXELS_API_KEY:
-    raise RuntimeError("PEXELS_API_KEY missing. Put it in .env.")
-HEADERS = {"Authorization": PEXELS_API_KEY}
 BASE_DIR = Path(cfg["ROOT"])
 DESTINATION_DIR = Path(BASE_DIR / cfg["input_dir"])
 ensure_directory_exists(DESTINATION_DIR)
 LOGS_DIR = Path(BASE_DIR / cfg["logs_dir"])
 
+# Downloader tuning (config.yaml -> etl) ---------------------------
+ETL = cfg.get("etl") or {}
+SEARCH_URL = ETL.get("search_url", "https://api.pexels.com/v1/search")
+MAX_WORKERS = int(ETL.get("max_workers", 8))  # concurrent transfers overall
+PER_HOST_LIMIT = int(ETL.get("per_host_limit", 4))  # concurrent transfers per host
+RETRIES = int(ETL.get("retries", 3))
+BACKOFF_S = float(ETL.get("backoff_s", 0.5))  # 0.5, 1, 2 ... between retries
+TIMEOUT_S = float(ETL.get("timeout_s", 30))
+CHUNK = int(ETL.get("chunk_kb", 64)) * 1024
+RENDITION = ETL.get("rendition", "auto")  # auto | original | large2x | large | medium
+MIN_LONG_SIDE = int(ETL.get("min_long_side") or cfg.get("imgsz", 640))
+METADATA_DIR = "metadata"  # <dest_dir>/metadata/<run_id>.json, one file per run
+INDEX_PATH = BASE_DIR / ETL.get("index_path", "data/cache/photo_index.sqlite3")
+DEDUPE = bool(ETL.get("dedupe", True))  # consult the photo index before fetching
+
+# Pexels size variants that keep the full frame (portrait/landscape/tiny
+# crop), smallest first, with the box each one is resized to fit in.
+# None = no bound on that side. Images are never upscaled.
+RENDITIONS: dict[str, tuple[int | None, int | None]] = {
+    "small": (None, 130),
+    "medium": (None, 350),
+    "large": (940, 650),
+    "large2x": (1880, 1300),
+    "original": (None, None),
+}
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_host_slots: dict[str, threading.BoundedSemaphore] = {}
+_index: PhotoIndex | None = None
+
 
 def make_immutable_name(raw_bytes: bytes, ext: str = "") -> str:
     """
@@ -30,52 +67,314 @@ def make_immutable_name(raw_bytes: bytes, ext: str = "") -> str:
     hash = hashlib.sha1(raw_bytes).hexdigest()[:12]
     return f"{hash}{ext}"
 
-def download_image(
-    query: str,
-    n: int = 5,
-    log: logging.Logger | None = None,
-    dest_dir: Path | None = None,
-) -> list[Path]:
-    """Download *n* images for *query* into DESTINATION_DIR."""
-    assert isinstance(n, int) and n > 0, "n must be a positive integer"
-    log = log or logging.getLogger("download_logger")
 
-    DEST = Path(dest_dir or DESTINATION_DIR)           # NEW
-    ensure_directory_exists(DEST)                      # ensure
+def _name_from_digest(hexdigest: str, ext: str = "") -> str:
+    """Same naming as `make_immutable_name`, from an incremental hash."""
+    return f"{hexdigest[:12]}{ext}"
+
+
+def get_session() -> requests.Session:
+    """
+    Process-wide Session: keep-alive connection pool sized for
+    MAX_WORKERS, with retries + exponential backoff on transient errors.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRIES,
+                backoff_factor=BACKOFF_S,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"GET"}),
+                respect_retry_after_header=True,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=MAX_WORKERS,
+                pool_maxsize=MAX_WORKERS,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def get_index() -> PhotoIndex | None:
+    """Process-wide photo index, opened on first use; None when disabled."""
+    global _index
+    if not DEDUPE:
+        return None
+    with _session_lock:
+        if _index is None:
+            _index = PhotoIndex(INDEX_PATH)
+        return _index
+
 
-    url = "https://api.pexels.com/v1/search"
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc
+    with _session_lock:
+        return _host_slots.setdefault(host, threading.BoundedSemaphore(PER_HOST_LIMIT))
+
+
+def _url_suffix(url: str) -> str:
+    """File extension of *url*, ignoring any query string."""
+    return Path(urlparse(url).path).suffix
+
+
+def expected_size(photo: dict, rendition: str) -> tuple[int, int] | None:
+    """(width, height) Pexels will serve for *rendition*, if known."""
+    w, h = photo.get("width"), photo.get("height")
+    if not w or not h:
+        return None
+    max_w, max_h = RENDITIONS[rendition]
+    scale = min(
+        1.0,
+        max_w / w if max_w else 1.0,
+        max_h / h if max_h else 1.0,
+    )
+    return round(w * scale), round(h * scale)
+
+
+def pick_rendition(
+    photo: dict, policy: str = RENDITION, min_long_side: int = MIN_LONG_SIDE
+) -> tuple[str, str]:
+    """
+    Choose which ``photo["src"]`` variant to download.
+
+    ``policy="auto"`` picks the smallest full-frame variant whose longest
+    side is at least *min_long_side* (the model input size), so YOLO gets
+    every pixel it can use and nothing more. Any other policy names a
+    variant explicitly (``"original"`` = full resolution on demand).
+
+    Returns
+    -------
+    (rendition, url)
+    """
+    src = photo["src"]
+    if policy != "auto":
+        if policy not in src:
+            raise ValueError(f"Unknown Pexels rendition {policy!r}")
+        return policy, src[policy]
+
+    if not (photo.get("width") and photo.get("height")):
+        # can't size the variants; large2x (1880px wide) covers any imgsz we use
+        name = "large2x" if "large2x" in src else "original"
+        return name, src[name]
+
+    for name in RENDITIONS:
+        if name in src and max(expected_size(photo, name)) >= min_long_side:
+            return name, src[name]
+    return "original", src["original"]  # the original itself is smaller
+
+
+def _write_metadata(
+    dest: Path, run_id: str, queries: list[str], entries: list[dict], policy: str
+) -> Path:
+    """Record one run in ``<dest>/metadata/<run_id>.json``; older runs are left alone."""
+    meta_path = dest / METADATA_DIR / f"{run_id}.json"
+    ensure_directory_exists(meta_path.parent)
+    meta = {
+        "run_id": run_id,
+        "queries": queries,
+        "rendition_policy": policy,
+        "min_long_side": MIN_LONG_SIDE,
+        "photos": entries,
+    }
+    meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return meta_path
+
+
+def api_headers() -> dict[str, str]:
+    """Pexels auth header; the key is only required once a search is made."""
+    key = os.getenv("PEXELS_API_KEY")
+    if not key:
+        raise RuntimeError("PEXELS_API_KEY missing. Put it in .env.")
+    return {"Authorization": key}
+
+
+def search_photos(query: str, n: int) -> list[dict]:
+    """Pexels search: return up to *n* photo records for *query*."""
     params = {"query": query, "per_page": n}
-    response = requests.get(url, headers=HEADERS, params=params, timeout=30)
+    headers = api_headers()
+    with _host_slot(SEARCH_URL):
+        response = get_session().get(
+            SEARCH_URL, headers=headers, params=params, timeout=TIMEOUT_S
+        )
     response.raise_for_status()
+    return response.json()["photos"][:n]
 
-    downloaded = 0
-    log.info("Files will saved in %s", DEST)
-    log.info("Downloading %d images for query '%s'", n, query)
 
-    saved: list[Path] = []
-    for photo in response.json()["photos"]:
-        image_url = photo["src"]["original"]
+def fetch_to_dir(
+    image_url: str, dest: Path, log: logging.Logger
+) -> tuple[Path, bool]:
+    """
+    Stream *image_url* into *dest*, hashing while writing.
+
+    The body goes to a temporary file in *dest* (never fully in memory)
+    and is atomically renamed to its content-addressed name.
 
-        # 1. Download image bytes
-        image_bytes = requests.get(image_url, timeout=30).content
+    Returns
+    -------
+    (path, is_new)
+        The content-addressed path, and False when a file with the same
+        content already existed (nothing was written).
+    """
+    ext = _url_suffix(image_url)
+    digest = hashlib.sha1()
 
-        # 2. Derive a deterministic filename
-        ext = Path(image_url).suffix
-        hashed_name = make_immutable_name(image_bytes, ext)
-        filename = DEST / hashed_name
+    fd, tmp_name = tempfile.mkstemp(dir=dest, prefix=".part-", suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as out, _host_slot(image_url):
+            with get_session().get(image_url, timeout=TIMEOUT_S, stream=True) as resp:
+                resp.raise_for_status()
+                for chunk in resp.iter_content(chunk_size=CHUNK):
+                    digest.update(chunk)
+                    out.write(chunk)
 
+        filename = dest / _name_from_digest(digest.hexdigest(), ext)
         if filename.exists():
             log.info(f"File {filename} already exists, skipping download.")
-            continue
+            tmp_path.unlink(missing_ok=True)
+            return filename, False
 
-        # Ensure parent directory exists
-        ensure_directory_exists(filename.parent)
-        filename.write_bytes(image_bytes)
-
-        downloaded += 1
-        saved.append(filename)
+        os.replace(tmp_path, filename)  # atomic on the same filesystem
         log.debug("Downloaded: %s", filename)
+        return filename, True
+
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def fetch_photo(
+    photo_id: str | int | None,
+    rendition: str,
+    url: str,
+    dest: Path,
+    log: logging.Logger,
+) -> tuple[Path, bool, str]:
+    """
+    Put one photo rendition into *dest*, from the local photo index when a
+    previous run already has it (hard link, no HTTP), otherwise by
+    :func:`fetch_to_dir`.
+
+    Returns
+    -------
+    (path, is_new, source)
+        *source* is ``"index"`` or ``"download"``.
+    """
+    index = get_index()
+    if index is not None:
+        known = index.lookup(photo_id, rendition, url)
+        if known is not None:
+            path, is_new = link_into(known, dest)
+            log.debug("Photo %s (%s) reused from %s", photo_id, rendition, known)
+            index.record(photo_id, rendition, url, path)  # keep the newest copy
+            return path, is_new, "index"
+
+    path, is_new = fetch_to_dir(url, dest, log)
+    if index is not None:
+        index.record(photo_id, rendition, url, path)
+    return path, is_new, "download"
+
+
+def download_queries(
+    queries: list[str],
+    n: int = 5,
+    log: logging.Logger | None = None,
+    dest_dir: Path | None = None,
+    rendition: str | None = None,
+    run_id: str | None = None,
+) -> dict[str, list[Path]]:
+    """
+    Download *n* images for **every** query concurrently.
+
+    All searches run in parallel, then all photos are fetched through one
+    pool (MAX_WORKERS transfers, at most PER_HOST_LIMIT per host). A photo
+    that still fails after the retries is logged and skipped; a failed
+    search raises ``requests.RequestException``.
+
+    Each photo is fetched in the size picked by :func:`pick_rendition`
+    (*rendition* overrides ``etl.rendition``), and the choice is recorded
+    in ``<dest_dir>/metadata/<run_id>.json`` (*run_id* defaults to a
+    timestamp) so the run can be reproduced. Photos a previous run already
+    downloaded are hard-linked from the photo index instead of being
+    fetched again.
 
-    log.info("Requested %d photos, saved %d photos", n, downloaded)
+    Returns
+    -------
+    dict
+        query -> list of newly saved paths (duplicates are not listed).
+    """
+    assert isinstance(n, int) and n > 0, "n must be a positive integer"
+    log = log or logging.getLogger("download_logger")
+
+    DEST = Path(dest_dir or DESTINATION_DIR)
+    ensure_directory_exists(DEST)
+    log.info("Files will saved in %s", DEST)
+
+    policy = rendition or RENDITION
+    run_id = run_id or f"{datetime.now().strftime('%Y-%m-%dT%H-%M-%S')}_{uuid.uuid4().hex[:6]}"
+    saved: dict[str, list[Path]] = {q: [] for q in queries}
+    entries: list[dict] = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="dl") as pool:
+        searches = {q: pool.submit(search_photos, q, n) for q in queries}
+
+        transfers = []
+        for query, search in searches.items():
+            photos = search.result()
+            log.info("Downloading %d images for query '%s'", len(photos), query)
+            for photo in photos:
+                size_name, url = pick_rendition(photo, policy)
+                entry = {
+                    "query": query,
+                    "photo_id": photo.get("id"),
+                    "rendition": size_name,
+                    "url": url,
+                    "expected_size": expected_size(photo, size_name),
+                }
+                transfers.append(
+                    (
+                        query,
+                        entry,
+                        pool.submit(
+                            fetch_photo, photo.get("id"), size_name, url, DEST, log
+                        ),
+                    )
+                )
+
+        for query, entry, transfer in transfers:
+            try:
+                path, is_new, source = transfer.result()
+            except requests.RequestException as e:  # one bad photo != failed run
+                log.warning("Download failed for query '%s': %s", query, e)
+                continue
+            entries.append({**entry, "file": path.name, "source": source})
+            if is_new:
+                saved[query].append(path)
+
+    meta_path = _write_metadata(DEST, run_id, queries, entries, policy)
+
+    for query, paths in saved.items():
+        log.info("Requested %d photos for '%s', saved %d photos", n, query, len(paths))
+    reused = sum(e["source"] == "index" for e in entries)
+    if reused:
+        log.info("%d of %d photos reused from the local photo index", reused, len(entries))
+    log.info("Run %s recorded in %s", run_id, meta_path)
     log.info("Details saved in %s", LOGS_DIR / "download_images.log")
     return saved
+
+
+def download_image(
+    query: str,
+    n: int = 5,
+    log: logging.Logger | None = None,
+    dest_dir: Path | None = None,
+    rendition: str | None = None,
+) -> list[Path]:
+    """Download *n* images for *query* into DESTINATION_DIR."""
+    return download_queries(
+        [query], n=n, log=log, dest_dir=dest_dir, rendition=rendition
+    )[query]
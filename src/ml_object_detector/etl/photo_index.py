@@ -0,0 +1,128 @@
+"""
+ml_object_detector.etl.photo_index
+----------------------------------
+
+Persistent index of Pexels photos already on disk.
+
+Maps ``(photo id, rendition)`` and the rendition URL to the
+content-addressed file a previous run downloaded, so the downloader can
+skip the HTTP transfer entirely and hard-link the existing file into the
+new run directory. Only the search API call is paid for repeated queries.
+
+Backed by SQLite (stdlib), like the detection cache, so it survives
+restarts and can be shared by the API and the CLI.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS photos (
+    photo_id   TEXT NOT NULL,
+    rendition  TEXT NOT NULL,
+    url        TEXT NOT NULL,
+    path       TEXT NOT NULL,
+    added      REAL NOT NULL,
+    PRIMARY KEY (photo_id, rendition)
+);
+CREATE INDEX IF NOT EXISTS idx_photos_url ON photos(url);
+"""
+
+
+def link_into(src: Path, dest_dir: Path) -> tuple[Path, bool]:
+    """
+    Make *src* available in *dest_dir* under the same (content-addressed)
+    name: a hard link when possible, a copy across filesystems.
+
+    Returns
+    -------
+    (path, is_new)
+        False when *dest_dir* already held that file.
+    """
+    target = dest_dir / src.name
+    if target.exists():
+        return target, False
+    try:
+        os.link(src, target)
+    except FileExistsError:  # another transfer got there first
+        return target, False
+    except OSError:  # EXDEV, filesystem without hard links ...
+        shutil.copy2(src, target)
+    return target, True
+
+
+class PhotoIndex:
+    """
+    Parameters
+    ----------
+    db_path : SQLite file (created on first use)
+    """
+
+    def __init__(self, db_path: str | Path) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(
+        self, photo_id: str | int | None, rendition: str, url: str
+    ) -> Path | None:
+        """
+        Path of a local copy of this photo/rendition, or None.
+
+        Entries whose file has been deleted since are dropped, so the
+        caller simply downloads again.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path FROM photos WHERE (photo_id = ? AND rendition = ?) "
+                "OR url = ? LIMIT 1",
+                (str(photo_id), rendition, url),
+            ).fetchone()
+            if row is not None and not Path(row[0]).is_file():
+                self._conn.execute("DELETE FROM photos WHERE path = ?", (row[0],))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return Path(row[0])
+
+    def record(
+        self, photo_id: str | int | None, rendition: str, url: str, path: Path
+    ) -> None:
+        """Remember that *url* (photo/rendition) lives at *path*."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO photos "
+                "(photo_id, rendition, url, path, added) VALUES (?, ?, ?, ?, ?)",
+                (str(photo_id), rendition, url, str(Path(path).resolve()), time.time()),
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM photos").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
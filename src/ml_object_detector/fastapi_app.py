@@ -1,12 +1,16 @@
 import logging
+import time
 import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 
 from ml_object_detector.api import register_routers
-from ml_object_detector.config.load_config import load_config
+from ml_object_detector.config.load_config import load_config, watch_config
+from ml_object_detector.services import jobs, workers
 from ml_object_detector.utils.logging import setup_logs
 from ml_object_detector.utils.fs import ensure_directory_exists
 
@@ -25,8 +29,24 @@ STATIC_DIR = ROOT / cfg["static_dir"]
 for path in (REPORTS_DIR, PROCESSED_IMAGES_DIR, STATIC_DIR):
     ensure_directory_exists(path)
 
+# Lifecycle
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    jobs.start()  # requeue interrupted jobs, start the job runners
+    if (cfg.get("workers") or {}).get("warmup", True):
+        t0 = time.perf_counter()
+        await run_in_threadpool(workers.warmup)  # model(s) loaded before traffic
+        log.info("Startup warm-up took %.2f s", time.perf_counter() - t0)
+    watcher = watch_config()  # hot reload of config.yaml, if enabled
+    yield
+    if watcher is not None:
+        watcher.stop()
+    jobs.shutdown()
+    workers.shutdown()  # stop inference worker processes
+
+
 # Mount API
-app = FastAPI(title="ml-object-detector API")
+app = FastAPI(title="ml-object-detector API", lifespan=lifespan)
 
 # Middleware: inject a per-request ID into logs and response headers
 @app.middleware("http")
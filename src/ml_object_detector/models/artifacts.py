@@ -0,0 +1,142 @@
+"""
+ml_object_detector.models.artifacts
+-----------------------------------
+
+Output files of a detection, written off the inference path.
+
+Which files are produced is chosen per request:
+
+* ``json``      – nothing on disk, the caller only uses the detections;
+* ``labels``    – YOLO label file ``<out_dir>/labels/<stem>.txt`` (with scores);
+* ``annotated`` – boxes drawn on the image, ``<out_dir>/<stem>.jpg``.
+
+Rendering the boxes and JPEG-encoding them costs about as much as a small
+model's forward pass, so :class:`ArtifactWriter` does it on a few
+background threads while the model moves on to the next image. At most
+``max_pending`` results wait to be written; beyond that :meth:`submit`
+blocks, which keeps the decoded images held by pending results bounded.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable
+
+from ml_object_detector.config.load_config import load_config
+
+cfg = load_config()
+log = logging.getLogger(__name__)
+
+ARTIFACTS = cfg.get("artifacts") or {}
+
+JSON, LABELS, ANNOTATED = "json", "labels", "annotated"
+KINDS = (JSON, LABELS, ANNOTATED)
+
+
+def parse_artifacts(value: str | Iterable[str] | None) -> frozenset[str]:
+    """
+    ``"annotated,labels"`` / ``["labels"]`` / ``None`` -> files to write.
+
+    ``None`` or an empty string means the ``artifacts.default`` of
+    ``config.yaml``; ``json`` on its own means no files at all.
+
+    Raises
+    ------
+    ValueError
+        On an unknown kind.
+    """
+    if value is None or value == "":
+        value = ARTIFACTS.get("default", [ANNOTATED, LABELS])
+    if isinstance(value, str):
+        value = value.split(",")
+    kinds = {v.strip().lower() for v in value if v.strip()}
+    unknown = kinds.difference(KINDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown artifact(s) {sorted(unknown)}, expected some of {list(KINDS)}"
+        )
+    return frozenset(kinds - {JSON})
+
+
+def artifact_path(out_dir: Path, stem: str, kind: str) -> Path:
+    if kind == ANNOTATED:
+        return Path(out_dir) / f"{stem}.jpg"
+    if kind == LABELS:
+        return Path(out_dir) / "labels" / f"{stem}.txt"
+    raise ValueError(f"No file for artifact {kind!r}")
+
+
+def write_artifact(res: Any, path: Path, kind: str) -> Path:
+    """Render one artifact of an ultralytics ``Results`` (blocking)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if kind == LABELS:
+        res.save_txt(path, save_conf=True)
+        return path
+    # temp name keeps the suffix (it picks the encoder); readers never
+    # see a half-written JPEG
+    tmp = path.with_name(f".{path.stem}.tmp{path.suffix}")
+    res.save(filename=str(tmp))
+    os.replace(tmp, path)
+    return path
+
+
+class ArtifactWriter:
+    """
+    Parameters
+    ----------
+    threads     : background threads rendering/encoding artifacts
+    max_pending : artifacts queued or being written before submit() blocks
+    """
+
+    def __init__(self, threads: int = 2, max_pending: int = 32) -> None:
+        if threads < 1 or max_pending < 1:
+            raise ValueError("threads and max_pending must be >= 1")
+        self._pool = ThreadPoolExecutor(
+            max_workers=int(threads), thread_name_prefix="artifacts"
+        )
+        self._slots = threading.BoundedSemaphore(int(max_pending))
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.written = 0
+        self.failed = 0
+
+    def submit(
+        self, res: Any, out_dir: Path, stem: str, kinds: Iterable[str]
+    ) -> dict[str, Future]:
+        """Queue the requested artifacts of *res*; one future per file."""
+        futures: dict[str, Future] = {}
+        for kind in sorted(set(kinds) - {JSON}):  # "annotated" before "labels"
+            self._slots.acquire()  # back-pressure on the inference side
+            with self._lock:
+                self.pending += 1
+            future = self._pool.submit(
+                write_artifact, res, artifact_path(out_dir, stem, kind), kind
+            )
+            future.add_done_callback(self._finished)
+            futures[kind] = future
+        return futures
+
+    def _finished(self, future: Future) -> None:
+        self._slots.release()
+        with self._lock:
+            self.pending -= 1
+            if future.exception() is None:
+                self.written += 1
+            else:
+                self.failed += 1
+                log.error("Could not write artifact: %s", future.exception())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": self.pending,
+                "written": self.written,
+                "failed": self.failed,
+            }
+
+    def close(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
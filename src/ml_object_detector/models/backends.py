@@ -0,0 +1,149 @@
+"""
+ml_object_detector.models.backends
+----------------------------------
+
+Selectable CPU inference backends for :class:`YoloPredictor`.
+
+    torch     the PyTorch ``.pt`` weights as shipped (default)
+    onnx      ONNX Runtime, exported once to ``<model_dir>/exports/``
+    openvino  Intel OpenVINO IR, exported once to ``<model_dir>/exports/``
+
+The exported artifact is cached on disk and re-exported only when it is
+missing or older than the source weights. An export is built in a private
+temporary directory and moved into place with ``os.replace``, so a reader
+never sees half an artifact; the worker pool exports once in the parent
+before starting its processes (see
+:func:`ml_object_detector.services.workers.get_pool`). ``ultralytics.YOLO``
+loads every format through the same ``predict`` API, so callers never see
+the difference.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "openvino")
+
+
+def artifact_path(model_path: Path, backend: str, imgsz: int) -> Path:
+    """Where the exported model for *backend* lives (may not exist yet)."""
+    export_dir = model_path.parent / "exports"
+    stem = f"{model_path.stem}_{imgsz}"
+    if backend == "onnx":
+        return export_dir / f"{stem}.onnx"
+    if backend == "openvino":
+        # ultralytics recognises OpenVINO models by the *_openvino_model suffix
+        return export_dir / f"{stem}_openvino_model"
+    raise ValueError(f"Unknown inference backend {backend!r}; pick one of {BACKENDS}")
+
+
+def _is_fresh(artifact: Path, source: Path) -> bool:
+    if not artifact.exists():
+        return False
+    if not source.exists():  # weights not on disk, trust the artifact
+        return True
+    return artifact.stat().st_mtime >= source.stat().st_mtime
+
+
+def resolve_weights(model_path: str | Path, backend: str, imgsz: int = 640) -> Path:
+    """
+    Return the weights to hand to ``YOLO()`` for *backend*, exporting the
+    PyTorch weights once when needed.
+
+    Raises
+    ------
+    ValueError
+        If *backend* is not one of :data:`BACKENDS`.
+    """
+    model_path = Path(model_path)
+    if backend == "torch":
+        return model_path
+
+    target = artifact_path(model_path, backend, imgsz)
+    if _is_fresh(target, model_path):
+        log.info("Using cached %s export %s", backend, target)
+        return target
+
+    from ultralytics import YOLO
+
+    log.info("Exporting %s to %s (one-off, imgsz=%d)...", model_path.name, backend, imgsz)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # ultralytics writes the export next to the weights it was given: work
+    # on a private copy so concurrent exports never share a file
+    with tempfile.TemporaryDirectory(dir=target.parent, prefix=".export-") as tmp:
+        private = Path(tmp) / model_path.name
+        shutil.copy2(model_path, private)
+        # dynamic axes so batches of any size can be sent
+        exported = Path(YOLO(private).export(format=backend, imgsz=imgsz, dynamic=True))
+        if target.is_dir():
+            shutil.rmtree(target, ignore_errors=True)
+        try:
+            os.replace(exported, target)
+        except OSError:
+            if not _is_fresh(target, model_path):
+                raise
+            # another process moved its own export in first
+    log.info("%s export cached at %s", backend, target)
+    return target
+
+
+def apply_thread_settings(backend: str, threads: int) -> None:
+    """
+    Pin torch to *threads* CPU threads (0 = library default).
+
+    That covers inference with the torch backend and the pre/post-processing
+    of every backend; ONNX Runtime and OpenVINO sessions get theirs from
+    :func:`configure_session`.
+    """
+    if threads <= 0:
+        return
+
+    import torch
+
+    torch.set_num_threads(threads)
+    log.info("torch limited to %d thread(s) (backend %s)", threads, backend)
+
+
+def configure_session(model, backend: str, weights: str | Path, threads: int) -> bool:
+    """
+    Rebuild the ONNX Runtime / OpenVINO session of a loaded
+    ``ultralytics.YOLO`` with *threads* intra-op threads.
+
+    ultralytics creates these sessions itself, on the first prediction,
+    without a way to pass options; call this once after that prediction.
+    Returns False, keeping the runtime's default, when the session is not
+    found where ultralytics keeps it.
+    """
+    autobackend = getattr(getattr(model, "predictor", None), "model", None)
+    runtime = getattr(autobackend, "backend", autobackend)  # nested since ultralytics 8.4
+
+    if backend == "onnx" and hasattr(runtime, "session"):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1  # YOLO graphs are sequential
+        runtime.session = ort.InferenceSession(
+            str(weights), options, providers=runtime.session.get_providers()
+        )
+    elif backend == "openvino" and hasattr(runtime, "ov_compiled_model"):
+        import openvino as ov
+
+        xml = next(Path(weights).glob("*.xml"))
+        config = {"PERFORMANCE_HINT": "LATENCY", "INFERENCE_NUM_THREADS": threads}
+        compile_model = functools.partial(ov.Core().compile_model, device_name="CPU", config=config)
+        runtime.ov_compiled_model = compile_model(str(xml))
+        if hasattr(runtime, "compile_model"):  # used again when input shapes change
+            runtime.compile_model = compile_model
+    else:
+        log.warning("No %s session found to configure; thread count left to the runtime", backend)
+        return False
+    log.info("Inference backend %s limited to %d thread(s)", backend, threads)
+    return True
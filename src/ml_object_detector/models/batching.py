@@ -0,0 +1,222 @@
+"""
+ml_object_detector.models.batching
+----------------------------------
+
+In-process dynamic micro-batching.
+
+Callers from any thread ``submit()`` one item and get a
+:class:`concurrent.futures.Future` back. A single background thread
+collects pending items for at most ``max_wait_ms`` (or until
+``max_batch_size`` items are waiting), runs **one** batched call and fans
+the results back to the individual futures.
+
+With ``max_in_flight > 1`` several batches run at once (e.g. one per
+inference worker process). The next batch is only formed once a slot is
+free, so items arriving while every slot is busy are grouped together
+instead of queueing one by one.
+
+Usage ::
+
+    batcher = MicroBatcher(run_batch=lambda items: model(items), max_batch_size=8)
+    result = batcher.submit(item).result()
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Sequence
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class _Pending:
+    item: Any
+    future: Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    """
+    Collect items from many callers and process them in batches.
+
+    Parameters
+    ----------
+    run_batch      : callable
+        Receives a list of items and must return a sequence of results of
+        the same length, in the same order. An exception in an item's slot
+        fails that item's future only.
+    max_batch_size : int
+        Upper bound on the number of items per batched call.
+    max_wait_ms    : float
+        How long the first item of a batch may wait for company.
+    max_in_flight  : int
+        Batched calls allowed to run at the same time.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[list[Any]], Sequence[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        max_in_flight: int = 1,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be >= 1")
+
+        self._run_batch = run_batch
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = float(max_wait_ms) / 1000.0
+
+        self._queue: queue.Queue[_Pending | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self.max_in_flight = int(max_in_flight)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._runner: ThreadPoolExecutor | None = None
+        if self.max_in_flight > 1:
+            self._runner = ThreadPoolExecutor(
+                self.max_in_flight, thread_name_prefix="micro-batch"
+            )
+
+        # Observability ---------------------------
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Counter[int] = Counter()
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._items = 0
+
+    # Public API ---------------------------------------------------
+
+    def submit(self, item: Any) -> Future:
+        """Queue *item* and return a future resolved with its result."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put(_Pending(item, future))
+        return future
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the batching metrics:
+
+            batches        : number of batched calls so far
+            items          : number of items processed
+            batch_sizes    : histogram {batch size: count}
+            queue_wait_ms  : {"avg": ..., "max": ...} time spent waiting in the queue
+            pending        : items currently queued
+        """
+        with self._stats_lock:
+            batches = sum(self._batch_sizes.values())
+            avg = self._wait_total_ms / self._items if self._items else 0.0
+            return {
+                "batches": batches,
+                "items": self._items,
+                "batch_sizes": dict(sorted(self._batch_sizes.items())),
+                "queue_wait_ms": {"avg": avg, "max": self._wait_max_ms},
+                "pending": self._queue.qsize(),
+            }
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Stop the worker thread once the queue has drained."""
+        if self._thread is None:
+            return
+        self._queue.put(None)  # sentinel
+        self._thread.join(timeout)
+        self._thread = None
+
+    # Internals ----------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="micro-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self, first: _Pending) -> tuple[list[_Pending], bool]:
+        """Gather up to max_batch_size items, waiting at most max_wait."""
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                nxt = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if nxt is None:  # close() requested, flush what we have
+                return batch, True
+            batch.append(nxt)
+        return batch, False
+
+    def _loop(self) -> None:
+        while True:
+            self._slots.acquire()  # form the next batch only when it can run
+            first = self._queue.get()
+            if first is None:
+                self._slots.release()
+                return
+
+            batch, stop = self._collect(first)
+            if self._runner is None:
+                self._run(batch)
+            else:
+                self._runner.submit(self._run, batch)
+            if stop:
+                return
+
+    def _run(self, batch: list[_Pending]) -> None:
+        try:
+            self._process(batch)
+        finally:
+            self._slots.release()
+
+    def _process(self, batch: list[_Pending]) -> None:
+        started = time.perf_counter()
+        waits_ms = [(started - p.enqueued_at) * 1000.0 for p in batch]
+
+        with self._stats_lock:
+            self._batch_sizes[len(batch)] += 1
+            self._items += len(batch)
+            self._wait_total_ms += sum(waits_ms)
+            self._wait_max_ms = max(self._wait_max_ms, *waits_ms)
+
+        try:
+            results = list(self._run_batch([p.item for p in batch]))
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"run_batch returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as exc:  # propagate to every waiting caller
+            log.exception("Batched call failed for %d item(s)", len(batch))
+            for p in batch:
+                p.future.set_exception(exc)
+            return
+
+        for p, res in zip(batch, results):
+            if isinstance(res, Exception):
+                p.future.set_exception(res)
+            else:
+                p.future.set_result(res)
+
+        log.debug(
+            "batch size=%d max_wait_ms=%.1f run_ms=%.1f",
+            len(batch),
+            max(waits_ms),
+            (time.perf_counter() - started) * 1000.0,
+        )
@@ -0,0 +1,220 @@
+"""
+ml_object_detector.models.cache
+-------------------------------
+
+Persistent, size-bounded cache of raw YOLO detections.
+
+Entries are keyed on ``(image bytes hash, model id, inference params)``
+and store *every* box the model produced at a low threshold
+(``min_conf``), so a later request with any ``conf >= min_conf`` is
+served by filtering instead of re-running the model. Requests below
+``min_conf`` bypass the cache (see :meth:`DetectionCache.covers`): a low
+floor serves every threshold but stores many near-zero boxes per image, a
+higher one keeps entries small at the cost of those rare requests.
+
+Backed by SQLite (stdlib) so it survives restarts and can be shared by
+several processes. Once ``max_entries`` is exceeded, least-recently-used
+entries are evicted down to ``max_entries - max_entries // 10``; the table
+is only counted then, not on every put. With several processes writing to
+one file, the bound may be overshot by what the others stored since this
+one last counted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Mapping
+
+import numpy as np
+
+from ml_object_detector.domain.detections import ImageDetections
+
+log = logging.getLogger(__name__)
+
+CHUNK = 1 << 20  # 1 MB reads while hashing
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    key          TEXT PRIMARY KEY,
+    names        TEXT NOT NULL,
+    cls          BLOB NOT NULL,
+    conf         BLOB NOT NULL,
+    xyxy         BLOB NOT NULL,
+    orig_h       INTEGER,
+    orig_w       INTEGER,
+    last_access  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_detections_last_access ON detections(last_access);
+"""
+
+
+def hash_file(path: str | Path) -> str:
+    """Full SHA-1 hex digest of a file, read in chunks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DetectionCache:
+    """
+    Parameters
+    ----------
+    db_path     : SQLite file (created on first use)
+    model_id    : identifies the weights, e.g. ``"yolov8n.pt:3f1c0a9b2e4d"``
+    params      : inference parameters that change the raw output (imgsz …)
+    max_entries : LRU bound on the number of cached images
+    min_conf    : threshold the model is run at before storing results
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        model_id: str,
+        params: Mapping[str, Any] | None = None,
+        max_entries: int = 50_000,
+        min_conf: float = 0.0,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.model_id = model_id
+        self.params = dict(params or {})
+        self.max_entries = int(max_entries)
+        self.min_conf = float(min_conf)
+        self._fingerprint = json.dumps(
+            {"model": model_id, "min_conf": self.min_conf, **self.params},
+            sort_keys=True,
+        )
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        # entries as of the last count plus puts since (replacements included)
+        (self._entries,) = self._conn.execute("SELECT COUNT(*) FROM detections").fetchone()
+
+        self.hits = 0
+        self.misses = 0
+
+    # Keys ---------------------------------------------------------
+
+    def key_for_digest(self, image_sha1: str) -> str:
+        """Cache key from an already computed SHA-1 of the image bytes."""
+        raw = f"{image_sha1}|{self._fingerprint}".encode()
+        return hashlib.sha1(raw).hexdigest()
+
+    def key_for(self, img_path: str | Path) -> str:
+        return self.key_for_digest(hash_file(img_path))
+
+    # Lookups ------------------------------------------------------
+
+    def covers(self, conf: float) -> bool:
+        """True if entries hold every box a request at *conf* asks for."""
+        return conf >= self.min_conf
+
+    def get(
+        self, key: str, conf: float = 0.0, path: str | Path = ""
+    ) -> ImageDetections | None:
+        """
+        Return the cached detections with ``score >= conf`` or None.
+
+        *path* is only used to fill ``ImageDetections.path`` (the same bytes
+        may live under many filenames).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT names, cls, conf, xyxy, orig_h, orig_w "
+                "FROM detections WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE detections SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+
+        names, cls_b, conf_b, xyxy_b, orig_h, orig_w = row
+        det = ImageDetections(
+            path=str(path),
+            names={int(k): v for k, v in json.loads(names).items()},
+            cls=np.frombuffer(cls_b, dtype=np.int64),
+            conf=np.frombuffer(conf_b, dtype=np.float32),
+            xyxy=np.frombuffer(xyxy_b, dtype=np.float32).reshape(-1, 4),
+            speed={"preprocess": 0.0, "inference": 0.0, "postprocess": 0.0},
+            orig_shape=(orig_h, orig_w) if orig_h is not None else None,
+        )
+        return det.above(conf)
+
+    def put(self, key: str, det: ImageDetections) -> None:
+        """Store raw detections (run at ``min_conf``) and evict LRU overflow."""
+        orig_h, orig_w = det.orig_shape or (None, None)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO detections "
+                "(key, names, cls, conf, xyxy, orig_h, orig_w, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    json.dumps({str(k): v for k, v in det.names.items()}),
+                    np.ascontiguousarray(det.cls, dtype=np.int64).tobytes(),
+                    np.ascontiguousarray(det.conf, dtype=np.float32).tobytes(),
+                    np.ascontiguousarray(det.xyxy, dtype=np.float32).tobytes(),
+                    orig_h,
+                    orig_w,
+                    time.time(),
+                ),
+            )
+            self._entries += 1
+            if self._entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM detections").fetchone()
+        overflow = 0
+        if count > self.max_entries:
+            overflow = count - (self.max_entries - self.max_entries // 10)
+        self._entries = count - overflow
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM detections WHERE key IN ("
+                "SELECT key FROM detections ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            log.debug("Detection cache evicted %d entries", overflow)
+
+    # Observability ------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute(
+                "SELECT COUNT(*) FROM detections"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
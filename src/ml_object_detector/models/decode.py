@@ -0,0 +1,138 @@
+"""
+ml_object_detector.models.decode
+--------------------------------
+
+Decode an image once, already close to the model input size, and hand the
+pixels to the inference workers without a second decode.
+
+* JPEGs are decoded in Pillow's *draft* mode, i.e. the DCT is scaled by
+  1/2, 1/4 or 1/8 so a 4000 px photo never exists at full resolution in
+  memory; other formats are reduced by an integer factor after decoding.
+  The longest side always stays >= ``imgsz`` so YOLO's letterbox sees the
+  same amount of detail.
+* The BGR array travels to the worker process through
+  ``multiprocessing.shared_memory`` instead of being pickled through the
+  pool's pipe.
+
+Boxes predicted on the reduced image are mapped back to original pixel
+coordinates with :meth:`DecodedImage.to_original`.
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from ml_object_detector.domain.detections import ImageDetections
+
+# EXIF orientations that swap width and height
+_TRANSPOSED = {5, 6, 7, 8}
+
+
+@dataclass
+class DecodedImage:
+    array: np.ndarray  # (H, W, 3) uint8 BGR, as cv2.imread would return
+    orig_shape: tuple[int, int]  # (H, W) of the full-resolution image
+
+    @property
+    def scale(self) -> tuple[float, float]:
+        """(sy, sx) factors from decoded to original pixel coordinates."""
+        h, w = self.array.shape[:2]
+        return self.orig_shape[0] / h, self.orig_shape[1] / w
+
+    def to_original(self, det: ImageDetections) -> ImageDetections:
+        sy, sx = self.scale
+        return det.rescaled(sx, sy, self.orig_shape)
+
+    def to_decoded(self, det: ImageDetections) -> ImageDetections:
+        sy, sx = self.scale
+        return det.rescaled(1 / sx, 1 / sy, tuple(self.array.shape[:2]))
+
+
+def decode_for_model(path: str | Path, imgsz: int) -> DecodedImage:
+    """
+    Fully decode *path* at the smallest size whose longest side is still
+    >= *imgsz*. Decoding everything doubles as the integrity check, so it
+    replaces ``Image.verify()`` on this path.
+
+    Raises
+    ------
+    OSError / PIL.UnidentifiedImageError
+        If the file is truncated or not an image.
+    """
+    with Image.open(path) as img:
+        full_w, full_h = img.size
+        orientation = img.getexif().get(0x0112, 1)
+
+        long_side = max(full_w, full_h)
+        if long_side > imgsz:
+            ratio = imgsz / long_side
+            img.draft("RGB", (max(1, round(full_w * ratio)), max(1, round(full_h * ratio))))
+        img.load()
+
+        factor = max(img.size) // imgsz
+        if factor >= 2:  # not JPEG, or draft could not shrink enough
+            img = img.reduce(factor)
+        img = ImageOps.exif_transpose(img.convert("RGB"))
+
+        if orientation in _TRANSPOSED:
+            full_w, full_h = full_h, full_w
+        bgr = np.ascontiguousarray(np.asarray(img)[:, :, ::-1])
+    return DecodedImage(bgr, (full_h, full_w))
+
+
+@dataclass(frozen=True)
+class SharedImage:
+    """Picklable handle of a :class:`DecodedImage` held in shared memory."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+    orig_shape: tuple[int, int]
+
+    @classmethod
+    def from_decoded(cls, image: DecodedImage) -> "SharedImage":
+        shm = shared_memory.SharedMemory(create=True, size=image.array.nbytes)
+        try:
+            np.ndarray(image.array.shape, image.array.dtype, buffer=shm.buf)[:] = image.array
+            return cls(shm.name, image.array.shape, str(image.array.dtype), image.orig_shape)
+        finally:
+            shm.close()
+
+    def load(self) -> DecodedImage:
+        """Copy the pixels out (consumer side); the segment can go right after."""
+        shm = _attach(self.name)
+        try:
+            view = np.ndarray(self.shape, np.dtype(self.dtype), buffer=shm.buf)
+            array = view.copy()  # YOLO results keep a reference to the array
+            del view
+        finally:
+            shm.close()
+        return DecodedImage(array, self.orig_shape)
+
+    def unlink(self) -> None:
+        """Free the segment (producer side, once the consumer is done)."""
+        try:
+            shm = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return
+        shm.close()
+        shm.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Open an existing segment without handing it to this process's resource
+    tracker: the producer owns and unlinks it, and a consumer that tracked
+    it too would unlink it (with a leak warning) when it exits.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")  # registered on attach
+    return shm
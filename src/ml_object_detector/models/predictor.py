@@ -1,9 +1,33 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from concurrent.futures import Future, wait
+from typing import Iterable, Iterator, List
+import cv2
+import numpy as np
+import torch
+from PIL import Image
 from ultralytics import YOLO
+from ultralytics.data.utils import IMG_FORMATS
 from ultralytics.engine.results import Results
 from ml_object_detector.config.load_config import load_config
+from ml_object_detector.domain.detections import ImageDetections
+from ml_object_detector.domain.errors import InvalidImageError
+from ml_object_detector.models.artifacts import (
+    ANNOTATED,
+    ARTIFACTS,
+    LABELS,
+    ArtifactWriter,
+    artifact_path,
+    parse_artifacts,
+)
+from ml_object_detector.models.backends import (
+    apply_thread_settings,
+    configure_session,
+    resolve_weights,
+)
+from ml_object_detector.models.batching import MicroBatcher
+from ml_object_detector.models.cache import DetectionCache, hash_file
+from ml_object_detector.models.decode import DecodedImage
 from ml_object_detector.utils.logging import setup_logs
 
 cfg = load_config()
@@ -22,91 +46,431 @@ OUTPUT_DIR = ROOT / cfg["output_dir"]  # data/processed
 MODEL_DIR = ROOT / cfg["model_dir"]  # ml_object_detector/models/weights
 MODEL_NAME = cfg["model_name"]  # yolov8n.pt
 LOGS_DIR = ROOT / cfg["logs_dir"]  # logs
-CONF_THRESH = float(cfg["confidence_threshold"])  # 0.8
+IMGSZ = int(cfg.get("imgsz", 640))  # model input size (longest side)
 MODEL_PATH = MODEL_DIR / MODEL_NAME  # ml_object_detector/models/weights/yolov8n.pt
+BATCHING = cfg.get("batching") or {}  # micro-batching of concurrent predict_one calls
+CACHE = cfg.get("cache") or {}  # persistent detection cache
+INFERENCE = cfg.get("inference") or {}  # backend: torch | onnx | openvino
 
 log.info("Loading YOLO weights from %s", MODEL_NAME)
 
 
 @dataclass
 class OneResult:
-    boxed_path: Path
+    boxed_path: Path | None  # annotated copy, None when not requested
     labels: int
     speed_ms: float
+    result: Results | None = None  # raw YOLO output, reusable for reports
+    detections: ImageDetections | None = None  # picklable stand-in for `result`
+
+    def detached(self) -> "OneResult":
+        """Copy safe to send between processes (drops the decoded image)."""
+        detections = self.detections
+        if detections is None and self.result is not None:
+            detections = ImageDetections.from_result(self.result)
+        return OneResult(self.boxed_path, self.labels, self.speed_ms, None, detections)
+
+
+@dataclass
+class _Request:
+    """Arguments of one `predict_one` call, with the defaults applied."""
+
+    img_path: Path
+    out_dir: Path
+    conf: float
+    kinds: frozenset[str]
+    image: DecodedImage | None = None
+    digest: str | None = None
+    wait_artifacts: bool = False
+
+    @classmethod
+    def of(
+        cls,
+        img_path: str | Path,
+        out_dir: str | Path | None = None,
+        conf: float | None = None,
+        image: DecodedImage | None = None,
+        digest: str | None = None,
+        artifacts: str | Iterable[str] | None = None,
+        wait_artifacts: bool = False,
+    ) -> "_Request":
+        return cls(
+            img_path=Path(img_path),
+            out_dir=Path(out_dir or OUTPUT_DIR),
+            conf=float(conf if conf is not None else cfg["confidence_threshold"]),
+            kinds=parse_artifacts(artifacts),
+            image=image,
+            digest=digest,
+            wait_artifacts=wait_artifacts,
+        )
+
+    @property
+    def stem(self) -> str:
+        return self.img_path.stem
+
+    @property
+    def source(self) -> str | np.ndarray:
+        """What the model runs on: decoded pixels, else the file."""
+        return self.image.array if self.image is not None else str(self.img_path)
+
+
+def _above(res: Results, conf: float) -> Results:
+    """Keep only the boxes of *res* with ``score >= conf``."""
+    return res[res.boxes.conf >= conf]
+
+
+def _image_shape(img_path: Path) -> tuple[int, int]:
+    """``(height, width)`` from the file header, without decoding pixels."""
+    with Image.open(img_path) as img:
+        return img.height, img.width
+
+
+def _to_results(
+    det: ImageDetections,
+    img_path: Path,
+    image: DecodedImage | None = None,
+    pixels: bool = True,
+) -> Results:
+    """
+    Rebuild a plottable `Results` from cached detections (no inference),
+    drawn on the already decoded *image* when given.
+
+    With ``pixels=False`` the original is not decoded: the boxes sit on a
+    zero-stride placeholder of the right shape, which is enough for label
+    files and JSON but not for drawing.
+    """
+    if image is not None:
+        det = image.to_decoded(det)
+        orig_img = image.array
+    elif pixels:
+        orig_img = cv2.imread(str(img_path))
+    else:
+        h, w = det.orig_shape or _image_shape(img_path)
+        orig_img = np.broadcast_to(np.zeros((1, 1, 3), dtype=np.uint8), (h, w, 3))
+    data = np.column_stack([det.xyxy, det.conf, det.cls]).astype(np.float32)
+    return Results(
+        orig_img=orig_img,
+        path=str(img_path),
+        names=dict(det.names),
+        boxes=torch.from_numpy(data.reshape(-1, 6)),
+        speed=dict(det.speed),
+    )
+
+
+def _model_id(model: YOLO, model_path: str | Path) -> str:
+    """Weights name plus content hash, so retrained weights never hit stale entries."""
+    ckpt = Path(getattr(model, "ckpt_path", None) or model_path)
+    digest = hash_file(ckpt)[:12] if ckpt.is_file() else "unhashed"
+    return f"{Path(model_path).name}:{digest}"
 
 
 class YoloPredictor:
     """
     Convenience wrapper around `ultralytics.YOLO` that
     1) loads the model once and
-    2) offers a single `predict_images_in_folder` method.
+    2) offers `predict_images_in_folder` (list) and
+       `stream_images_in_folder` (generator, bounded memory) methods.
+
+    *batching* (default ``batching.enabled``) groups concurrent
+    `predict_one` calls in this process; pass False when the batches are
+    formed upstream and handed to `predict_many`.
     """
 
-    def __init__(self, model_path: str | Path = MODEL_PATH) -> None:
-        self.model = YOLO(model_path)
-        self.model.info()
+    def __init__(
+        self,
+        model_path: str | Path = MODEL_PATH,
+        backend: str | None = None,
+        batching: bool | None = None,
+    ) -> None:
+        self.backend = backend or INFERENCE.get("backend", "torch")
+        threads = int(INFERENCE.get("threads") or 0)
+        apply_thread_settings(self.backend, threads)
+
+        weights = resolve_weights(model_path, self.backend, IMGSZ)
+        self.model = YOLO(weights, task="detect")
+        if self.backend == "torch":
+            self.model.info()  # only PyTorch models can summarise themselves
+        elif threads > 0:
+            # the runtime session only exists once something was predicted
+            self.model.predict(np.zeros((IMGSZ, IMGSZ, 3), np.uint8), imgsz=IMGSZ, verbose=False)
+            configure_session(self.model, self.backend, weights, threads)
+        log.info("Inference backend: %s (%s)", self.backend, Path(weights).name)
+
+        # Concurrent predict_one() callers share batched forward passes
+        self.batcher: MicroBatcher | None = None
+        self.batch_size = int(BATCHING.get("max_batch_size", 1))
+        if BATCHING.get("enabled", False) if batching is None else batching:
+            self.batcher = MicroBatcher(
+                self._predict_batch,
+                max_batch_size=self.batch_size,
+                max_wait_ms=float(BATCHING.get("max_wait_ms", 10)),
+            )
+            log.info(
+                "Micro-batching enabled: max_batch_size=%d max_wait_ms=%s",
+                self.batch_size,
+                BATCHING.get("max_wait_ms", 10),
+            )
+
+        # Raw detections keyed by image bytes; hits skip inference entirely
+        self.cache: DetectionCache | None = None
+        if CACHE.get("enabled", False):
+            self.cache = DetectionCache(
+                ROOT / CACHE.get("path", "data/cache/detections.sqlite3"),
+                model_id=_model_id(self.model, model_path),
+                params={"imgsz": IMGSZ, "backend": self.backend},
+                max_entries=int(CACHE.get("max_entries", 50_000)),
+                min_conf=float(CACHE.get("min_conf", 0.25)),
+            )
+            log.info("Detection cache enabled at %s", self.cache.db_path)
+
+        # Annotated images / label files are rendered off the inference path
+        self.writer = ArtifactWriter(
+            threads=int(ARTIFACTS.get("writer_threads", 2)),
+            max_pending=int(ARTIFACTS.get("max_pending", 32)),
+        )
         log.info("YOLO model loaded and ready.")
 
+    def warmup(self) -> None:
+        """One forward pass on a blank image (lazy kernel/graph setup)."""
+        blank = np.zeros((IMGSZ, IMGSZ, 3), dtype=np.uint8)
+        self.model.predict(source=blank, imgsz=IMGSZ, verbose=False)
+
+    def batch_stats(self) -> dict:
+        """Batch size histogram and queue wait times (empty if batching is off)."""
+        return self.batcher.stats() if self.batcher else {}
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the detection cache (empty if caching is off)."""
+        return self.cache.stats() if self.cache else {}
+
+    def artifact_stats(self) -> dict:
+        """Pending/written/failed counters of the background artifact writer."""
+        return self.writer.stats()
+
+    def _predict_batch(
+        self, items: list[tuple[str | np.ndarray, float]]
+    ) -> List[Results | Exception]:
+        """
+        One forward pass for a batch of ``(image_path or BGR array, conf)``
+        items.
+
+        The batch runs at the lowest requested threshold; stricter callers
+        get their own detections filtered afterwards. An image that cannot
+        be read gets an `InvalidImageError` in its slot and the others
+        still run.
+        """
+        out: List[Results | Exception | None] = [None] * len(items)
+        # ultralytics takes a list of paths or a list of arrays, not both
+        mixed = any(isinstance(src, np.ndarray) for src, _ in items)
+        batch: list[tuple[int, str | np.ndarray, float]] = []
+        for i, (src, conf) in enumerate(items):
+            if isinstance(src, np.ndarray):
+                pass
+            elif not Path(src).is_file():
+                out[i] = InvalidImageError(f"No such image: {src}")
+                continue
+            elif mixed:
+                src = cv2.imread(str(src))
+                if src is None:
+                    out[i] = InvalidImageError(f"Cannot decode image: {items[i][0]}")
+                    continue
+            batch.append((i, src, conf))
+        if not batch:
+            return out
+
+        batch_conf = min(conf for _, _, conf in batch)
+        results = self.model.predict(
+            source=[src for _, src, _ in batch],
+            batch=len(batch),
+            conf=batch_conf,
+            imgsz=IMGSZ,
+            verbose=False,
+        )
+        for (i, _, conf), res in zip(batch, results):
+            out[i] = _above(res, conf) if conf > batch_conf else res
+        return out
+
+    def _lookup(self, req: _Request) -> tuple[str | None, Results | None]:
+        """Cache key of the image and, on a hit, its rebuilt `Results`."""
+        if self.cache is None or not self.cache.covers(req.conf):
+            return None, None
+        cache = self.cache
+        key = cache.key_for_digest(req.digest) if req.digest else cache.key_for(req.img_path)
+        det = cache.get(key, req.conf, path=req.img_path)
+        if det is None:
+            return key, None
+        # a hit only decodes the file when an annotated copy is drawn
+        return key, _to_results(det, req.img_path, req.image, ANNOTATED in req.kinds)
+
+    def _run_conf(self, conf: float) -> float:
+        # Cache entries hold every box down to min_conf
+        if self.cache is not None and self.cache.covers(conf):
+            return self.cache.min_conf
+        return conf
+
+    def _finish(self, res: Results, key: str | None, req: _Request) -> Results:
+        """Store a fresh inference result in the cache and apply the threshold."""
+        res.path = str(req.img_path)  # arrays come back as "image0.jpg"
+        if key is not None:
+            det = ImageDetections.from_result(res)
+            # cached boxes are always in full-size pixel coordinates
+            self.cache.put(key, req.image.to_original(det) if req.image is not None else det)
+            res = _above(res, req.conf)
+        return res
+
+    def _infer_one(self, req: _Request) -> Results:
+        """
+        Cache lookup, then (batched) inference for a single image.
+
+        With ``req.image`` (pixels decoded at ingest) the file is not read
+        again and the returned boxes are in the image's coordinates;
+        ``req.digest`` is the SHA-1 of the file, when already known.
+        """
+        key, hit = self._lookup(req)
+        if hit is not None:
+            return hit
+
+        run_conf = self._run_conf(req.conf)
+        if self.batcher is not None:
+            res = self.batcher.submit((req.source, run_conf)).result()
+        else:
+            res = self.model.predict(
+                source=req.source, conf=run_conf, imgsz=IMGSZ, verbose=False
+            )[0]
+        return self._finish(res, key, req)
+
+    def _save_artifacts(
+        self, res: Results, out_dir: Path, stem: str, kinds: Iterable[str]
+    ) -> dict[str, Future]:
+        """Queue what YOLO's save=True / save_txt=True would have produced."""
+        return self.writer.submit(res, out_dir, stem, kinds)
+
+    def _one_result(self, res: Results, req: _Request) -> OneResult:
+        """Queue the requested artifacts of *res* and summarise it."""
+        pending = self._save_artifacts(res, req.out_dir, req.stem, req.kinds)
+        if req.wait_artifacts and ANNOTATED in pending:
+            pending[ANNOTATED].result()
+
+        boxed = None
+        if ANNOTATED in req.kinds:
+            boxed = artifact_path(req.out_dir, req.stem, ANNOTATED)
+        det = None
+        if req.image is not None:
+            det = req.image.to_original(ImageDetections.from_result(res))
+        return OneResult(boxed, len(res.boxes), sum(res.speed.values()), res, det)
+
     def predict_one(
-        self, img_path: Path, out_dir: Path | None = None, conf: float | None = None
+        self,
+        img_path: Path,
+        out_dir: Path | None = None,
+        conf: float | None = None,
+        image: DecodedImage | None = None,
+        digest: str | None = None,
+        artifacts: str | Iterable[str] | None = None,
+        wait_artifacts: bool = False,
     ) -> OneResult:
-        out_dir = Path(out_dir or OUTPUT_DIR)
-        conf = float(conf if conf is not None else CONF_THRESH)
-        out_dir.mkdir(parents=True, exist_ok=True)
+        """
+        Detect objects in one image and queue the requested *artifacts*
+        (see :func:`~ml_object_detector.models.artifacts.parse_artifacts`;
+        default ``artifacts.default`` of ``config.yaml``).
 
-        # Run YOLO ------------------------------
-        res = self.model.predict(
-            source=str(img_path),
-            save=True,
-            save_txt=True,
-            save_conf=True,
-            project=str(out_dir.parent),
-            name=out_dir.name,
-            conf=conf,
-            verbose=False,
-            exist_ok=True,
-        )[0]
-        boxed = Path(res.save_dir) / f"{img_path.stem}.jpg"
-        return OneResult(boxed, len(res.boxes), sum(res.speed.values()))
+        The files are written in the background; with *wait_artifacts* the
+        call returns only once the annotated copy is on disk (e.g. when it
+        is the response itself).
+
+        Pass *image* (see :mod:`ml_object_detector.models.decode`) when the
+        pixels were already decoded at ingest: the model runs on them
+        directly and *img_path* is only used for naming, the cache and the
+        report. The annotated copy is then drawn at the decoded size, while
+        ``OneResult.detections`` stays in full-size pixel coordinates.
+        """
+        req = _Request.of(img_path, out_dir, conf, image, digest, artifacts, wait_artifacts)
+        # Cache hit, or a forward pass (shared with other in-flight
+        # requests when batching is on)
+        return self._one_result(self._infer_one(req), req)
+
+    def predict_many(self, requests: list[dict]) -> list[OneResult | Exception]:
+        """
+        `predict_one` for several requests at once (each a dict of its
+        keyword arguments): cache hits are answered directly and the misses
+        share forward passes of up to ``batching.max_batch_size`` images.
+
+        A request that fails on its own (unreadable file, unknown artifact)
+        gets its exception in its slot instead of failing the others; a
+        failing forward pass raises for the whole call.
+        """
+        out: list[OneResult | Exception | None] = [None] * len(requests)
+        misses: list[tuple[int, _Request, str | None]] = []
+        for i, kwargs in enumerate(requests):
+            try:
+                req = _Request.of(**kwargs)
+                key, hit = self._lookup(req)
+                if hit is None:
+                    misses.append((i, req, key))
+                else:
+                    out[i] = self._one_result(hit, req)
+            except Exception as e:
+                out[i] = e
+
+        size = max(1, self.batch_size)
+        for start in range(0, len(misses), size):
+            chunk = misses[start : start + size]
+            results = self._predict_batch(
+                [(req.source, self._run_conf(req.conf)) for _, req, _ in chunk]
+            )
+            for (i, req, key), res in zip(chunk, results):
+                if isinstance(res, Exception):
+                    out[i] = res
+                    continue
+                try:
+                    out[i] = self._one_result(self._finish(res, key, req), req)
+                except Exception as e:
+                    out[i] = e
+        return out
 
     def predict_images_in_folder(
         self,
         folder: str | Path | None = None,
         out_dir: str | Path | None = None,
         conf: float | None = None,
+        artifacts: str | Iterable[str] | None = None,
     ) -> List[Results]:
         """
         Run inference on **all** images in `folder` and
-        save annotated copies plus labels to `out_dir`.
+        save annotated copies and/or labels to `out_dir`.
 
         Parameters
         ----------
-        folder   : source directory with .jpg/.png files
-        out_dir  : where the annotated images should go
-        conf     : confidence threshold (0–1)
+        folder    : source directory with .jpg/.png files
+        out_dir   : where the annotated images should go
+        conf      : confidence threshold (0–1)
+        artifacts : files to write, see `parse_artifacts` (default from config)
 
         Returns
         -------
         list[ultralytics.engine.results.Results]
             One `Results` object per image.
 
+        With the detection cache on, hits are served from it (their pixels
+        are only decoded when annotated copies are written) and only the
+        misses run through the model.
         """
         # fall back to YAML defaults only when arguments aren’t provided
         folder = Path(folder or SOURCE_DIR)
         out_dir = Path(out_dir or OUTPUT_DIR)
-        conf = float(conf if conf is not None else CONF_THRESH)
+        conf = float(conf if conf is not None else cfg["confidence_threshold"])
         out_dir.mkdir(parents=True, exist_ok=True)
-        results: List[Results] = self.model.predict(
-            source=folder,
-            save=True,
-            save_txt=True,
-            save_conf=True,
-            project=out_dir.parent,
-            name=out_dir.name,
-            exist_ok=True,
-            conf=conf,
-            verbose=False,  # silence internal prints, avoid log line duplications
-        )
+        kinds = parse_artifacts(artifacts)
+        if self.cache is not None:
+            # hits are served from the cache, only misses run the model
+            results = list(self._predict_cached(folder, conf, ANNOTATED in kinds))
+            wait(
+                f
+                for res in results
+                for f in self._save_artifacts(res, out_dir, Path(res.path).stem, kinds).values()
+            )
+        else:
+            results = self._predict_folder(folder, out_dir, conf, kinds)
         if results:
             sp = results[0].speed
             shape = getattr(results[0], "orig_shape", "unknown")
@@ -129,3 +493,135 @@ class YoloPredictor:
             out_dir,
         )
         return results
+
+    def _predict_folder(
+        self, folder: Path, out_dir: Path, conf: float, kinds: frozenset[str]
+    ) -> List[Results]:
+        """Uncached: one YOLO call over *folder*, files saved by YOLO itself."""
+        return self.model.predict(
+            source=folder,
+            save=ANNOTATED in kinds,
+            save_txt=LABELS in kinds,
+            save_conf=True,
+            project=out_dir.parent,
+            name=out_dir.name,
+            exist_ok=True,
+            conf=conf,
+            imgsz=IMGSZ,
+            batch=self.batch_size,
+            verbose=False,  # silence internal prints, avoid log line duplications
+        )
+
+    def stream_images_in_folder(
+        self,
+        folder: str | Path | None = None,
+        out_dir: str | Path | None = None,
+        conf: float | None = None,
+        artifacts: str | Iterable[str] | None = None,
+    ) -> Iterator[ImageDetections]:
+        """
+        Generator twin of `predict_images_in_folder`.
+
+        Uses YOLO's ``stream=True`` so only one batch of decoded images is
+        alive at a time, and yields an `ImageDetections` per image instead
+        of the heavy `Results`. The requested *artifacts* are written to
+        `out_dir` by the background writer while the next images run
+        through the model; the generator finishes once they are all on
+        disk, so a report built from it never links a missing image.
+
+        With the detection cache on, images already seen (same bytes) are
+        served from it and only the misses go through the model.
+        """
+        folder = Path(folder or SOURCE_DIR)
+        out_dir = Path(out_dir or OUTPUT_DIR)
+        conf = float(conf if conf is not None else cfg["confidence_threshold"])
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        kinds = parse_artifacts(artifacts)
+        pending: list[Future] = []
+
+        n_images = n_labels = 0
+        for det in self._stream(folder, out_dir, conf, kinds, pending):
+            n_images += 1
+            n_labels += len(det)
+            yield det
+        wait(pending)
+
+        if not n_images:
+            log.warning("YOLO.predict() returned no results - folder may be empty")
+        log.info(
+            "Streamed %d image%s, %d label%s saved to %s/labels",
+            n_images,
+            "" if n_images == 1 else "s",
+            n_labels,
+            "" if n_labels == 1 else "s",
+            out_dir,
+        )
+
+    def _stream(
+        self,
+        folder: Path,
+        out_dir: Path,
+        conf: float,
+        kinds: frozenset[str],
+        pending: list[Future],
+    ) -> Iterator[ImageDetections]:
+        def save(res: Results, stem: str) -> None:
+            pending.extend(self._save_artifacts(res, out_dir, stem, kinds).values())
+
+        if self.cache is None or not self.cache.covers(conf):
+            for res in self.model.predict(
+                source=folder,
+                stream=True,
+                conf=conf,
+                imgsz=IMGSZ,
+                batch=self.batch_size,
+                verbose=False,
+            ):
+                det = ImageDetections.from_result(res)
+                save(res, Path(res.path).stem)
+                del res  # the writer drops the decoded image once done
+                yield det
+            return
+
+        for res in self._predict_cached(folder, conf, ANNOTATED in kinds):
+            det = ImageDetections.from_result(res)
+            if kinds:  # json-only: nothing to write
+                save(res, Path(res.path).stem)
+            del res
+            yield det
+
+    def _predict_cached(self, folder: Path, conf: float, pixels: bool) -> Iterator[Results]:
+        """
+        Results of every image in *folder*: cache hits first (decoded only
+        when *pixels* are needed), then one streamed model pass over the
+        misses, whose raw boxes are stored for next time.
+        """
+        # 1) Serve hits straight from the cache ---------------------
+        misses: dict[str, str] = {}  # resolved image path -> cache key
+        images = sorted(
+            p for p in folder.iterdir() if p.suffix.lower().lstrip(".") in IMG_FORMATS
+        )
+        for img_path in images:
+            key = self.cache.key_for(img_path)
+            det = self.cache.get(key, conf, path=img_path)
+            if det is None:
+                misses[str(img_path.resolve())] = key
+                continue
+            yield _to_results(det, img_path, pixels=pixels)
+
+        if not misses:
+            return
+
+        # 2) Run the model once over all misses ---------------------
+        for res in self.model.predict(
+            source=list(misses),
+            stream=True,
+            conf=self.cache.min_conf,
+            imgsz=IMGSZ,
+            batch=self.batch_size,
+            verbose=False,
+        ):
+            key = misses[str(Path(res.path).resolve())]
+            self.cache.put(key, ImageDetections.from_result(res))
+            yield _above(res, conf)
@@ -1,10 +1,15 @@
-from pathlib import Path
-from typing import List, Dict
-from ultralytics.engine.results import Results
+from __future__ import annotations
+from typing import TYPE_CHECKING, Iterable, List, Dict, Sequence
+import numpy as np
+from ml_object_detector.domain.detections import ImageDetections
+from ml_object_detector.domain.table import DetectionTable, SummaryRows
+
+if TYPE_CHECKING:  # ultralytics pulls in torch
+    from ultralytics.engine.results import Results
 
 
 def build_summaries(
-    results: List[Results],
+    results: Iterable[Results | ImageDetections],
     conf_threshold: float,
     run_id: str = "",
 ) -> List[Dict[str, str | float]]:
@@ -24,7 +29,9 @@ def build_summaries(
 
     Parameters
     ----------
-    results        : list[ultralytics.engine.results.Results]
+    results        : iterable of ultralytics Results or ImageDetections
+        Consumed once, so a generator (e.g. ``stream_images_in_folder``)
+        is fine.
     conf_threshold : float
         Minimum confidence required to keep a detection.
     run_id         : str, optional
@@ -36,37 +43,95 @@ def build_summaries(
         "with the 92.4% level of confidence."
     """
 
-    rows: list[Dict[str, str | float]] = []
-    prefix = f"{run_id}/" if run_id else ""      # e.g. "20250630T190215/"
-
-    for result in results:
-        image_name = f"{Path(result.path).stem}.jpg"
-        for cls_id, score in zip(result.boxes.cls, result.boxes.conf):
-            if score < conf_threshold:
-                continue
-            object_name = result.names[int(cls_id)]
-            rows.append(
-                {
-                    "image": prefix + image_name,
-                    "object": object_name,
-                    "conf": float(score),
-                }
-            )
-    return rows
+    return list(build_table(results, conf_threshold).rows(run_id))
+
+
+def build_table(
+    results: Iterable[Results | ImageDetections],
+    conf_threshold: float,
+) -> DetectionTable:
+    """
+    Columnar twin of ``build_summaries``: one threshold mask per image
+    and NumPy columns (image index, class id, score, box) for the whole
+    run. ``table.rows(run_id)`` gives the same rows as ``build_summaries``,
+    built lazily while the template iterates.
+    """
+    return DetectionTable.from_detections(results, conf_threshold)
+
+
+def aggregate(
+    rows: Sequence[Dict[str, str | float]],
+    n_images: int | None = None,
+    bins: int = 10,
+    top: int = 20,
+) -> Dict[str, object]:
+    """
+    Run-level overview of the detection rows, computed on arrays.
+
+    Parameters
+    ----------
+    rows     : ``build_summaries`` rows or a lazy ``DetectionTable.rows()``
+               view (its columns are used directly, no dicts are built).
+    n_images : images in the run, including those without detections
+               (taken from the table when *rows* is a view).
+    bins     : score histogram bins over [0, 1].
+    top      : how many of the most crowded images to list.
+
+    Returns
+    -------
+    dict with ``total``, ``images``, ``empty_images``, ``classes``
+    (``[(label, count)]`` most frequent first), ``top_images``
+    (``[(image, count)]``) and ``histogram`` (``[(low, high, count)]``).
+    """
+    if isinstance(rows, SummaryRows):
+        images, labels, conf = rows.columns()
+        n_images = rows.table.n_images if n_images is None else n_images
+    else:
+        images = np.array([r["image"] for r in rows], dtype=object)
+        labels = np.array([r["object"] for r in rows], dtype=object)
+        conf = np.array([r["conf"] for r in rows], dtype=np.float32)
+
+    def ranked(values: np.ndarray, limit: int | None = None) -> list:
+        if not len(values):
+            return []
+        keys, counts = np.unique(values, return_counts=True)
+        order = np.argsort(-counts, kind="stable")[:limit]
+        return list(zip(keys[order].tolist(), counts[order].tolist()))
+
+    hist, edges = np.histogram(conf, bins=bins, range=(0.0, 1.0))
+    n_with_boxes = len(np.unique(images)) if len(images) else 0
+    n_images = n_with_boxes if n_images is None else n_images
+    return {
+        "total": int(len(conf)),
+        "images": int(n_images),
+        "empty_images": int(n_images - n_with_boxes),
+        "classes": ranked(labels),
+        "top_images": ranked(images, top),
+        "histogram": [
+            (float(lo), float(hi), int(n))
+            for lo, hi, n in zip(edges[:-1], edges[1:], hist)
+        ],
+    }
 
 
 def summarise_predictions(
-    results: List[Results],
+    results: Iterable[Results | ImageDetections] | DetectionTable,
     conf_threshold: float,
 ) -> List[str]:
     """
-    Produce friendly log lines, reusing ``build_summaries``
+    Produce friendly log lines, reusing ``build_summaries``.
+    An already built ``DetectionTable`` is used as-is.
     """
+    table = (
+        results
+        if isinstance(results, DetectionTable)
+        else build_table(results, conf_threshold)
+    )
 
     return [
         (
             f"Image {row['image']} has been identified with "
             f"{row['object']} with the {row['conf']:.1%} level of confidence."
         )
-        for row in build_summaries(results, conf_threshold)
+        for row in table.rows()
     ]
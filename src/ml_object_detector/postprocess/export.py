@@ -0,0 +1,199 @@
+"""
+ml_object_detector.postprocess.export
+-------------------------------------
+
+One columnar file of detections per run, next to its HTML report:
+``<reports_dir>/detections_<run_id>.parquet`` (or ``.csv``).
+
+Columns::
+
+    run_id, image, class_id, label, score, x1, y1, x2, y2,
+    preprocess_ms, inference_ms, postprocess_ms
+
+Rows are buffered as a :class:`~ml_object_detector.domain.table.TableBuilder`
+and written every ``export.batch_rows`` detections, as one Parquet row
+group (or a block of CSV lines), so memory stays flat over long runs. The
+file gets its final name only once it is complete.
+
+Parquet needs ``pyarrow`` (``pip install .[analytics]``); without it, or
+with ``export.format: csv``, a CSV file is written instead.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from ml_object_detector.config.load_config import load_config
+from ml_object_detector.domain.detections import ImageDetections
+from ml_object_detector.domain.table import DetectionTable, TableBuilder
+
+try:  # optional: columnar Parquet output
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+cfg = load_config()
+log = logging.getLogger(__name__)
+
+EXPORT = cfg.get("export") or {}
+STAGES = ("preprocess", "inference", "postprocess")
+COLUMNS = (
+    ["run_id", "image", "class_id", "label", "score", "x1", "y1", "x2", "y2"]
+    + [f"{stage}_ms" for stage in STAGES]
+)
+
+
+def resolve_format(fmt: str = "auto") -> str:
+    """``auto`` -> ``parquet`` when pyarrow is installed, else ``csv``."""
+    if fmt == "auto":
+        return "parquet" if pa is not None else "csv"
+    if fmt == "parquet" and pa is None:
+        log.warning("pyarrow is not installed, exporting detections as CSV")
+        return "csv"
+    if fmt not in ("parquet", "csv"):
+        raise ValueError(f"Unknown export format {fmt!r}, expected auto/parquet/csv")
+    return fmt
+
+
+class DetectionExporter:
+    """
+    Parameters
+    ----------
+    out_dir        : folder of the export (the reports folder)
+    run_id         : value of the ``run_id`` column, part of the file name
+    conf_threshold : boxes below are not exported (same as the report)
+    fmt            : ``auto`` | ``parquet`` | ``csv``
+    batch_rows     : detections buffered before a batch is written
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        run_id: str,
+        conf_threshold: float = 0.0,
+        fmt: str = "auto",
+        batch_rows: int = 10_000,
+    ) -> None:
+        self.run_id = run_id
+        self.conf_threshold = float(conf_threshold)
+        self.format = resolve_format(fmt)
+        self.batch_rows = max(1, int(batch_rows))
+
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self.path = out_dir / f"detections_{run_id}.{self.format}"
+        self._tmp = self.path.with_name(f".{self.path.name}.partial")
+
+        self.rows = 0
+        self._builder = TableBuilder(self.conf_threshold)
+        self._speeds: list[dict] = []
+        self._writer: Any = None  # ParquetWriter / csv.writer, opened lazily
+        self._fh: Any = None
+
+    # Writing ------------------------------------------------------
+
+    def add(self, result: Any) -> ImageDetections:
+        """Buffer one image's detections; flushes every ``batch_rows`` boxes."""
+        det = self._builder.add(result)
+        self._speeds.append(det.speed)
+        if self._builder.n_rows >= self.batch_rows:
+            self.flush()
+        return det
+
+    def flush(self) -> None:
+        table = self._builder.build()
+        speeds = self._speeds
+        self._builder = TableBuilder(self.conf_threshold)
+        self._speeds = []
+        if not len(table):
+            return
+
+        columns = self._columns(table, speeds)
+        if self.format == "parquet":
+            batch = pa.table(columns)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self._tmp, batch.schema)
+            self._writer.write_table(batch)
+        else:
+            if self._writer is None:
+                self._fh = open(self._tmp, "w", newline="", encoding="utf-8")
+                self._writer = csv.writer(self._fh)
+                self._writer.writerow(COLUMNS)
+            self._writer.writerows(zip(*(columns[c].tolist() for c in COLUMNS)))
+        self.rows += len(table)
+
+    def _columns(self, table: DetectionTable, speeds: list[dict]) -> dict[str, np.ndarray]:
+        """Whole-batch columns; per-image values are spread with one take()."""
+        images = np.array([Path(p).name for p in table.paths], dtype=object)
+        class_ids, inverse = np.unique(table.cls, return_inverse=True)
+        labels = np.array([table.names[c] for c in class_ids.tolist()], dtype=object)
+        columns = {
+            "run_id": np.full(len(table), self.run_id, dtype=object),
+            "image": images.take(table.image),
+            "class_id": table.cls,
+            "label": labels.take(inverse),
+            "score": table.conf,
+            "x1": table.xyxy[:, 0],
+            "y1": table.xyxy[:, 1],
+            "x2": table.xyxy[:, 2],
+            "y2": table.xyxy[:, 3],
+        }
+        for stage in STAGES:
+            per_image = np.array([s.get(stage, np.nan) for s in speeds], dtype=np.float32)
+            columns[f"{stage}_ms"] = per_image.take(table.image)
+        return columns
+
+    # Closing ------------------------------------------------------
+
+    def close(self) -> Path | None:
+        """Write what is left and publish the file. None if nothing was found."""
+        self.flush()
+        self._release()
+        if self.rows == 0:
+            self._tmp.unlink(missing_ok=True)
+            return None
+        os.replace(self._tmp, self.path)
+        log.info("Exported %d detection(s) to %s", self.rows, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        self._release()
+        self._tmp.unlink(missing_ok=True)
+
+    def _release(self) -> None:
+        if self.format == "parquet" and self._writer is not None:
+            self._writer.close()
+        if self._fh is not None:
+            self._fh.close()
+        self._writer = self._fh = None
+
+    def __enter__(self) -> "DetectionExporter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def run_exporter(
+    out_dir: Path, run_id: str, conf_threshold: float
+) -> DetectionExporter | None:
+    """Exporter configured from ``config.yaml``; None when ``export.enabled`` is off."""
+    if not EXPORT.get("enabled", True):
+        return None
+    return DetectionExporter(
+        out_dir,
+        run_id,
+        conf_threshold,
+        fmt=EXPORT.get("format", "auto"),
+        batch_rows=int(EXPORT.get("batch_rows", 10_000)),
+    )
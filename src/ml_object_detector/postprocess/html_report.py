@@ -1,36 +1,69 @@
 from __future__ import annotations
+import itertools
+import json
+import os
+import shutil
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
+from typing import Sequence
 
 from jinja2 import Environment, FileSystemLoader
-from ml_object_detector.config.load_config import load_config
+from ml_object_detector.config.load_config import load_config, on_reload
+from ml_object_detector.postprocess.analysis import aggregate
 from ml_object_detector.utils.fs import ensure_directory_exists
 
+cfg = load_config()
+TEMPLATE_DIR = Path(cfg["ROOT"]) / cfg["template_dir"]
+REPORT_TEMPLATE = "results.html.j2"
+REPORT = cfg.get("report") or {}
+PAGE_SIZE = int(REPORT.get("page_size", 200))  # detection rows per page
+TOP_IMAGES = int(REPORT.get("top_images", 20))  # most crowded images listed
 
+
+@lru_cache(maxsize=1)
 def _get_env() -> Environment:
-    cfg = load_config()
-    TEMPLATE_DIR = Path(cfg["ROOT"]) / cfg["template_dir"]
+    """
+    Process-wide environment: templates are compiled once and kept in its
+    cache (recompiled only if the file changes on disk).
+    """
     ensure_directory_exists(TEMPLATE_DIR)
     env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=True)
+    env.get_template(REPORT_TEMPLATE)  # compile up front
     return env
 
 
+on_reload(lambda _: _get_env.cache_clear())
+
+
 def write_html_report(
-    summaries: list[dict], reports_dir: Path, run_id: str | None = None
+    summaries: Sequence[dict],
+    reports_dir: Path,
+    run_id: str | None = None,
+    page_size: int = PAGE_SIZE,
 ) -> Path:
     """
-    Render results.html.j2 into <reports_dir>/object_detector_report_<run_id>.html
+    Render results.html.j2 into <reports_dir>/report_<run_id>.html
+
+    The page holds an aggregated overview of the run (counts per class,
+    most crowded images, score histogram) and the first *page_size*
+    detection rows. The other rows are written as JSON pages,
+    ``<reports_dir>/report_<run_id>_rows/page_<n>.json``, which the page
+    fetches on demand, so its size does not grow with the run.
 
     Parameters
     ----------
-    summaries : list[dict]
-        Pre-computed summaries (one per detection).
+    summaries : Sequence[dict]
+        Summaries (one per detection), a list or the lazy
+        ``DetectionTable.rows()`` view (aggregated on its columns).
         Each *row["image"]* is already relative, e.g.  "20250630T190215/aa3f09c1d2e4.jpeg".
     reports_dir : Path
         Folder where reports live (served at `/reports`).
     run_id : str | None
         If None we generate a timestamp `YYYYMMDDThhmmss`. Pass your own to keep it stable
         across multi-step pipelines.
+    page_size : int
+        Detection rows per page.
 
     Returns
     -------
@@ -38,13 +71,49 @@ def write_html_report(
         Absolute path of the freshly written HTML report.
     """
     run_id = run_id or datetime.now().strftime("%Y%m%dT%H%M%S")
+    page_size = max(1, int(page_size))
 
-    env = _get_env()
-    template = env.get_template("results.html.j2")
-
-    html = template.render(run_date=datetime.now(), rows=summaries)
+    template = _get_env().get_template(REPORT_TEMPLATE)
 
     ensure_directory_exists(reports_dir)
-    report_path = reports_dir / f"report_{run_id}.html"
-    report_path.write_text(html, encoding="utf-8")
+    report_path = Path(reports_dir) / f"report_{run_id}.html"
+    tmp_path = report_path.with_name(f".{report_path.name}.partial")
+    rows_dir = report_path.with_name(f"report_{run_id}_rows")
+
+    overview = aggregate(summaries, top=TOP_IMAGES)
+    pages = max(1, -(-len(summaries) // page_size))
+    rows = iter(summaries)
+    first_page = list(itertools.islice(rows, page_size))
+
+    # Stream the render chunk by chunk; the processing page only ever
+    # sees a complete report (JSON pages are in place before it appears)
+    try:
+        _write_pages(rows, rows_dir, page_size, pages)
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            fh.writelines(
+                template.generate(
+                    run_date=datetime.now(),
+                    rows=first_page,
+                    overview=overview,
+                    pages=pages,
+                    rows_url=f"{rows_dir.name}/",
+                )
+            )
+        os.replace(tmp_path, report_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        shutil.rmtree(rows_dir, ignore_errors=True)
+        raise
     return report_path
+
+
+def _write_pages(rows, rows_dir: Path, page_size: int, pages: int) -> None:
+    """Pages 2..*pages* of *rows* (an iterator past page 1) as JSON files."""
+    shutil.rmtree(rows_dir, ignore_errors=True)  # stale pages of a rerun
+    if pages < 2:
+        return
+    rows_dir.mkdir(parents=True)
+    for page in range(2, pages + 1):
+        chunk = list(itertools.islice(rows, page_size))
+        with open(rows_dir / f"page_{page}.json", "w", encoding="utf-8") as fh:
+            json.dump({"page": page, "pages": pages, "rows": chunk}, fh)
@@ -1,15 +1,56 @@
+"""
+ml_object_detector.services.detector
+------------------------------------
+
+Detection jobs run by the API, the job runners and the worker processes.
+
+The YOLO model (and with it torch/ultralytics) is loaded on first use by
+:func:`get_model`, not when this module is imported, so the API, the CLI
+entry points and the test suite start without paying for it.
+:func:`warmup` loads it up front; the API calls it from its lifespan.
+
+Single-image detections from the API go through :func:`detect`: requests
+arriving together are grouped in the API process (``batching`` in
+``config.yaml``) and each group runs as one :func:`predict_batch_job` in a
+worker, i.e. one forward pass for several images.
+Images that already come as a batch (one ``/v1/detect`` request) go
+through :func:`detect_many` and run as one :func:`predict_batch_job` as
+they are.
+"""
+
+from __future__ import annotations
+
 import asyncio
-import uuid
-import shutil
-from pathlib import Path
-from fastapi import UploadFile
 import logging
-from ml_object_detector.models.predictor import YoloPredictor
-from ml_object_detector.postprocess.analysis import build_summaries
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Sized
+
+import requests
+
+from ml_object_detector.config.load_config import load_config
+from ml_object_detector.domain.detections import ImageDetections
+from ml_object_detector.domain.table import TableBuilder
+from ml_object_detector.etl.download_images import download_queries
+from ml_object_detector.models.batching import MicroBatcher
+from ml_object_detector.models.decode import SharedImage
+from ml_object_detector.postprocess.export import run_exporter
 from ml_object_detector.postprocess.html_report import write_html_report
+from ml_object_detector.services.workers import (
+    pool_size,
+    report_stats,
+    run_in_worker,
+    run_in_worker_async,
+)
 from ml_object_detector.utils.email_alarm import send_alarm_email
 from ml_object_detector.utils.fs import ensure_directory_exists
-from ml_object_detector.config.load_config import load_config
+
+if TYPE_CHECKING:  # heavy: torch + ultralytics
+    from ultralytics.engine.results import Results
+
+    from ml_object_detector.models.predictor import OneResult, YoloPredictor
 
 cfg = load_config()
 log = logging.getLogger(__name__)
@@ -17,38 +58,219 @@ log = logging.getLogger(__name__)
 ROOT = Path(cfg["ROOT"])
 PROCESSED = ROOT / cfg["output_dir"]
 REPORTS = ROOT / cfg["reports_dir"]
+BATCHING = cfg.get("batching") or {}  # grouping of concurrent detections
+
+_model: YoloPredictor | None = None
+_model_lock = threading.Lock()
+_dispatcher: MicroBatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_model() -> YoloPredictor:
+    """This process' predictor, loaded on the first call."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            t0 = time.perf_counter()
+            from ml_object_detector.models.predictor import YoloPredictor
+
+            # batches are formed by the dispatcher, not inside the model
+            _model = YoloPredictor(batching=False)
+            log.info("Model loaded in %.2f s", time.perf_counter() - t0)
+        return _model
+
+
+def loaded_model() -> YoloPredictor | None:
+    """The predictor if it was loaded already, without loading it."""
+    return _model
+
+
+def warmup() -> None:
+    """Load the model and run one forward pass so the first request is not slow."""
+    t0 = time.perf_counter()
+    get_model().warmup()
+    log.info("Model warm-up done in %.2f s", time.perf_counter() - t0)
+
+
+def model_stats() -> dict:
+    """Cache and artifact counters of this process' model (empty before it loads)."""
+    if _model is None:
+        return {}
+    return {"cache": _model.cache_stats(), "artifacts": _model.artifact_stats()}
 
 
-model = YoloPredictor()
-locks: dict[str, asyncio.Lock] = {}
+# Batched detections ------------------------------------------------
 
 
-def acquire_lock(ip: str) -> asyncio.Lock:
-    lock = locks.setdefault(ip, asyncio.Lock())
-    if lock.locked():
-        raise RuntimeError("Previous job still running")
-    return lock
+def predict_batch_job(requests: list[dict]) -> list[OneResult | Exception]:
+    """
+    Worker side: `YoloPredictor.predict_many` over *requests* (keyword
+    arguments of :func:`predict_one_job`), returning picklable results.
+    A request that failed on its own comes back as its exception.
+    """
+    for request in requests:
+        shared = request.pop("shared", None)
+        request["image"] = shared.load() if shared is not None else None
+    results = get_model().predict_many(requests)
+    report_stats(model_stats())
+    return [r if isinstance(r, Exception) else r.detached() for r in results]
 
 
-def run_yolo_and_report(src_dir: Path, conf: float, run_id: str) -> Path:
-    processed_dir = PROCESSED / run_id
-    ensure_directory_exists(processed_dir)
-    results = model.predict_images_in_folder(src_dir, processed_dir, conf)
-    summaries = build_summaries(results, conf, run_id)
-    report = write_html_report(summaries, REPORTS, run_id)
-    if not summaries and len(results) > 0:
-        send_alarm_email(run_id, len(results))
+def _run_batch(requests: list[dict]) -> list[OneResult | Exception]:
+    return run_in_worker(predict_batch_job, requests)
+
+
+def get_dispatcher() -> MicroBatcher:
+    """
+    API side: groups concurrent :func:`detect` calls into batches of up to
+    ``batching.max_batch_size`` and keeps one batch per worker process in
+    flight; while all workers are busy, new requests join the next batch.
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            enabled = BATCHING.get("enabled", False)
+            _dispatcher = MicroBatcher(
+                _run_batch,
+                max_batch_size=int(BATCHING.get("max_batch_size", 8)) if enabled else 1,
+                max_wait_ms=float(BATCHING.get("max_wait_ms", 10)) if enabled else 0.0,
+                max_in_flight=max(1, pool_size()),
+            )
+        return _dispatcher
+
+
+def batch_stats() -> dict:
+    """Batch sizes and queue waits of the dispatcher (empty before first use)."""
+    return _dispatcher.stats() if _dispatcher is not None else {}
+
+
+async def detect_many(requests: list[dict]) -> list[OneResult | Exception]:
+    """
+    Awaitable :func:`predict_batch_job`: *requests* (keyword arguments of
+    :func:`predict_one_job`) detected together in one worker, without
+    waiting to be grouped with anything else.
+    """
+    return await run_in_worker_async(predict_batch_job, requests)
+
+
+async def detect(**request) -> OneResult:
+    """
+    Awaitable :func:`predict_one_job` (same keyword arguments), batched
+    with whatever else is being detected at the same time.
+    """
+    # a request that failed on its own fails its future
+    return await asyncio.wrap_future(get_dispatcher().submit(request))
+
+
+def predict_one_job(
+    img_path: Path,
+    out_dir: Path,
+    conf: float,
+    shared: SharedImage | None = None,
+    digest: str | None = None,
+    artifacts: str | None = None,
+    wait_artifacts: bool = False,
+) -> OneResult:
+    """
+    `predict_one` on this process' model, returning a picklable result.
+
+    *shared* holds the pixels decoded at ingest, so the worker neither
+    reads nor decodes *img_path* again. *artifacts* / *wait_artifacts* are
+    passed on: by default the worker is free again as soon as inference is
+    done, while this process' writer threads encode the files.
+    """
+    image = shared.load() if shared is not None else None
+    one = get_model().predict_one(
+        img_path=img_path,
+        out_dir=out_dir,
+        conf=conf,
+        image=image,
+        digest=digest,
+        artifacts=artifacts,
+        wait_artifacts=wait_artifacts,
+    )
+    return one.detached()
+
+
+def count_images(src_dir: Path) -> int:
+    """Number of images YOLO will pick up in *src_dir*."""
+    from ultralytics.data.utils import IMG_FORMATS
+
+    return sum(
+        1 for p in Path(src_dir).iterdir() if p.suffix.lower().lstrip(".") in IMG_FORMATS
+    )
+
+
+def run_yolo_and_report(
+    src_dir: Path,
+    conf: float,
+    run_id: str,
+    results: Iterable[Results | ImageDetections] | None = None,
+    progress: Callable[[int, int | None], None] | None = None,
+    artifacts: str | None = None,
+) -> Path:
+    """
+    Build the HTML report (and zero-detection alarm) for *run_id*.
+
+    When *results* is given (e.g. the single-image upload already ran
+    ``predict_one``) they are reused as-is and YOLO is **not** run again
+    over *src_dir*. Otherwise images are streamed one by one, so memory
+    does not grow with the size of the folder.
+
+    *progress*, if given, is called as ``progress(done, total)`` after
+    every image. *artifacts* picks the files written next to the report
+    (see ``YoloPredictor.predict_one``); the report shows the annotated
+    copies, so leave the default unless the caller does not need them.
+    """
+    if results is None:
+        total = count_images(src_dir)
+        processed_dir = PROCESSED / run_id
+        ensure_directory_exists(processed_dir)
+        results = get_model().stream_images_in_folder(
+            src_dir, processed_dir, conf, artifacts=artifacts
+        )
+    else:
+        total = len(results) if isinstance(results, Sized) else None
+
+    if progress is not None:
+        progress(0, total)
+
+    builder = TableBuilder(conf)  # one threshold mask per image, columns
+    # detections_<run_id>.parquet/.csv next to the report, written in batches
+    with run_exporter(REPORTS, run_id, conf) or nullcontext() as exporter:
+        for det in results:
+            det = builder.add(det)
+            if exporter is not None:
+                exporter.add(det)
+            if progress is not None:
+                progress(len(builder.paths), total)
+    table = builder.build()
+
+    # rows for the template are built lazily while it renders
+    report = write_html_report(table.rows(run_id), REPORTS, run_id)
+    if not len(table) and table.n_images > 0:
+        send_alarm_email(run_id, table.n_images)
     return report
 
 
-def save_uploads(files: list[UploadFile], dest_dir: Path) -> list[Path]:
-    ensure_directory_exists(dest_dir)
-    paths = []
+def download_and_report(
+    query_terms: list[str],
+    n: int,
+    src_dir: Path,
+    conf: float,
+    run_id: str,
+    progress: Callable[[int, int | None], None] | None = None,
+) -> Path:
+    """
+    Job behind ``/detect_query``: fetch *n* Pexels images per term into
+    *src_dir*, then run detection + report in a worker.
+
+    A failed download is logged and the report is still produced from
+    whatever was fetched, so the processing page always completes.
+    """
+    try:
+        download_queries(query_terms, n=n, log=log, dest_dir=src_dir, run_id=run_id)
+    except requests.RequestException as e:
+        log.error("run_id=%s download failed for %r: %s", run_id, query_terms, e)
 
-    for file in files:
-        ext = Path(file.filename).suffix
-        tmp = dest_dir / f"{uuid.uuid4()}{ext}"
-        with tmp.open("wb") as out:
-            shutil.copyfileobj(file.file, out)
-        paths.append(tmp)
-    return paths
+    return run_in_worker(run_yolo_and_report, src_dir, conf, run_id, progress=progress)
@@ -0,0 +1,142 @@
+"""
+ml_object_detector.services.events
+----------------------------------
+
+In-memory pub/sub of job progress, streamed to browsers as Server-Sent
+Events by ``GET /events/{run_id}``.
+
+Publishers are plain threads (job runners) and the inference worker
+processes; the latter cannot reach the API process' memory, so their
+events are forwarded through a ``multiprocessing`` queue that
+:mod:`ml_object_detector.services.workers` drains into :data:`hub`.
+
+Event payloads are small dicts::
+
+    {"type": "progress", "done": 3, "total": 10}
+    {"type": "done", "report_url": "/reports/report_<run_id>.html"}
+    {"type": "failed", "error": "..."}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable
+
+log = logging.getLogger(__name__)
+
+FINAL = ("done", "failed")
+KEEPALIVE_S = 15.0  # comment line so proxies keep idle streams open
+MAX_RUNS = 1000  # runs whose last event is remembered for late subscribers
+
+
+class EventHub:
+    """Fan-out of events per ``run_id`` to any number of asyncio subscribers."""
+
+    def __init__(self, max_runs: int = MAX_RUNS) -> None:
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._last: OrderedDict[str, dict] = OrderedDict()
+
+    def publish(self, run_id: str, event: dict) -> None:
+        """Thread-safe: deliver *event* to every subscriber of *run_id*."""
+        with self._lock:
+            self._last[run_id] = event
+            self._last.move_to_end(run_id)
+            while len(self._last) > self.max_runs:
+                self._last.popitem(last=False)
+            subscribers = list(self._subscribers.get(run_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:  # subscriber's loop already closed
+                pass
+
+    def subscribe(self, run_id: str) -> tuple[asyncio.Queue, dict | None]:
+        """New queue for *run_id* (call from the event loop) + last event."""
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(run_id, set()).add(
+                (asyncio.get_running_loop(), queue)
+            )
+            return queue, self._last.get(run_id)
+
+    def unsubscribe(self, run_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(run_id, set())
+            subs.difference_update({s for s in subs if s[1] is queue})
+            if not subs:
+                self._subscribers.pop(run_id, None)
+
+    def last(self, run_id: str) -> dict | None:
+        with self._lock:
+            return self._last.get(run_id)
+
+
+hub = EventHub()
+
+# Set in inference worker processes: events go to the parent instead
+_forward: Callable[[tuple[str, dict]], None] | None = None
+
+
+def forward_to(put: Callable[[tuple[str, dict]], None] | None) -> None:
+    """Route :func:`publish` of this process through *put* (worker side)."""
+    global _forward
+    _forward = put
+
+
+def publish(run_id: str, event: dict) -> None:
+    """Publish from anywhere: API process threads or worker processes."""
+    if _forward is not None:
+        try:
+            _forward((run_id, event))
+        except Exception as e:  # progress must never fail a detection
+            log.debug("Could not forward event for %s: %s", run_id, e)
+        return
+    hub.publish(run_id, event)
+
+
+# SSE -------------------------------------------------------------
+
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def sse_stream(
+    run_id: str,
+    initial: dict | None = None,
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    keepalive_s: float = KEEPALIVE_S,
+) -> AsyncIterator[str]:
+    """
+    Yield SSE frames for *run_id* until its ``done``/``failed`` event.
+
+    *initial* is the state known elsewhere (e.g. the job store) and is sent
+    first when the hub has nothing newer, so late subscribers and runs
+    finished before a restart complete immediately.
+    """
+    queue, last = hub.subscribe(run_id)
+    try:
+        current = last or initial
+        if current is not None:
+            yield format_sse(current)
+            if current["type"] in FINAL:
+                return
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), keepalive_s)
+            except asyncio.TimeoutError:
+                if is_disconnected is not None and await is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+            if event["type"] in FINAL:
+                return
+    finally:
+        hub.unsubscribe(run_id, queue)
@@ -3,97 +3,336 @@ ml_object_detector.services.file_inspection.inspection
 ------------------------------------------------------
 
 Async helper that *streams* an UploadFile to disk while applying the image
-policy, without ever keeping the full payload in RAM.
+policy, without ever keeping the full payload in RAM (memory per upload is
+one chunk).
 
 Usage (in a FastAPI endpoint) ::
 
-    from ml_object_detector.services.file_inspection.inspection import inspect_uploaded_file
+    from ml_object_detector.services.file_inspection import ingest_uploads
 
     @router.post("/detect_upload")
     async def detect_upload(...):
-        for up in files:
-            await inspect_uploaded_file(up)  # raises InvalidImageError on failure
+        paths = await ingest_uploads(files, run_raw_dir)  # raises InvalidImageError
 """
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import io
+import mimetypes
 import os
 import tempfile
+import uuid
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Awaitable, Callable, Iterable, Tuple
 
 import aiofiles
 from magic import from_buffer
+from starlette.concurrency import run_in_threadpool
 # Policy loaded dynamically below
 from PIL import Image, UnidentifiedImageError
 from starlette.datastructures import UploadFile
 
-from ml_object_detector.domain.errors import InvalidImageError
-from ml_object_detector.config.load_config import load_config  # your existing helper
+from ml_object_detector.domain.errors import (
+    ConfirmationRequired,
+    InvalidImageError,
+    UploadRejected,
+)
+from ml_object_detector.config.load_config import load_config, on_reload
+from ml_object_detector.models.decode import DecodedImage, decode_for_model
 from .policy import load_policy
 
 # ---------------------------------------------------------------
 
 cfg = load_config()
 policy = load_policy(cfg)
-CHUNK = 8192
+CHUNK = 64 * 1024
+SNIFF_BYTES = 32_768  # head of the file given to libmagic
+MAX_PARALLEL = int(cfg["file_inspection"].get("max_parallel", 4))  # files validated at once
+
+
+@on_reload
+def _reload_policy(new_cfg) -> None:
+    """Size limits and allowed types follow config.yaml without a restart."""
+    global policy
+    policy = load_policy(new_cfg)
+
 
 # ---------------------------------------------------------------
 
-async def inspect_uploaded_file(upfile: UploadFile) -> Tuple[str, Path]:
+def _verify(path: Path) -> None:
+    """Pillow integrity check (blocking: decodes headers/structure)."""
+    with Image.open(path) as img:
+        img.verify()
+
+
+def _final_name(mime: str, filename: str | None) -> str:
+    """Unique name whose extension matches the sniffed type (YOLO needs it)."""
+    ext = mimetypes.guess_extension(mime) or Path(filename or "").suffix.lower()
+    return f"{uuid.uuid4()}{ext}"
+
+
+async def _read_head(upfile: UploadFile) -> bytes:
+    """First SNIFF_BYTES of the upload (or all of it, if smaller)."""
+    head = bytearray()
+    while len(head) < SNIFF_BYTES:
+        chunk = await upfile.read(SNIFF_BYTES - len(head))
+        if not chunk:
+            break
+        head.extend(chunk)
+    return bytes(head)
+
+
+def _sniff(head: bytes) -> str:
+    """libmagic MIME type (blocking C call, run in the threadpool)."""
+    return from_buffer(head, mime=True).lower()
+
+
+def _check_size(size: int, confirm_large: bool) -> None:
+    if size > policy.max_bytes:
+        raise InvalidImageError(
+            f"Image larger than {policy.max_bytes/1024/1024:.2f} MB"
+        )
+    if policy.soft_bytes and size > policy.soft_bytes and not confirm_large:
+        raise ConfirmationRequired(
+            f"Image larger than {policy.soft_limit_mb} MB, confirm to upload it"
+        )
+
+
+async def _admit(upfile: UploadFile, confirm_large: bool) -> Tuple[bytes, str]:
+    """Declared size + MIME sniff of the head; returns ``(head, mime)``."""
+    if upfile.size is not None:
+        _check_size(upfile.size, confirm_large)
+    head = await _read_head(upfile)
+    mime = await run_in_threadpool(_sniff, head)
+    if mime not in policy.allowed_mime:
+        raise InvalidImageError(f"Unsupported MIME type {mime!r}")
+    return head, mime
+
+
+def rejection(filename: str | None, exc: InvalidImageError) -> dict:
+    """One entry of :attr:`UploadRejected.errors`."""
+    return {
+        "file": filename,
+        "error": str(exc),
+        "confirm_required": isinstance(exc, ConfirmationRequired),
+    }
+
+
+@dataclass
+class DecodedUpload:
+    path: Path | None  # original bytes on disk, None when kept in memory only
+    mime: str
+    sha1: str  # of the original bytes, computed while streaming
+    image: DecodedImage  # pixels ready for the model
+
+
+async def inspect_uploaded_file(
+    upfile: UploadFile, dest_dir: Path | None = None, confirm_large: bool = False
+) -> Tuple[str, Path]:
     """
-    Stream *upfile* to a temporary file, validate it, and return:
+    Stream *upfile* to disk, validate it, and return:
+
+        (mime_type, path)
 
-        (mime_type, tmp_path)
+    Size (when the client declared it) and MIME type are checked on the
+    first chunk, before anything is written. With *dest_dir* (e.g. the
+    run's raw directory) the file is written there and atomically renamed
+    to a unique name with an extension matching its MIME type once it
+    passed every check. Without it, the file stays in a temporary file the
+    caller can move or unlink.
 
-    The caller can then move/rename `tmp_path` or unlink it.
+    Files above ``soft_limit_mb`` are only accepted with *confirm_large*.
 
     Raises
     ------
+    ConfirmationRequired
+        If the file exceeds the soft limit and *confirm_large* is False.
     InvalidImageError
         If the file is too large, not an allowed MIME type,
         or Pillow fails to verify it.
     """
+    mime, path, _, _ = await _ingest(upfile, dest_dir, confirm_large, _verify)
+    return mime, path
+
+
+async def ingest_decoded(
+    upfile: UploadFile, dest_dir: Path, imgsz: int, confirm_large: bool = False
+) -> DecodedUpload:
+    """
+    :func:`inspect_uploaded_file` for the single-image fast path: instead
+    of ``verify()`` the file is decoded once, already reduced towards
+    *imgsz* (see :func:`~ml_object_detector.models.decode.decode_for_model`),
+    and the pixels are returned so inference needs no second decode. The
+    SHA-1 of the bytes is computed while streaming, for the detection cache.
+
+    Raises the same errors as :func:`inspect_uploaded_file`.
+    """
+    mime, path, sha1, image = await _ingest(
+        upfile, dest_dir, confirm_large, lambda p: decode_for_model(p, imgsz)
+    )
+    return DecodedUpload(path, mime, sha1, image)
+
+
+async def decode_in_memory(
+    upfile: UploadFile, imgsz: int, confirm_large: bool = False
+) -> DecodedUpload:
+    """
+    Like :func:`ingest_decoded`, but nothing is written to disk: the body
+    (at most ``hard_limit_mb``) is read into memory, hashed and decoded
+    from there. For callers that only want the detections back.
+
+    Raises the same errors as :func:`inspect_uploaded_file`.
+    """
+    head, mime = await _admit(upfile, confirm_large)
+    body = bytearray(head)
+    _check_size(len(body), confirm_large)
+    while True:
+        chunk = await upfile.read(CHUNK)
+        if not chunk:
+            break
+        body.extend(chunk)
+        _check_size(len(body), confirm_large)  # clients can lie about the size
+
+    data = bytes(body)
+    try:
+        image = await run_in_threadpool(decode_for_model, io.BytesIO(data), imgsz)
+    except (UnidentifiedImageError, OSError) as exc:
+        raise InvalidImageError(str(exc)) from exc
+    return DecodedUpload(None, mime, hashlib.sha1(data).hexdigest(), image)
+
+
+async def _ingest(
+    upfile: UploadFile,
+    dest_dir: Path | None,
+    confirm_large: bool,
+    check: Callable[[Path], Any],
+) -> Tuple[str, Path, str, Any]:
+    """Shared body: returns ``(mime, path, sha1, check(path))``."""
+
+    def check_size(size: int) -> None:
+        _check_size(size, confirm_large)
 
-    # 1) Create a named temporary file path (close df immediately)
-    file_descriptor, temporary_name = tempfile.mkstemp(prefix="upload_", suffix=".img")
+    # 1) Early rejection: declared size + MIME sniff, nothing on disk yet
+    head, mime = await _admit(upfile, confirm_large)
+
+    # 2) Create a named temporary file path (close df immediately)
+    file_descriptor, temporary_name = tempfile.mkstemp(
+        prefix=".upload_" if dest_dir else "upload_", suffix=".img", dir=dest_dir
+    )
     os.close(file_descriptor)
     temporary_path = Path(temporary_name)
 
-    total = 0
-    sniff = bytearray() # first 32 KB for MIME sniffing
+    total = len(head)
+    digest = hashlib.sha1(head)
 
     try:
-        # 2) Stream from client to disk, chunk-by-chunk
+        check_size(total)
+
+        # 3) Stream from client to disk, chunk-by-chunk
         async with aiofiles.open(temporary_path, "wb") as destination:
+            await destination.write(head)
             while True:
                 chunk = await upfile.read(CHUNK)
                 if not chunk:
                     break
 
                 total += len(chunk)
-                if total > policy.max_bytes:
-                    raise InvalidImageError(
-                        f"Image larger than {policy.max_bytes/1024/1024:.2f} MB"
-                    )
-
-                if len(sniff) < 32_768: # capture initial bytes
-                    need = 32_768 - len(sniff)
-                    sniff.extend(chunk[:need])
-
+                check_size(total)  # clients can lie about the size
+                digest.update(chunk)
                 await destination.write(chunk)
 
-        # 3) Validate MIME type
-        mime = from_buffer(bytes(sniff), mime=True).lower()
-        if mime not in policy.allowed_mime:
-            raise InvalidImageError(f"Unsupported MIME type {mime!r}")
+        # 4) Let Pillow check integrity, off the event loop
+        checked = await run_in_threadpool(check, temporary_path)
 
-        # 4) Let Pillow verify integrity (blocking but tiny files).
-        with Image.open(temporary_path) as img:
-            img.verify()
+        if dest_dir is None:
+            return mime, temporary_path, digest.hexdigest(), checked
 
-        return mime, temporary_path
+        final_path = Path(dest_dir) / _final_name(mime, upfile.filename)
+        os.replace(temporary_path, final_path)
+        return mime, final_path, digest.hexdigest(), checked
 
-    except (InvalidImageError, UnidentifiedImageError, OSError) as exc:
+    except InvalidImageError:
+        temporary_path.unlink(missing_ok=True)
+        raise
+    except (UnidentifiedImageError, OSError) as exc:
         # Ensure temp file is removed on any validation failure.
         temporary_path.unlink(missing_ok=True)
         raise InvalidImageError(str(exc)) from exc
+    except BaseException:  # cancelled upload, client gone ...
+        temporary_path.unlink(missing_ok=True)
+        raise
+
+
+async def ingest_uploads(
+    files: Iterable[UploadFile], dest_dir: Path, confirm_large: bool = False
+) -> list[Path]:
+    """
+    Stream and validate every upload into *dest_dir* concurrently (at most
+    ``file_inspection.max_parallel`` at a time) and return the paths, in
+    the order of *files*.
+
+    Raises
+    ------
+    UploadRejected
+        With one ``{"file", "error"}`` entry per rejected file. Files that
+        passed are removed again, nothing of the batch is kept.
+    """
+
+    async def one(upfile: UploadFile) -> Path:
+        _, path = await inspect_uploaded_file(upfile, dest_dir, confirm_large)
+        return path
+
+    return await _validate_all(files, one)
+
+
+async def decode_uploads(
+    files: Iterable[UploadFile], imgsz: int, confirm_large: bool = False
+) -> list[DecodedUpload]:
+    """
+    :func:`decode_in_memory` for every upload, concurrently like
+    :func:`ingest_uploads`, in the order of *files*.
+
+    Raises
+    ------
+    UploadRejected
+        With one ``{"file", "error"}`` entry per rejected file.
+    """
+    return await _validate_all(
+        files, lambda upfile: decode_in_memory(upfile, imgsz, confirm_large)
+    )
+
+
+async def _validate_all(
+    files: Iterable[UploadFile], one: Callable[[UploadFile], Awaitable[Any]]
+) -> list[Any]:
+    """Run *one* per file (bounded), all or nothing: see :func:`ingest_uploads`."""
+    files = list(files)
+    slots = asyncio.Semaphore(MAX_PARALLEL)
+
+    async def bounded(upfile: UploadFile) -> Any:
+        async with slots:
+            return await one(upfile)
+
+    outcomes = await asyncio.gather(*(bounded(f) for f in files), return_exceptions=True)
+
+    errors = []
+    for upfile, outcome in zip(files, outcomes):
+        if isinstance(outcome, InvalidImageError):
+            errors.append(rejection(upfile.filename, outcome))
+        elif isinstance(outcome, BaseException):
+            errors.append({"file": upfile.filename, "error": repr(outcome)})
+
+    if errors:
+        for outcome in outcomes:
+            if isinstance(outcome, Path):
+                outcome.unlink(missing_ok=True)
+        for outcome in outcomes:
+            # bugs / cancellation are not the client's fault
+            if isinstance(outcome, BaseException) and not isinstance(
+                outcome, InvalidImageError
+            ):
+                raise outcome
+        raise UploadRejected(errors)
+    return outcomes
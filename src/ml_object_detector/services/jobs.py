@@ -0,0 +1,513 @@
+"""
+ml_object_detector.services.jobs
+--------------------------------
+
+Durable job queue for bulk uploads and Pexels queries.
+
+Jobs are rows in a SQLite table (``jobs.db_path``) and move through
+
+    queued -> running -> done | failed
+
+A :class:`JobRunner` owns a few threads in the API process that execute
+jobs in the order granted by the fair scheduler
+(:mod:`ml_object_detector.services.scheduler`); the heavy YOLO part is
+handed on to the inference worker pool
+(:mod:`ml_object_detector.services.workers`). Progress counts are written
+to the same table, also from the worker processes, and are served by
+``GET /jobs/{run_id}``; the same progress and the completion of a job are
+pushed to ``GET /events/{run_id}`` subscribers through
+:mod:`ml_object_detector.services.events`.
+
+On start-up, jobs left ``running`` by a process that is gone are put back
+in the queue (up to ``jobs.max_attempts``) and every queued job is handed
+to the scheduler again, so a restart does not lose in-flight work.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from ml_object_detector.config.load_config import load_config
+from ml_object_detector.services import events
+from ml_object_detector.services.scheduler import FairScheduler, get_scheduler
+
+cfg = load_config()
+log = logging.getLogger(__name__)
+
+JOBS = cfg.get("jobs") or {}
+DB_PATH = Path(cfg["ROOT"]) / JOBS.get("db_path", "data/jobs/jobs.sqlite3")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+STATES = (QUEUED, RUNNING, DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    run_id      TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    client      TEXT NOT NULL DEFAULT '',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    owner_pid   INTEGER,
+    done        INTEGER NOT NULL DEFAULT 0,
+    total       INTEGER,
+    report      TEXT,
+    error       TEXT,
+    created     REAL NOT NULL,
+    started     REAL,
+    finished    REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state_created ON jobs(state, created);
+"""
+
+_COLUMNS = (
+    "run_id, kind, state, payload, client, attempts, owner_pid, done, total, "
+    "report, error, created, started, finished"
+)
+
+
+@dataclass
+class Job:
+    run_id: str
+    kind: str  # key into the runner's handlers, e.g. "report" / "query"
+    state: str
+    payload: dict[str, Any]  # JSON-serialisable arguments of the handler
+    client: str = ""  # scheduler key of the submitter
+    attempts: int = 0
+    owner_pid: int | None = None
+    done: int = 0  # images processed so far
+    total: int | None = None  # images expected, when known
+    report: str | None = None
+    error: str | None = None
+    created: float = 0.0
+    started: float | None = None
+    finished: float | None = None
+    results: Any = field(default=None, repr=False)  # in-memory only, never stored
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "Job":
+        values = dict(zip(_COLUMNS.split(", "), row))
+        values["payload"] = json.loads(values["payload"])
+        return cls(**values)
+
+    def to_dict(self) -> dict:
+        """Public JSON view used by the ``/jobs`` API."""
+        data = asdict(self)
+        for private in ("payload", "client", "owner_pid", "results"):
+            data.pop(private)
+        data["progress"] = {"done": data.pop("done"), "total": data.pop("total")}
+        return data
+
+    def event(self) -> dict:
+        """Current state as a progress/done/failed event (see services.events)."""
+        if self.state == DONE:
+            report_url = f"/reports/{Path(self.report).name}" if self.report else None
+            return {"type": "done", "report_url": report_url}
+        if self.state == FAILED:
+            return {"type": "failed", "error": self.error}
+        return {"type": "progress", "done": self.done, "total": self.total}
+
+
+def _pid_alive(pid: int | None) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, owned by someone else
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Parameters
+    ----------
+    db_path      : SQLite file (created on first use)
+    max_attempts : how many times a job interrupted by a restart is retried
+    """
+
+    def __init__(self, db_path: str | Path, max_attempts: int = 2) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = int(max_attempts)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "client" not in columns:  # store created before fair scheduling
+            self._conn.execute(
+                "ALTER TABLE jobs ADD COLUMN client TEXT NOT NULL DEFAULT ''"
+            )
+
+    # Writes -------------------------------------------------------
+
+    def enqueue(
+        self, run_id: str, kind: str, payload: dict[str, Any], client: str = ""
+    ) -> Job:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (run_id, kind, state, payload, client, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, kind, QUEUED, json.dumps(payload), client, time.time()),
+            )
+        return self.get(run_id)
+
+    def claim(self, run_id: str | None = None) -> Job | None:
+        """
+        Atomically move a queued job to ``running`` and return it: *run_id*
+        if given (None if it is no longer queued), else the oldest one.
+        """
+        if run_id is None:
+            target = "(SELECT run_id FROM jobs WHERE state = ? ORDER BY created LIMIT 1)"
+            params: tuple = (QUEUED,)
+        else:
+            target = "? AND state = ?"
+            params = (run_id, QUEUED)
+        with self._lock:
+            row = self._conn.execute(
+                f"UPDATE jobs SET state = ?, started = ?, owner_pid = ?, "
+                f"attempts = attempts + 1, done = 0, error = NULL "
+                f"WHERE run_id = {target} RETURNING {_COLUMNS}",
+                (RUNNING, time.time(), os.getpid(), *params),
+            ).fetchone()
+        return Job.from_row(row) if row else None
+
+    def progress(self, run_id: str, done: int, total: int | None = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET done = ?, total = COALESCE(?, total) WHERE run_id = ?",
+                (done, total, run_id),
+            )
+
+    def finish(self, run_id: str, report: str | None = None) -> None:
+        self._close(run_id, DONE, report=report)
+
+    def fail(self, run_id: str, error: str) -> None:
+        self._close(run_id, FAILED, error=error)
+
+    def _close(self, run_id: str, state: str, **columns: Any) -> None:
+        sets = ", ".join(f"{k} = ?" for k in columns)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET state = ?, finished = ?, {sets} WHERE run_id = ?",
+                (state, time.time(), *columns.values(), run_id),
+            )
+
+    def recover(self) -> int:
+        """
+        Requeue jobs left ``running`` by a dead process (or fail them after
+        ``max_attempts``). Returns the number of jobs requeued.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_id, owner_pid, attempts FROM jobs WHERE state = ?",
+                (RUNNING,),
+            ).fetchall()
+            requeued = 0
+            for run_id, pid, attempts in rows:
+                if pid != os.getpid() and _pid_alive(pid):
+                    continue  # still being worked on by another API process
+                if attempts >= self.max_attempts:
+                    self._conn.execute(
+                        "UPDATE jobs SET state = ?, finished = ?, error = ? "
+                        "WHERE run_id = ?",
+                        (FAILED, time.time(), "interrupted too many times", run_id),
+                    )
+                    continue
+                self._conn.execute(
+                    "UPDATE jobs SET state = ?, owner_pid = NULL WHERE run_id = ?",
+                    (QUEUED, run_id),
+                )
+                requeued += 1
+        if requeued:
+            log.warning("Requeued %d job(s) interrupted by a restart", requeued)
+        return requeued
+
+    # Reads --------------------------------------------------------
+
+    def queued(self) -> list[tuple[str, str]]:
+        """``(run_id, client)`` of every queued job, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT run_id, client FROM jobs WHERE state = ? ORDER BY created",
+                (QUEUED,),
+            ).fetchall()
+
+    def get(self, run_id: str) -> Job | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        return Job.from_row(row) if row else None
+
+    def list_jobs(self, state: str | None = None, limit: int = 50) -> list[Job]:
+        query = f"SELECT {_COLUMNS} FROM jobs"
+        params: tuple = ()
+        if state:
+            query += " WHERE state = ?"
+            params = (state,)
+        query += " ORDER BY created DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (*params, limit)).fetchall()
+        return [Job.from_row(r) for r in rows]
+
+    def counts(self) -> dict[str, int]:
+        """Number of jobs per state (backlog visibility)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM jobs GROUP BY state"
+            ).fetchall()
+        return {s: 0 for s in STATES} | dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobRunner:
+    """
+    Threads that execute queued jobs once the scheduler grants them a slot.
+
+    Parameters
+    ----------
+    store     : the :class:`JobStore` jobs are persisted in
+    handlers  : job kind -> ``fn(job) -> report path | None``
+    scheduler : decides which client's job runs next; one runner thread
+                per scheduler slot
+    poll_s    : how often idle runners check for shutdown
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handlers: dict[str, Callable[[Job], Any]],
+        scheduler: FairScheduler,
+        poll_s: float = 1.0,
+    ) -> None:
+        self.store = store
+        self.handlers = handlers
+        self.scheduler = scheduler
+        self.threads = scheduler.capacity
+        self.poll_s = poll_s
+
+        self._submit_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        # Non-persisted extras, keyed by run_id (lost on restart, by design)
+        self._results: dict[str, Any] = {}
+        self._callbacks: dict[str, Callable[[Job], None]] = {}
+        self._extras_lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self.store.recover()
+        for run_id, client in self.store.queued():  # backlog of a previous run
+            self.scheduler.submit(client, run_id, force=True)
+        self._stop.clear()
+        for i in range(self.threads):
+            t = threading.Thread(target=self._loop, name=f"job-runner-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        log.info("Started %d job runner thread(s)", self.threads)
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def submit(
+        self,
+        run_id: str,
+        kind: str,
+        payload: dict[str, Any],
+        client: str = "",
+        results: Iterable | None = None,
+        on_finish: Callable[[Job], None] | None = None,
+        force: bool = False,
+    ) -> Job:
+        """
+        Enqueue a job for *client*. *results* (precomputed detections) and
+        *on_finish* live in memory only; after a restart the job runs
+        without them. *force* skips the client's queue limit.
+
+        Raises
+        ------
+        QueueFull
+            *client* already has the maximum number of jobs waiting.
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        with self._submit_lock:
+            if not force:
+                self.scheduler.check(client)
+            with self._extras_lock:
+                if results is not None:
+                    self._results[run_id] = results
+                if on_finish is not None:
+                    self._callbacks[run_id] = on_finish
+            try:
+                job = self.store.enqueue(run_id, kind, payload, client)
+            except Exception:
+                with self._extras_lock:
+                    self._results.pop(run_id, None)
+                    self._callbacks.pop(run_id, None)
+                raise
+            self.scheduler.submit(client, run_id, force=True)  # checked above
+        return job
+
+    # Worker loop --------------------------------------------------
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            granted = self.scheduler.next(self.poll_s)
+            if granted is None:
+                continue
+            client, run_id = granted
+            try:
+                job = self.store.claim(run_id)
+                if job is not None:  # else claimed by another API process
+                    self._execute(job)
+            finally:
+                self.scheduler.done(client)
+
+    def _execute(self, job: Job) -> None:
+        with self._extras_lock:
+            job.results = self._results.pop(job.run_id, None)
+            callback = self._callbacks.pop(job.run_id, None)
+
+        log.info("run_id=%s job %s started (attempt %d)", job.run_id, job.kind, job.attempts)
+        try:
+            report = self.handlers[job.kind](job)
+        except Exception as e:
+            log.exception("run_id=%s job %s failed", job.run_id, job.kind)
+            self.store.fail(job.run_id, f"{type(e).__name__}: {e}")
+        else:
+            self.store.finish(job.run_id, str(report) if report else None)
+            log.info("run_id=%s job %s done", job.run_id, job.kind)
+        finally:
+            job.results = None
+            finished = self.store.get(job.run_id)
+            events.publish(job.run_id, finished.event())
+            if callback is not None:
+                try:
+                    callback(finished)
+                except Exception:
+                    log.exception("run_id=%s on_finish callback failed", job.run_id)
+
+
+# Default handlers -------------------------------------------------
+
+
+def record_progress(run_id: str, done: int, total: int | None = None) -> None:
+    """Progress callback; module-level so it can be pickled to workers."""
+    get_store().progress(run_id, done, total)
+    events.publish(run_id, {"type": "progress", "done": done, "total": total})
+
+
+def _run_report(job: Job) -> Path:
+    """``report``: YOLO over ``src_dir`` (or precomputed results) + HTML report."""
+    from ml_object_detector.services.detector import run_yolo_and_report
+    from ml_object_detector.services.workers import run_in_worker
+
+    p = job.payload
+    progress = functools.partial(record_progress, job.run_id)
+    if job.results is not None:  # already inferred, just build the report here
+        return run_yolo_and_report(
+            Path(p["src_dir"]), p["conf"], job.run_id, results=job.results,
+            progress=progress,
+        )
+    return run_in_worker(
+        run_yolo_and_report, Path(p["src_dir"]), p["conf"], job.run_id,
+        progress=progress, artifacts=p.get("artifacts"),
+    )
+
+
+def _run_query(job: Job) -> Path:
+    """``query``: Pexels download, then YOLO + HTML report."""
+    from ml_object_detector.services.detector import download_and_report
+
+    p = job.payload
+    return download_and_report(
+        p["query_terms"], p["n"], Path(p["src_dir"]), p["conf"], job.run_id,
+        progress=functools.partial(record_progress, job.run_id),
+    )
+
+
+HANDLERS: dict[str, Callable[[Job], Any]] = {"report": _run_report, "query": _run_query}
+
+# Process-wide instances -------------------------------------------
+
+_store: JobStore | None = None
+_runner: JobRunner | None = None
+_lock = threading.Lock()
+
+
+def get_store() -> JobStore:
+    global _store
+    with _lock:
+        if _store is None:
+            _store = JobStore(DB_PATH, max_attempts=int(JOBS.get("max_attempts", 2)))
+        return _store
+
+
+def get_runner() -> JobRunner:
+    global _runner
+    store = get_store()
+    with _lock:
+        if _runner is None:
+            _runner = JobRunner(
+                store,
+                HANDLERS,
+                get_scheduler(),
+                poll_s=float(JOBS.get("poll_s", 1.0)),
+            )
+        return _runner
+
+
+def start() -> None:
+    """Recover interrupted jobs and start the runner (API start-up)."""
+    get_runner().start()
+
+
+def submit(
+    run_id: str,
+    kind: str,
+    payload: dict[str, Any],
+    client: str = "",
+    results: Iterable | None = None,
+    on_finish: Callable[[Job], None] | None = None,
+    force: bool = False,
+) -> Job:
+    """Enqueue a job on the shared runner (started on first use)."""
+    runner = get_runner()
+    runner.start()
+    return runner.submit(
+        run_id, kind, payload, client, results=results, on_finish=on_finish, force=force
+    )
+
+
+def shutdown() -> None:
+    """Stop the runner threads (API shutdown). Queued jobs stay queued."""
+    global _runner
+    with _lock:
+        runner, _runner = _runner, None
+    if runner is not None:
+        runner.stop()
+        log.info("Job runners stopped")
@@ -0,0 +1,306 @@
+"""
+ml_object_detector.services.scheduler
+-------------------------------------
+
+Admission control and fair scheduling of detection work across clients.
+
+Every piece of work (a queued job, the inline single-image inference of
+``/detect_upload``, the images of one ``/v1/detect`` request) is submitted
+under a *client* key, worth one or more *units*, and waits in that
+client's queue until the scheduler grants it a slot:
+
+* at most ``capacity`` units run at once (defaults to one batch of
+  ``batching.max_batch_size`` images per inference worker process, so
+  concurrent single-image detections can fill those batches);
+* at most ``per_client_running`` units of one client run at once;
+* at most ``per_client_queued`` units of one client wait; beyond that
+  :class:`QueueFull` is raised (the API answers 429); work of several
+  units is admitted as a whole or not at all;
+* among clients with work waiting, the one with the smallest virtual time
+  (units served / weight) goes next, i.e. weighted fair queuing, so a
+  client with many requests cannot starve the others.
+
+Work bigger than the running limits is not refused: it starts once the
+client, respectively the scheduler, has nothing else running.
+
+State of clients that have been idle for ``idle_ttl_s`` is dropped.
+
+Thread-safe: slots are granted and released from any thread (job runner
+threads, the event loop); asyncio waiters are woken with
+``call_soon_threadsafe``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Mapping
+
+from ml_object_detector.config.load_config import load_config
+
+cfg = load_config()
+log = logging.getLogger(__name__)
+
+SCHEDULER = cfg.get("scheduler") or {}
+
+
+class QueueFull(Exception):
+    """The client already has ``per_client_queued`` units waiting."""
+
+
+@dataclass
+class _Client:
+    weight: float = 1.0
+    vtime: float = 0.0  # units served / weight
+    running: int = 0
+    queue: deque = field(default_factory=deque)  # (item, units)
+    queued: int = 0  # units in queue
+    last_seen: float = field(default_factory=time.monotonic)
+
+
+class _Ticket:
+    """Inline work waiting on an event loop for its slot."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.future: asyncio.Future = self.loop.create_future()
+
+    def grant(self) -> None:
+        def _set() -> None:
+            if not self.future.done():
+                self.future.set_result(None)
+
+        self.loop.call_soon_threadsafe(_set)
+
+
+class FairScheduler:
+    """
+    Parameters
+    ----------
+    capacity           : units running at once over all clients
+    per_client_running : units running at once for one client
+    per_client_queued  : units waiting per client before QueueFull
+    weights            : client key -> weight (default 1.0)
+    idle_ttl_s         : forget clients idle for this long
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1,
+        per_client_running: int = 1,
+        per_client_queued: int = 4,
+        weights: Mapping[str, float] | None = None,
+        idle_ttl_s: float = 600.0,
+    ) -> None:
+        if capacity < 1 or per_client_running < 1 or per_client_queued < 0:
+            raise ValueError("capacity/per_client_running must be >= 1, per_client_queued >= 0")
+        self.capacity = int(capacity)
+        self.per_client_running = int(per_client_running)
+        self.per_client_queued = int(per_client_queued)
+        self.weights = dict(weights or {})
+        self.idle_ttl_s = float(idle_ttl_s)
+
+        self._cond = threading.Condition()
+        self._clients: dict[str, _Client] = {}
+        self._ready: deque[tuple[str, Any]] = deque()  # granted, not yet picked up
+        self._running = 0
+        self._vclock = 0.0  # virtual time of the last granted unit
+        self._granted = 0
+        self._rejected = 0
+
+    # Submitting ---------------------------------------------------
+
+    def check(self, client: str, units: int = 1) -> None:
+        """Raise :class:`QueueFull` if *client* could not submit *units* units right now."""
+        with self._cond:
+            state = self._clients.get(client) or _Client()
+            if self._room(state) < units:
+                self._rejected += 1
+                raise QueueFull(client)
+
+    def submit(self, client: str, item: Any, force: bool = False, units: int = 1) -> None:
+        """
+        Queue *item*, worth *units* units, for *client*; it is handed out by
+        :meth:`next`. *force* skips the per-client queue limit (already
+        admitted work).
+        """
+        with self._cond:
+            state = self._clients.get(client)
+            if state is None:
+                state = self._clients[client] = _Client(
+                    weight=float(self.weights.get(client, 1.0))
+                )
+            if not force and self._room(state) < units:
+                self._rejected += 1
+                raise QueueFull(client)
+            if not state.queue and not state.running:
+                # returning client: no credit for the time it was away
+                state.vtime = max(state.vtime, self._vclock)
+            state.queue.append((item, units))
+            state.queued += units
+            state.last_seen = time.monotonic()
+            self._dispatch()
+            self._evict_idle()
+
+    def cancel(self, client: str, item: Any) -> bool:
+        """Drop a still-queued *item*. False if it was already granted."""
+        with self._cond:
+            state = self._clients.get(client)
+            for entry in state.queue if state is not None else ():
+                if entry[0] is item:
+                    state.queue.remove(entry)
+                    state.queued -= entry[1]
+                    return True
+            return False
+
+    # Running ------------------------------------------------------
+
+    def next(self, timeout: float | None = None) -> tuple[str, Any] | None:
+        """Block until a granted ``(client, item)`` is available, or timeout."""
+        with self._cond:
+            if not self._ready:
+                self._cond.wait(timeout)
+            return self._ready.popleft() if self._ready else None
+
+    def done(self, client: str, units: int = 1) -> None:
+        """Release the slot of finished work of *client*, worth *units* units."""
+        with self._cond:
+            state = self._clients.get(client)
+            if state is not None and state.running > 0:
+                state.running = max(0, state.running - units)
+                state.last_seen = time.monotonic()
+            self._running = max(0, self._running - units)
+            self._dispatch()
+            self._evict_idle()
+
+    @asynccontextmanager
+    async def slot(
+        self, client: str, force: bool = False, units: int = 1
+    ) -> AsyncIterator[None]:
+        """
+        Wait (without blocking the event loop) for a slot worth *units*
+        units, hold it inside. Raises :class:`QueueFull` right away when
+        the client has no room for them; *force* as in :meth:`submit`.
+        """
+        ticket = _Ticket()
+        self.submit(client, ticket, force=force, units=units)
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if not self.cancel(client, ticket):
+                self.done(client, units)  # granted meanwhile
+            raise
+        try:
+            yield
+        finally:
+            self.done(client, units)
+
+    # Internals (called with the condition held) -------------------
+
+    def _room(self, state: _Client) -> int:
+        """Units this client could submit now: free running slots, then queue places."""
+        startable = 0
+        if not state.queue:
+            startable = max(
+                0,
+                min(self.per_client_running - state.running, self.capacity - self._running),
+            )
+        return startable + max(0, self.per_client_queued - state.queued)
+
+    @staticmethod
+    def _fits(running: int, units: int, limit: int) -> bool:
+        """*units* more fit under *limit*, or nothing else runs (oversized work)."""
+        return running == 0 or running + units <= limit
+
+    def _dispatch(self) -> None:
+        while self._running < self.capacity:
+            eligible = [
+                (s.vtime, key)
+                for key, s in self._clients.items()
+                if s.queue and self._fits(s.running, s.queue[0][1], self.per_client_running)
+            ]
+            if not eligible:
+                return
+            _, key = min(eligible)
+            state = self._clients[key]
+            item, units = state.queue[0]
+            if not self._fits(self._running, units, self.capacity):
+                return  # wait for room rather than let smaller work overtake
+            state.queue.popleft()
+            state.queued -= units
+            state.running += units
+            self._running += units
+            self._vclock = state.vtime
+            state.vtime += units / state.weight
+            self._granted += 1
+
+            if isinstance(item, _Ticket):
+                item.grant()
+            else:
+                self._ready.append((key, item))
+                self._cond.notify()
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl_s
+        idle = [
+            key
+            for key, s in self._clients.items()
+            if not s.queue and not s.running and s.last_seen < cutoff
+        ]
+        for key in idle:
+            del self._clients[key]
+        if idle:
+            log.debug("Scheduler dropped %d idle client(s)", len(idle))
+
+    # Observability ------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "running": self._running,
+                "queued": sum(s.queued for s in self._clients.values()),
+                "clients": len(self._clients),
+                "granted": self._granted,
+                "rejected": self._rejected,
+            }
+
+
+# Process-wide instance --------------------------------------------
+
+_scheduler: FairScheduler | None = None
+_lock = threading.Lock()
+
+
+def default_capacity() -> int:
+    """
+    ``scheduler.capacity``, else ``workers.processes * batching.max_batch_size``:
+    each worker runs a whole batch of images at once, so as many images may
+    be in flight (one per worker when batching is off).
+    """
+    configured = SCHEDULER.get("capacity")
+    if configured:
+        return int(configured)
+    processes = max(1, int((cfg.get("workers") or {}).get("processes", 0)))
+    batching = cfg.get("batching") or {}
+    batch = int(batching.get("max_batch_size", 1)) if batching.get("enabled", False) else 1
+    return processes * max(1, batch)
+
+
+def get_scheduler() -> FairScheduler:
+    global _scheduler
+    with _lock:
+        if _scheduler is None:
+            _scheduler = FairScheduler(
+                capacity=default_capacity(),
+                per_client_running=int(SCHEDULER.get("per_client_running", 1)),
+                per_client_queued=int(SCHEDULER.get("per_client_queued", 4)),
+                weights=SCHEDULER.get("weights") or {},
+                idle_ttl_s=float(SCHEDULER.get("idle_ttl_s", 600)),
+            )
+        return _scheduler
@@ -0,0 +1,174 @@
+"""
+ml_object_detector.services.thumbnails
+--------------------------------------
+
+Downscaled previews of the annotated images under ``/processed``, made on
+first request and kept in a size-bounded disk cache.
+
+A thumbnail's key hashes the source's path, size and mtime together with
+the rendering parameters, so a rewritten source never serves a stale
+preview and the key doubles as a strong ETag. Reading a thumbnail bumps
+its mtime; when the cache grows past ``thumbnails.max_mb``, the least
+recently used files are removed until it is back under 90 % of the bound.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from ml_object_detector.config.load_config import load_config
+
+cfg = load_config()
+log = logging.getLogger(__name__)
+
+THUMBNAILS = cfg.get("thumbnails") or {}
+ROOT = Path(cfg["ROOT"])
+SIZES = tuple(int(s) for s in THUMBNAILS.get("sizes", [160, 480]))  # longest side, px
+MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+class ThumbnailCache:
+    """
+    Parameters
+    ----------
+    cache_dir : where thumbnails are stored
+    max_bytes : size bound of *cache_dir*
+    fmt       : ``webp`` | ``jpeg``
+    quality   : encoder quality, 1-100
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        max_bytes: int = 256 * 1024 * 1024,
+        fmt: str = "webp",
+        quality: int = 80,
+    ) -> None:
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"Thumbnail format must be one of {list(MEDIA_TYPES)}")
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.fmt = fmt
+        self.quality = int(quality)
+        self.media_type = MEDIA_TYPES[fmt]
+
+        self._lock = threading.Lock()
+        self._bytes = sum(p.stat().st_size for p in self._files())
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    # Keys ---------------------------------------------------------
+
+    def key(self, src: Path, size: int) -> str:
+        """ETag-grade key of the thumbnail of *src* (stat only, no decode)."""
+        st = Path(src).stat()
+        raw = f"{Path(src).resolve()}|{st.st_size}|{st.st_mtime_ns}|{size}|{self.fmt}|{self.quality}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.{self.fmt}"
+
+    # Lookups ------------------------------------------------------
+
+    def get(self, src: Path, size: int, key: str | None = None) -> Path:
+        """Path of the thumbnail of *src*, rendered now if not cached (blocking)."""
+        key = key or self.key(src, size)
+        path = self.path_for(key)
+        if path.exists():
+            os.utime(path)  # LRU clock
+            with self._lock:
+                self.hits += 1
+            return path
+
+        self._render(Path(src), size, path)
+        with self._lock:
+            self.misses += 1
+            self._bytes += path.stat().st_size
+            over = self._bytes > self.max_bytes
+        if over:
+            self._evict()
+        return path
+
+    def _render(self, src: Path, size: int, dest: Path) -> None:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        with Image.open(src) as img:
+            img.draft("RGB", (size, size))  # JPEG: decode at 1/2..1/8 scale
+            img = ImageOps.exif_transpose(img.convert("RGB"))
+            img.thumbnail((size, size))
+            fd, tmp = tempfile.mkstemp(dir=dest.parent, suffix=f".{self.fmt}")
+            os.close(fd)
+            try:
+                img.save(tmp, format=self.fmt.upper(), quality=self.quality)
+                os.replace(tmp, dest)  # concurrent renders of one key are harmless
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+
+    # Eviction -----------------------------------------------------
+
+    def _files(self) -> list[Path]:
+        return [p for p in self.cache_dir.glob(f"*/*.{self.fmt}") if p.is_file()]
+
+    def _evict(self) -> None:
+        target = int(self.max_bytes * 0.9)
+        entries = []
+        for p in self._files():
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()  # least recently used first
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in entries:
+            if total <= target:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        with self._lock:
+            self._bytes = total
+            self.evicted += removed
+        log.debug("Thumbnail cache evicted %d file(s)", removed)
+
+    # Observability ------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted": self.evicted,
+            }
+
+
+# Process-wide instance --------------------------------------------
+
+_cache: ThumbnailCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_thumbnails() -> ThumbnailCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache(
+                ROOT / THUMBNAILS.get("dir", "data/cache/thumbnails"),
+                max_bytes=int(float(THUMBNAILS.get("max_mb", 256)) * 1024 * 1024),
+                fmt=THUMBNAILS.get("format", "webp"),
+                quality=int(THUMBNAILS.get("quality", 80)),
+            )
+        return _cache
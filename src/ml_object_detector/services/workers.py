@@ -0,0 +1,211 @@
+"""
+ml_object_detector.services.workers
+-----------------------------------
+
+Pool of inference worker processes.
+
+Each worker is a separate (``spawn``-ed) Python process that imports
+:mod:`ml_object_detector.services.detector` once at start-up, i.e. loads
+its own YOLO model, and then executes jobs submitted from the API. Heavy
+inference therefore never competes with request handling for the API
+process' GIL, and no model instance is shared between threads.
+
+Progress events published inside a worker
+(:func:`ml_object_detector.services.events.publish`) travel back over a
+``multiprocessing`` queue and are relayed to the API process' event hub.
+The same queue carries each worker's cache/artifact counters
+(:func:`report_stats`), which ``/metrics`` adds up (:func:`worker_stats`).
+
+``workers.processes: 0`` in ``config.yaml`` disables the pool; jobs then
+run in the calling process (threadpool), which is handy for tests/dev.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from ml_object_detector.config.load_config import load_config, watch_config
+from ml_object_detector.models.backends import resolve_weights
+from ml_object_detector.services import events
+
+cfg = load_config()
+log = logging.getLogger(__name__)
+
+WORKERS = cfg.get("workers") or {}
+INFERENCE = cfg.get("inference") or {}
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_events_queue: Any = None  # multiprocessing queue, worker -> API process
+_relay: threading.Thread | None = None
+_report: Callable[[tuple[str, dict]], None] | None = None  # worker side, set at init
+
+STATS = "__worker_stats__"  # queue channel of worker counters
+_stats_lock = threading.Lock()
+_stats: dict[int, dict] = {}  # pid -> last counters reported (API side)
+
+
+def pool_size() -> int:
+    """Configured number of worker processes (0 = run in this process)."""
+    return int(WORKERS.get("processes", 0))
+
+
+def _worker_threads(processes: int) -> int:
+    """Intra-op threads per worker so N workers don't oversubscribe the CPU."""
+    configured = WORKERS.get("threads_per_worker")
+    if configured:
+        return int(configured)
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+
+def _init_worker(threads: int, events_queue: Any = None) -> None:
+    """Pool initializer: pin torch threads and load the model once."""
+    import torch
+
+    torch.set_num_threads(threads)
+    global _report
+    if events_queue is not None:
+        events.forward_to(events_queue.put)
+        _report = events_queue.put
+    from ml_object_detector.services import detector
+
+    detector.warmup()  # load YOLO once, before the first job
+    report_stats(detector.model_stats())
+    watch_config()  # each worker follows config.yaml changes on its own
+
+    log.info("Inference worker pid=%d ready (%d threads)", os.getpid(), threads)
+
+
+def _relay_events(queue: Any) -> None:
+    """Parent side: publish worker events on the in-memory hub."""
+    while True:
+        item = queue.get()
+        if item is None:  # shutdown sentinel
+            return
+        channel, payload = item
+        if channel == STATS:
+            with _stats_lock:
+                _stats[payload["pid"]] = payload["stats"]
+            continue
+        events.hub.publish(channel, payload)
+
+
+def report_stats(stats: dict) -> None:
+    """Worker side: send this process' counters to the API process (no-op elsewhere)."""
+    if _report is None or not stats:
+        return
+    try:
+        _report((STATS, {"pid": os.getpid(), "stats": stats}))
+    except Exception as e:  # metrics must never fail a detection
+        log.debug("Could not report worker stats: %s", e)
+
+
+def worker_stats() -> dict[int, dict]:
+    """API side: last counters reported by each worker process, by pid."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def get_pool() -> ProcessPoolExecutor | None:
+    """The shared pool, created on first use; None when disabled."""
+    global _pool, _events_queue, _relay
+    processes = pool_size()
+    if processes <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _export_weights()
+            threads = _worker_threads(processes)
+            ctx = mp.get_context("spawn")  # fork + torch threads can deadlock
+            _events_queue = ctx.Queue()
+            _relay = threading.Thread(
+                target=_relay_events, args=(_events_queue,), name="event-relay", daemon=True
+            )
+            _relay.start()
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(threads, _events_queue),
+            )
+            log.info("Started %d inference worker process(es)", processes)
+        return _pool
+
+
+def _export_weights() -> None:
+    """Export the configured backend here, once, instead of racing in every worker."""
+    backend = INFERENCE.get("backend", "torch")
+    if backend != "torch":
+        model_path = cfg["ROOT"] / cfg["model_dir"] / cfg["model_name"]
+        resolve_weights(model_path, backend, int(cfg.get("imgsz", 640)))
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def warmup() -> None:
+    """
+    Blocking: load the model(s) now instead of on the first request. Starts
+    every worker process (each warms its model in the initializer), or
+    warms this process' model when the pool is disabled.
+    """
+    pool = get_pool()
+    if pool is None:
+        from ml_object_detector.services import detector
+
+        detector.warmup()
+        return
+    # one submission per idle slot spawns one process each
+    processes = pool_size()
+    pids = {f.result() for f in [pool.submit(_ready) for _ in range(processes)]}
+    log.info("%d inference worker(s) warmed up", len(pids))
+
+
+def run_in_worker(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Blocking: run ``fn(*args, **kwargs)`` in a worker process and return
+    its result. *fn* must be a module-level function and its arguments and
+    result must be picklable.
+    """
+    pool = get_pool()
+    if pool is None:
+        return fn(*args, **kwargs)
+    return pool.submit(fn, *args, **kwargs).result()
+
+
+async def run_in_worker_async(
+    fn: Callable[..., Any], *args: Any, **kwargs: Any
+) -> Any:
+    """Awaitable twin of :func:`run_in_worker` that keeps the event loop free."""
+    pool = get_pool()
+    if pool is None:
+        return await run_in_threadpool(fn, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+
+def shutdown(wait: bool = True) -> None:
+    """Stop the worker processes (called on API shutdown)."""
+    global _pool, _events_queue, _relay
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
+            log.info("Inference workers stopped")
+        if _events_queue is not None:
+            _events_queue.put(None)
+            _relay.join(timeout=5)
+            _events_queue = _relay = None
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,144 @@
+"""Unit tests for postprocess.analysis and domain.detections"""
+
+import numpy as np
+import pytest
+import torch
+from ultralytics.engine.results import Results
+
+from ml_object_detector.domain.detections import ImageDetections
+from ml_object_detector.postprocess.analysis import (
+    aggregate,
+    build_summaries,
+    build_table,
+    summarise_predictions,
+)
+
+NAMES = {0: "person", 1: "surfboard"}
+
+# Helpers ---------------
+
+
+def _fake_result(path: str, rows: list[list[float]]) -> Results:
+    """Real ultralytics Results over a blank image; rows are x1,y1,x2,y2,conf,cls."""
+    boxes = torch.tensor(rows, dtype=torch.float32).reshape(-1, 6)
+    return Results(
+        orig_img=np.zeros((48, 64, 3), dtype=np.uint8),
+        path=path,
+        names=NAMES,
+        boxes=boxes,
+    )
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_detections_drop_image_and_keep_boxes():
+    res = _fake_result("beach_01.png", [[1, 2, 10, 20, 0.9, 1], [0, 0, 5, 5, 0.3, 0]])
+
+    det = ImageDetections.from_result(res)
+
+    assert len(det) == 2
+    assert det.cls.tolist() == [1, 0]
+    assert det.xyxy.shape == (2, 4)
+    assert det.orig_shape == (48, 64)
+    assert not hasattr(det, "orig_img")
+
+
+@pytest.mark.unit
+def test_build_summaries_accepts_results_and_records_stream():
+    """Results and ImageDetections give identical rows, even from a generator."""
+    raw = [
+        _fake_result("beach_01.png", [[1, 2, 10, 20, 0.9, 1], [0, 0, 5, 5, 0.3, 0]]),
+        _fake_result("empty.jpg", []),
+    ]
+
+    from_results = build_summaries(raw, conf_threshold=0.5, run_id="run1")
+    from_stream = build_summaries(
+        (ImageDetections.from_result(r) for r in raw), conf_threshold=0.5, run_id="run1"
+    )
+
+    assert from_results == from_stream
+    assert from_results == [
+        {"image": "run1/beach_01.jpg", "object": "surfboard", "conf": pytest.approx(0.9)}
+    ]
+
+
+@pytest.mark.unit
+def test_log_lines_from_a_stream_or_its_table():
+    """A table built from a one-shot stream gives the same lines as the results."""
+    raw = [_fake_result("beach_01.png", [[1, 2, 10, 20, 0.9, 1]])]
+    table = build_table((ImageDetections.from_result(r) for r in raw), conf_threshold=0.5)
+
+    lines = summarise_predictions(table, conf_threshold=0.5)
+
+    assert lines == summarise_predictions(raw, conf_threshold=0.5)
+    assert lines == [
+        "Image beach_01.jpg has been identified with surfboard with the 90.0% level of confidence."
+    ]
+
+
+@pytest.mark.unit
+def test_detection_records_are_plain_python():
+    res = _fake_result("beach_01.png", [[1.234, 2, 10, 20.5678, 0.91234, 1]])
+
+    (record,) = ImageDetections.from_result(res).to_records()
+
+    assert record == {
+        "class_id": 1,
+        "label": "surfboard",
+        "score": 0.9123,
+        "box": [1.23, 2.0, 10.0, 20.57],
+    }
+    assert all(type(v) in (int, float) for v in record["box"] + [record["score"]])
+
+
+@pytest.mark.unit
+def test_table_columns_and_lazy_rows():
+    raw = [
+        _fake_result("beach_01.png", [[1, 2, 10, 20, 0.9, 1], [0, 0, 5, 5, 0.3, 0]]),
+        _fake_result("empty.jpg", []),
+        _fake_result("crowd.jpg", [[0, 0, 4, 4, 0.6, 0], [4, 4, 8, 8, 0.7, 0]]),
+    ]
+
+    table = build_table(raw, conf_threshold=0.5)
+
+    assert table.n_images == 3 and len(table) == 3
+    assert table.image.tolist() == [0, 2, 2]
+    assert table.cls.tolist() == [1, 0, 0]
+    assert table.xyxy.shape == (3, 4) and table.xyxy[2].tolist() == [4, 4, 8, 8]
+
+    rows = table.rows("run1")
+    assert len(rows) == 3 and rows
+    assert rows[-1] == {"image": "run1/crowd.jpg", "object": "person", "conf": pytest.approx(0.7)}
+    assert list(rows) == rows[:] == build_summaries(raw, 0.5, "run1")
+
+
+@pytest.mark.unit
+def test_empty_table_is_falsy():
+    table = build_table([_fake_result("empty.jpg", [])], conf_threshold=0.5)
+
+    assert len(table) == 0 and table.n_images == 1
+    assert not table.rows() and list(table.rows()) == []
+    assert table.xyxy.shape == (0, 4)
+
+
+@pytest.mark.unit
+def test_aggregate_table_view_matches_plain_rows():
+    raw = [
+        _fake_result("a.png", [[0, 0, 1, 1, 0.95, 0], [0, 0, 1, 1, 0.55, 1], [0, 0, 1, 1, 0.65, 0]]),
+        _fake_result("b.png", [[0, 0, 1, 1, 0.75, 0]]),
+        _fake_result("c.png", []),
+    ]
+    view = build_table(raw, conf_threshold=0.5).rows()
+
+    overview = aggregate(view, bins=5)
+
+    assert overview["total"] == 4
+    assert overview["images"] == 3 and overview["empty_images"] == 1
+    assert overview["classes"] == [("person", 3), ("surfboard", 1)]
+    assert overview["top_images"] == [("a.jpg", 3), ("b.jpg", 1)]
+    assert [n for _, _, n in overview["histogram"]] == [0, 0, 1, 2, 1]
+    # same numbers from a plain list (only the image total is unknown)
+    plain = aggregate(list(view), n_images=3, bins=5)
+    assert plain == overview
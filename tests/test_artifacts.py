@@ -0,0 +1,102 @@
+"""Unit tests for models.artifacts (opt-in outputs + background writer)"""
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from ml_object_detector.models.artifacts import (
+    ANNOTATED,
+    LABELS,
+    ArtifactWriter,
+    parse_artifacts,
+)
+
+# Helpers ---------------
+
+
+class FakeResult:
+    """Stands in for ultralytics Results: records where it was saved."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        self.gate = gate
+        self.saved: list[str] = []
+
+    def save(self, filename):
+        if self.gate is not None:
+            self.gate.wait(5)
+        Path(filename).write_bytes(b"jpeg")
+        self.saved.append(filename)
+
+    def save_txt(self, txt_file, save_conf=False):
+        assert save_conf
+        Path(txt_file).write_text("0 0.5 0.5 0.1 0.1 0.9\n")
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("json", set()),
+        ("annotated", {ANNOTATED}),
+        (" Labels , json ", {LABELS}),
+        (["annotated", "labels"], {ANNOTATED, LABELS}),
+        (None, {ANNOTATED, LABELS}),  # config default
+    ],
+)
+def test_parse_artifacts(value, expected):
+    assert parse_artifacts(value) == expected
+
+
+@pytest.mark.unit
+def test_parse_artifacts_rejects_unknown_kind():
+    with pytest.raises(ValueError, match="thumbnail"):
+        parse_artifacts("annotated,thumbnail")
+
+
+@pytest.mark.unit
+def test_writer_writes_requested_files_only(tmp_path):
+    writer = ArtifactWriter(threads=2)
+    try:
+        res = FakeResult()
+        pending = writer.submit(res, tmp_path, "img1", {LABELS})
+        assert list(pending) == [LABELS]
+        assert pending[LABELS].result() == tmp_path / "labels" / "img1.txt"
+
+        pending = writer.submit(res, tmp_path, "img1", {ANNOTATED, "json"})
+        assert pending[ANNOTATED].result() == tmp_path / "img1.jpg"
+    finally:
+        writer.close()
+
+    # the JPEG is rendered under a temp name and renamed into place
+    assert Path(res.saved[0]).name == ".img1.tmp.jpg"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["img1.jpg", "labels"]
+    assert writer.stats() == {"pending": 0, "written": 2, "failed": 0}
+
+
+@pytest.mark.unit
+def test_writer_blocks_submitters_when_behind(tmp_path):
+    gate = threading.Event()
+    writer = ArtifactWriter(threads=1, max_pending=1)
+    try:
+        writer.submit(FakeResult(gate), tmp_path, "a", {ANNOTATED})
+
+        submitted = threading.Event()
+        second = threading.Thread(
+            target=lambda: (
+                writer.submit(FakeResult(), tmp_path, "b", {ANNOTATED}),
+                submitted.set(),
+            )
+        )
+        second.start()
+        assert not submitted.wait(0.1)  # waits for a free slot
+
+        gate.set()
+        assert submitted.wait(5)
+        second.join()
+    finally:
+        writer.close()
+    assert (tmp_path / "a.jpg").exists() and (tmp_path / "b.jpg").exists()
@@ -0,0 +1,88 @@
+"""Unit tests for models.backends (export is mocked, no real model)"""
+
+import pytest
+
+from ml_object_detector.models import backends
+
+
+class FakeYOLO:
+    """Stands in for ultralytics.YOLO; export() writes a dummy artifact."""
+
+    exports = 0
+
+    def __init__(self, weights):
+        self.weights = weights
+
+    def export(self, format, imgsz, dynamic):
+        FakeYOLO.exports += 1
+        out = self.weights.with_suffix(".onnx")
+        out.write_bytes(b"onnx")
+        return str(out)
+
+
+@pytest.fixture
+def weights(tmp_path, monkeypatch):
+    monkeypatch.setattr("ultralytics.YOLO", FakeYOLO)
+    FakeYOLO.exports = 0
+    pt = tmp_path / "yolov8n.pt"
+    pt.write_bytes(b"weights")
+    return pt
+
+
+@pytest.mark.unit
+def test_torch_uses_weights_as_is(weights):
+    assert backends.resolve_weights(weights, "torch") == weights
+    assert FakeYOLO.exports == 0
+
+
+@pytest.mark.unit
+def test_export_happens_once_and_is_cached(weights):
+    first = backends.resolve_weights(weights, "onnx", imgsz=640)
+    second = backends.resolve_weights(weights, "onnx", imgsz=640)
+
+    assert first == second == weights.parent / "exports" / "yolov8n_640.onnx"
+    assert first.read_bytes() == b"onnx"
+    assert FakeYOLO.exports == 1
+
+
+@pytest.mark.unit
+def test_artifact_names_per_backend(weights):
+    assert backends.artifact_path(weights, "openvino", 320).name == (
+        "yolov8n_320_openvino_model"
+    )
+    with pytest.raises(ValueError, match="Unknown inference backend"):
+        backends.resolve_weights(weights, "tensorrt")
+
+
+@pytest.mark.unit
+def test_export_leaves_only_the_artifact(weights):
+    target = backends.resolve_weights(weights, "onnx")
+
+    assert not weights.with_suffix(".onnx").exists()  # exported on a private copy
+    assert [p.name for p in target.parent.iterdir()] == [target.name]
+
+
+@pytest.mark.unit
+def test_onnx_session_rebuilt_with_thread_count(tmp_path, monkeypatch):
+    import sys
+    import types
+
+    class FakeSession:
+        def __init__(self, path, options=None, providers=None):
+            self.path, self.options, self.providers = path, options, providers
+
+        def get_providers(self):
+            return self.providers
+
+    ort = types.SimpleNamespace(SessionOptions=types.SimpleNamespace, InferenceSession=FakeSession)
+    monkeypatch.setitem(sys.modules, "onnxruntime", ort)
+    runtime = types.SimpleNamespace(session=FakeSession("old", providers=["CPUExecutionProvider"]))
+    model = types.SimpleNamespace(
+        predictor=types.SimpleNamespace(model=types.SimpleNamespace(backend=runtime))
+    )
+
+    assert backends.configure_session(model, "onnx", tmp_path / "m.onnx", 3)
+    assert runtime.session.path == str(tmp_path / "m.onnx")
+    assert runtime.session.options.intra_op_num_threads == 3
+    assert runtime.session.providers == ["CPUExecutionProvider"]
+    assert not backends.configure_session(types.SimpleNamespace(), "onnx", "m.onnx", 3)
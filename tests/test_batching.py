@@ -0,0 +1,180 @@
+"""Unit tests for models.batching.MicroBatcher"""
+
+import threading
+
+import pytest
+
+from ml_object_detector.models.batching import MicroBatcher
+
+
+# Helpers ---------------
+
+
+class RecordingRunner:
+    """run_batch stand-in that remembers every batch it received."""
+
+    def __init__(self):
+        self.batches: list[list[int]] = []
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        return [i * 10 for i in items]
+
+
+def _submit_concurrently(batcher: MicroBatcher, items: list[int]) -> list[int]:
+    barrier = threading.Barrier(len(items))
+    results: dict[int, int] = {}
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.submit(i).result(timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in items]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [results[i] for i in items]
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_concurrent_callers_share_batches():
+    """Items submitted together are run in fewer calls than items."""
+    runner = RecordingRunner()
+    batcher = MicroBatcher(runner, max_batch_size=4, max_wait_ms=200)
+
+    out = _submit_concurrently(batcher, list(range(8)))
+    batcher.close()
+
+    assert out == [i * 10 for i in range(8)]
+    assert all(len(b) <= 4 for b in runner.batches)
+    assert len(runner.batches) < 8
+
+    stats = batcher.stats()
+    assert stats["items"] == 8
+    assert sum(size * n for size, n in stats["batch_sizes"].items()) == 8
+    assert stats["queue_wait_ms"]["max"] >= stats["queue_wait_ms"]["avg"] >= 0
+
+
+@pytest.mark.unit
+def test_errors_reach_every_caller():
+    """A failing batch must fail each waiting future, not hang them."""
+
+    def boom(items):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher(boom, max_batch_size=2, max_wait_ms=0)
+
+    with pytest.raises(ValueError, match="exploded"):
+        batcher.submit(1).result(timeout=5)
+    batcher.close()
+
+
+@pytest.mark.unit
+def test_batches_run_in_parallel_up_to_max_in_flight():
+    """Two slots: two batches overlap, items arriving meanwhile are grouped."""
+    running, peak = 0, 0
+    lock = threading.Lock()
+    release = threading.Event()
+    sizes: list[int] = []
+
+    def slow(items):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+            sizes.append(len(items))
+        release.wait(5)
+        with lock:
+            running -= 1
+        return items
+
+    batcher = MicroBatcher(slow, max_batch_size=8, max_wait_ms=0, max_in_flight=2)
+    first = []
+    for i in range(2):  # one batch per slot
+        first.append(batcher.submit(i))
+        for _ in range(500):
+            if len(sizes) > i:
+                break
+            threading.Event().wait(0.01)
+    queued = [batcher.submit(i) for i in range(2, 7)]
+    release.set()
+
+    assert [f.result(timeout=5) for f in first + queued] == list(range(7))
+    batcher.close()
+    assert peak == 2
+    assert sizes[2] == 5  # formed once a slot was free, not one by one
+
+
+@pytest.mark.unit
+def test_invalid_settings_rejected():
+    with pytest.raises(ValueError):
+        MicroBatcher(RecordingRunner(), max_batch_size=0)
+    with pytest.raises(ValueError):
+        MicroBatcher(RecordingRunner(), max_in_flight=0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_concurrent_detections_share_batches(monkeypatch):
+    """services.detector.detect: requests arriving together reach a worker as one batch."""
+    import asyncio
+
+    from ml_object_detector.services import detector
+
+    sizes = []
+
+    def fake_run_batch(requests):
+        sizes.append(len(requests))
+        return [r["img_path"] for r in requests]
+
+    monkeypatch.setattr(detector, "_run_batch", fake_run_batch)
+    monkeypatch.setattr(detector, "pool_size", lambda: 2)
+    monkeypatch.setattr(
+        detector, "BATCHING", {"enabled": True, "max_batch_size": 4, "max_wait_ms": 50}
+    )
+    monkeypatch.setattr(detector, "_dispatcher", None)
+    try:
+        results = await asyncio.gather(*(detector.detect(img_path=i) for i in range(8)))
+        stats = detector.batch_stats()
+    finally:
+        detector.get_dispatcher().close()
+
+    assert results == list(range(8))
+    assert max(sizes) > 1 and sum(sizes) == 8
+    assert stats["batches"] == len(sizes)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_detect_raises_the_failure_of_its_request(monkeypatch):
+    from ml_object_detector.services import detector
+
+    def fake_run_batch(requests):
+        return [ValueError("bad file") if r["img_path"] else r["img_path"] for r in requests]
+
+    monkeypatch.setattr(detector, "_run_batch", fake_run_batch)
+    monkeypatch.setattr(detector, "_dispatcher", None)
+    try:
+        assert await detector.detect(img_path=0) == 0
+        with pytest.raises(ValueError, match="bad file"):
+            await detector.detect(img_path=1)
+    finally:
+        detector.get_dispatcher().close()
+
+
+@pytest.mark.unit
+def test_exception_in_a_slot_fails_only_that_caller():
+    def run(items):
+        return [ValueError(f"bad {i}") if i == 1 else i * 10 for i in items]
+
+    batcher = MicroBatcher(run, max_batch_size=4, max_wait_ms=200)
+    futures = [batcher.submit(i) for i in range(3)]
+
+    assert futures[0].result(timeout=5) == 0 and futures[2].result(timeout=5) == 20
+    with pytest.raises(ValueError, match="bad 1"):
+        futures[1].result(timeout=5)
+    batcher.close()
@@ -0,0 +1,108 @@
+"""Unit tests for models.cache.DetectionCache"""
+
+import numpy as np
+import pytest
+
+from ml_object_detector.domain.detections import ImageDetections
+from ml_object_detector.models.cache import DetectionCache, hash_file
+
+# Helpers ---------------
+
+
+def _det(scores: list[float]) -> ImageDetections:
+    n = len(scores)
+    return ImageDetections(
+        path="raw.jpg",
+        names={0: "person", 1: "dog"},
+        cls=np.arange(n, dtype=np.int64) % 2,
+        conf=np.asarray(scores, dtype=np.float32),
+        xyxy=np.arange(n * 4, dtype=np.float32).reshape(n, 4),
+        orig_shape=(480, 640),
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = DetectionCache(tmp_path / "det.sqlite3", model_id="yolov8n.pt:abc", max_entries=2)
+    yield c
+    c.close()
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_hit_is_filtered_by_threshold(cache):
+    """Raw boxes are stored once; any threshold is served by filtering."""
+    cache.put("k1", _det([0.95, 0.5, 0.05]))
+
+    strict = cache.get("k1", conf=0.8, path="copy.jpg")
+    loose = cache.get("k1", conf=0.0)
+
+    assert strict.conf.tolist() == pytest.approx([0.95])
+    assert strict.path == "copy.jpg"
+    assert len(loose) == 3
+    assert loose.xyxy.shape == (3, 4)
+    assert loose.orig_shape == (480, 640)
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+@pytest.mark.unit
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.put("old", _det([0.9]))
+    cache.put("new", _det([0.9]))
+    cache.get("old")  # touch -> "new" becomes the LRU entry
+    cache.put("newest", _det([0.9]))
+
+    assert cache.get("new") is None
+    assert cache.get("old") is not None
+    assert cache.stats()["entries"] == 2
+
+
+@pytest.mark.unit
+def test_key_depends_on_bytes_model_and_params(tmp_path):
+    a = tmp_path / "a.jpg"
+    b = tmp_path / "b.jpg"
+    a.write_bytes(b"same bytes")
+    b.write_bytes(b"same bytes")
+
+    c1 = DetectionCache(tmp_path / "1.sqlite3", model_id="m:1")
+    c2 = DetectionCache(tmp_path / "2.sqlite3", model_id="m:2")
+    c3 = DetectionCache(tmp_path / "3.sqlite3", model_id="m:1", params={"imgsz": 320})
+
+    assert c1.key_for(a) == c1.key_for(b) == c1.key_for_digest(hash_file(a))
+    assert len({c1.key_for(a), c2.key_for(a), c3.key_for(a)}) == 3
+
+
+@pytest.mark.unit
+def test_entries_survive_reopen(tmp_path):
+    db = tmp_path / "det.sqlite3"
+    DetectionCache(db, model_id="m").put("k", _det([0.7]))
+
+    again = DetectionCache(db, model_id="m")
+    assert len(again.get("k", conf=0.5)) == 1
+
+
+@pytest.mark.unit
+def test_table_is_counted_only_when_over_the_bound(tmp_path):
+    c = DetectionCache(tmp_path / "det.sqlite3", model_id="m", max_entries=100)
+    counts = []
+    c._conn.set_trace_callback(lambda sql: counts.append(sql) if "COUNT(*)" in sql else None)
+
+    for i in range(110):
+        c.put(f"k{i}", _det([0.9]))
+
+    # one count, at the 101st put, which evicts down to 90 entries
+    assert len(counts) == 1
+    assert c.stats()["entries"] == 90 + 9
+    assert c.get("k0") is None and c.get("k109") is not None
+    c.close()
+
+
+@pytest.mark.unit
+def test_thresholds_below_the_floor_are_not_covered(tmp_path):
+    c = DetectionCache(tmp_path / "det.sqlite3", model_id="m", min_conf=0.25)
+    assert c.covers(0.25) and c.covers(0.8)
+    assert not c.covers(0.1)
+    c.close()
@@ -0,0 +1,126 @@
+"""Unit tests for config.load_config (memoised, validated, hot-reloadable)"""
+
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+
+from ml_object_detector.config import load_config as config_module
+from ml_object_detector.config.load_config import (
+    ConfigError,
+    ConfigWatcher,
+    clear_config_cache,
+    load_config,
+    on_reload,
+    reload_config,
+)
+
+# Helpers ---------------
+
+
+def write_config(path: Path, **overrides) -> Path:
+    data = yaml.safe_load(config_module._DEFAULT_CFG.read_text())
+    data.update(overrides)
+    path.write_text(yaml.safe_dump(data))
+    return path
+
+
+def bump_mtime(path: Path) -> None:
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def cfg_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_module, "_listeners", [])
+    yield write_config(tmp_path / "config.yaml")
+    clear_config_cache()
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_config_is_parsed_once(cfg_file, monkeypatch):
+    first = load_config(cfg_file)
+    monkeypatch.setattr(config_module.yaml, "safe_load", lambda f: pytest.fail("re-parsed"))
+
+    assert load_config(cfg_file) is first
+    assert first.confidence_threshold == 0.8
+    assert Path(first["output_dir"]).is_absolute()
+
+
+@pytest.mark.unit
+def test_cache_hit_touches_no_file(cfg_file, monkeypatch):
+    first = load_config(cfg_file)
+    monkeypatch.setattr(config_module, "_pick_cfg_file", lambda p: pytest.fail("path resolved"))
+    monkeypatch.setattr(Path, "stat", lambda *a, **kw: pytest.fail("file stat'ed"))
+
+    assert load_config(cfg_file) is first
+    assert load_config(str(cfg_file)) is first
+
+
+@pytest.mark.unit
+def test_config_file_env_is_a_cache_key(cfg_file, tmp_path, monkeypatch):
+    other = write_config(tmp_path / "other.yaml", confidence_threshold=0.3)
+    monkeypatch.setenv("CONFIG_FILE", str(cfg_file))
+    first = load_config()
+    monkeypatch.setenv("CONFIG_FILE", str(other))
+
+    assert load_config() is not first and load_config().confidence_threshold == 0.3
+
+
+@pytest.mark.unit
+def test_clear_cache_reads_the_file_again(cfg_file):
+    first = load_config(cfg_file)
+    write_config(cfg_file, confidence_threshold=0.5)
+    clear_config_cache()
+
+    second = load_config(cfg_file)
+    assert second is not first and second["confidence_threshold"] == 0.5
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"confidence_threshold": 1.5},
+        {"confidence_threshold": "high"},
+        {"file_inspection": {"allowed_mime": [], "hard_limit_mb": 10}},
+        {"file_inspection": {"allowed_mime": ["image/png"], "hard_limit_mb": 5, "soft_limit_mb": 8}},
+    ],
+)
+def test_invalid_values_are_rejected(tmp_path, overrides):
+    path = write_config(tmp_path / "bad.yaml", **overrides)
+    with pytest.raises(ConfigError):
+        load_config(path)
+
+
+@pytest.mark.unit
+def test_reload_updates_in_place_and_notifies(cfg_file):
+    cfg = load_config(cfg_file)
+    seen = []
+    on_reload(seen.append)
+
+    write_config(cfg_file, confidence_threshold=0.3)
+    assert reload_config(cfg_file) is cfg
+
+    assert cfg["confidence_threshold"] == 0.3
+    assert seen == [cfg]
+
+
+@pytest.mark.unit
+def test_watcher_keeps_last_good_values(cfg_file):
+    cfg = load_config(cfg_file)
+    watcher = ConfigWatcher(config_path=cfg_file)
+    assert not watcher.check()  # unchanged
+
+    write_config(cfg_file, confidence_threshold=0.4)
+    bump_mtime(cfg_file)
+    assert watcher.check() and cfg["confidence_threshold"] == 0.4
+
+    write_config(cfg_file, confidence_threshold=7)
+    bump_mtime(cfg_file)
+    assert not watcher.check()
+    assert cfg["confidence_threshold"] == 0.4
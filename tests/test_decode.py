@@ -0,0 +1,139 @@
+"""Unit tests for models.decode (reduced decode + shared-memory hand-off)"""
+
+import io
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from ml_object_detector.domain.detections import ImageDetections
+from ml_object_detector.models import decode
+from ml_object_detector.models.decode import SharedImage, decode_for_model
+
+# Helpers ---------------
+
+
+def _write_image(path, size, fmt="JPEG", exif=None):
+    img = Image.new("RGB", size, color=(255, 0, 0))  # pure red
+    kwargs = {"exif": exif} if exif is not None else {}
+    img.save(path, format=fmt, **kwargs)
+    return path
+
+
+def _detections(xyxy):
+    xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+    n = len(xyxy)
+    return ImageDetections(
+        path="x.jpg",
+        names={0: "person"},
+        cls=np.zeros(n, dtype=np.int64),
+        conf=np.full(n, 0.9, dtype=np.float32),
+        xyxy=xyxy,
+    )
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_jpeg_is_draft_decoded_near_imgsz(tmp_path):
+    path = _write_image(tmp_path / "big.jpg", (2560, 1920))
+
+    image = decode_for_model(path, imgsz=640)
+
+    assert image.orig_shape == (1920, 2560)
+    assert image.array.shape == (480, 640, 3)  # 1/4 DCT scaling
+    assert image.array.dtype == np.uint8 and image.array.flags.c_contiguous
+    # BGR like cv2.imread: red ends up in the last channel
+    b, g, r = image.array[240, 320]
+    assert r > 200 and b < 50
+    assert image.scale == (4.0, 4.0)
+
+
+@pytest.mark.unit
+def test_long_side_never_drops_below_imgsz(tmp_path):
+    path = _write_image(tmp_path / "odd.png", (1500, 700), fmt="PNG")
+
+    image = decode_for_model(path, imgsz=640)
+
+    assert max(image.array.shape[:2]) >= 640
+    assert image.array.shape[:2] == (350, 750)  # PNG reduced by 2
+
+
+@pytest.mark.unit
+def test_small_images_are_not_upscaled(tmp_path):
+    path = _write_image(tmp_path / "small.jpg", (320, 200))
+
+    image = decode_for_model(path, imgsz=640)
+
+    assert image.array.shape[:2] == image.orig_shape == (200, 320)
+
+
+@pytest.mark.unit
+def test_exif_rotation_swaps_original_shape(tmp_path):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90° CW on display
+    path = _write_image(tmp_path / "rot.jpg", (1280, 640), exif=exif)
+
+    image = decode_for_model(path, imgsz=320)
+
+    assert image.orig_shape == (1280, 640)
+    assert image.array.shape[:2] == (320, 160)
+
+
+@pytest.mark.unit
+def test_truncated_file_raises(tmp_path):
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600)).save(buffer, format="PNG")
+    path = tmp_path / "cut.png"
+    path.write_bytes(buffer.getvalue()[:-200])
+
+    with pytest.raises(OSError):
+        decode_for_model(path, imgsz=640)
+
+
+@pytest.mark.unit
+def test_boxes_map_back_to_original_pixels(tmp_path):
+    image = decode_for_model(_write_image(tmp_path / "big.jpg", (2560, 1920)), 640)
+
+    full = image.to_original(_detections([[10, 20, 110, 220]]))
+
+    np.testing.assert_allclose(full.xyxy, [[40, 80, 440, 880]])
+    assert full.orig_shape == (1920, 2560)
+    np.testing.assert_allclose(image.to_decoded(full).xyxy, [[10, 20, 110, 220]])
+
+
+@pytest.mark.unit
+def test_shared_image_round_trip(tmp_path):
+    image = decode_for_model(_write_image(tmp_path / "big.jpg", (1280, 960)), 640)
+
+    shared = SharedImage.from_decoded(image)
+    try:
+        loaded = shared.load()
+    finally:
+        shared.unlink()
+
+    np.testing.assert_array_equal(loaded.array, image.array)
+    assert loaded.orig_shape == image.orig_shape
+    with pytest.raises(FileNotFoundError):
+        shared.load()  # segment is gone
+    shared.unlink()  # idempotent
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(sys.version_info >= (3, 13), reason="attached with track=False")
+def test_loading_does_not_leave_the_segment_tracked(tmp_path, monkeypatch):
+    image = decode_for_model(_write_image(tmp_path / "big.jpg", (640, 480)), 640)
+    shared = SharedImage.from_decoded(image)
+    calls = []
+    monkeypatch.setattr(
+        decode.resource_tracker, "unregister", lambda name, rtype: calls.append((name, rtype))
+    )
+    try:
+        shared.load()
+    finally:
+        monkeypatch.undo()
+        shared.unlink()
+
+    assert calls == [(f"/{shared.name}", "shared_memory")]
@@ -0,0 +1,51 @@
+"""Tests for the run bookkeeping of api.detect (no inference)"""
+
+import pytest
+from fastapi import HTTPException
+
+from ml_object_detector.api import detect
+from ml_object_detector.services.scheduler import QueueFull
+
+# Helpers ---------------
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    """Raw and processed folders under tmp_path."""
+    monkeypatch.setattr(detect, "ROOT", tmp_path)
+    monkeypatch.setattr(detect, "cfg", {"input_dir": "raw"})
+    monkeypatch.setattr(detect, "PROCESSED", tmp_path / "processed")
+    return tmp_path
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_runs_started_in_the_same_second_get_their_own_directory(dirs):
+    runs = [detect.new_run("Picnic Photo.jpg") for _ in range(20)]
+
+    assert len({run_id for run_id, _ in runs}) == 20
+    for run_id, raw_dir in runs:
+        assert run_id.startswith("picnic-photo_")
+        assert raw_dir == dirs / "raw" / run_id and raw_dir.is_dir()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "failure, expected",
+    [(QueueFull("alice"), QueueFull), (detect.sqlite3.IntegrityError("dup"), HTTPException)],
+)
+def test_failed_submit_removes_the_run_files(dirs, monkeypatch, failure, expected):
+    run_id, raw_dir = detect.new_run("a")
+    (raw_dir / "a.jpg").write_bytes(b"x")
+    (detect.PROCESSED / run_id).mkdir(parents=True)
+
+    def fail(*args, **kwargs):
+        raise failure
+
+    monkeypatch.setattr(detect.jobs, "submit", fail)
+
+    with pytest.raises(expected):
+        detect.submit_job(run_id, "report", {}, "alice")
+    assert not raw_dir.exists() and not (detect.PROCESSED / run_id).exists()
@@ -0,0 +1,216 @@
+"""
+Tests for etl.download_images against a local stand-in for Pexels.
+
+A ThreadingHTTPServer serves a fake search endpoint and image bytes, so
+retries, concurrency and content-addressed naming run without network.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ml_object_detector.etl import download_images as dl
+
+IMAGES = {f"/img/{i}.jpeg": f"image-bytes-{i}".encode() * 100 for i in range(4)}
+IMAGES["/img/dup.jpeg"] = IMAGES["/img/0.jpeg"]  # same bytes, other URL
+
+# Helpers ---------------
+
+
+class FakePexels(BaseHTTPRequestHandler):
+    flaky_failures = 0  # 503s to serve before /img/flaky.jpeg succeeds
+    hits: list[str] = []
+
+    def log_message(self, *args):  # keep pytest output quiet
+        pass
+
+    def _send(self, status, body=b"", ctype="image/jpeg"):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]  # renditions differ only by query string
+        FakePexels.hits.append(path)
+        base = f"http://{self.headers['Host']}"
+        if path == "/v1/search":
+            query = self.path.split("query=")[1].split("&")[0]
+            urls = {
+                "picnic": ["/img/0.jpeg", "/img/1.jpeg", "/img/dup.jpeg"],
+                "surfing": ["/img/2.jpeg", "/img/3.jpeg"],
+                "flaky": ["/img/flaky.jpeg"],
+            }[query]
+            photos = [
+                {
+                    "id": u.rsplit("/", 1)[1],
+                    "width": 4000,
+                    "height": 3000,
+                    "src": {"original": base + u, "large": base + u + "?w=940"},
+                }
+                for u in urls
+            ]
+            return self._send(200, json.dumps({"photos": photos}).encode(), "application/json")
+
+        if path == "/img/flaky.jpeg":
+            if FakePexels.flaky_failures > 0:
+                FakePexels.flaky_failures -= 1
+                return self._send(503)
+            return self._send(200, b"finally")
+
+        body = IMAGES.get(path)
+        return self._send(200, body) if body else self._send(404)
+
+
+@pytest.fixture(autouse=True)
+def log_file(monkeypatch, tmp_path_factory):
+    """Send the download logger to a temporary file, not the repo's logs/."""
+    path = tmp_path_factory.mktemp("logs") / "download_images.log"
+    handler = logging.FileHandler(path)
+    logger = logging.getLogger("download_logger")
+    monkeypatch.setattr(logger, "handlers", [handler])
+    monkeypatch.setattr(logger, "propagate", False)
+    yield path
+    handler.close()
+
+
+@pytest.fixture
+def pexels(monkeypatch, tmp_path_factory):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakePexels)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakePexels.hits = []
+
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setenv("PEXELS_API_KEY", "test-key")
+    monkeypatch.setattr(dl, "SEARCH_URL", f"{base}/v1/search")
+    monkeypatch.setattr(dl, "BACKOFF_S", 0.0)
+    monkeypatch.setattr(dl, "_session", None)  # fresh pool/retry settings
+    index_dir = tmp_path_factory.mktemp("index")
+    monkeypatch.setattr(dl, "INDEX_PATH", index_dir / "photo_index.sqlite3")
+    monkeypatch.setattr(dl, "_index", None)
+    yield base
+    server.shutdown()
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_multi_query_download_is_content_addressed(pexels, tmp_path):
+    saved = dl.download_queries(["picnic", "surfing"], n=5, dest_dir=tmp_path)
+
+    assert len(saved["picnic"]) == 2  # dup.jpeg has the same bytes as 0.jpeg
+    assert len(saved["surfing"]) == 2
+
+    for path in saved["picnic"] + saved["surfing"]:
+        expected = dl.make_immutable_name(path.read_bytes(), ".jpeg")
+        assert path.name == expected
+        assert hashlib.sha1(path.read_bytes()).hexdigest().startswith(path.stem)
+
+    # no temporary .part files left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [dl.METADATA_DIR] + [p.name for p in saved["picnic"] + saved["surfing"]]
+    )
+
+
+@pytest.mark.unit
+def test_transient_errors_are_retried(pexels, tmp_path):
+    FakePexels.flaky_failures = 2
+
+    saved = dl.download_image("flaky", n=1, dest_dir=tmp_path)
+
+    assert [p.read_bytes() for p in saved] == [b"finally"]
+    assert FakePexels.hits.count("/img/flaky.jpeg") == 3
+
+
+@pytest.mark.unit
+def test_api_key_is_required_only_to_search(pexels, monkeypatch):
+    monkeypatch.delenv("PEXELS_API_KEY")
+
+    with pytest.raises(RuntimeError, match="PEXELS_API_KEY"):
+        dl.search_photos("picnic", 1)
+    assert FakePexels.hits == []
+
+
+@pytest.mark.unit
+def test_url_suffix_ignores_query_string():
+    url = "https://images.pexels.com/photos/1/pexels-photo-1.jpeg?auto=compress&w=940"
+    assert dl._url_suffix(url) == ".jpeg"
+
+
+PHOTO = {
+    "id": 1,
+    "width": 4000,
+    "height": 3000,
+    "src": {
+        k: f"https://images.pexels.com/1.jpeg?{k}"
+        for k in ("original", "large2x", "large", "medium", "small", "tiny")
+    },
+}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "min_side, expected",
+    [(400, "medium"), (640, "large"), (1280, "large2x"), (3000, "original")],
+)
+def test_auto_rendition_is_smallest_covering_imgsz(min_side, expected):
+    name, url = dl.pick_rendition(PHOTO, "auto", min_long_side=min_side)
+    assert name == expected
+    assert url == PHOTO["src"][expected]
+
+
+@pytest.mark.unit
+def test_explicit_rendition_and_metadata(pexels, tmp_path):
+    dl.download_queries(["surfing"], n=2, dest_dir=tmp_path, rendition="original", run_id="a")
+    dl.download_queries(["picnic"], n=1, dest_dir=tmp_path, run_id="b")
+
+    # one record per run, even when runs share a folder
+    first = json.loads((tmp_path / dl.METADATA_DIR / "a.json").read_text())
+    meta = json.loads((tmp_path / dl.METADATA_DIR / "b.json").read_text())
+    assert [(p["query"], p["rendition"]) for p in first["photos"]] == [
+        ("surfing", "original"),
+        ("surfing", "original"),
+    ]
+    assert meta["run_id"] == "b" and meta["queries"] == ["picnic"]
+    assert [(p["query"], p["rendition"]) for p in meta["photos"]] == [("picnic", "large")]
+    assert meta["photos"][-1]["url"].endswith("?w=940")
+    assert meta["photos"][-1]["expected_size"] == [867, 650]
+    assert all((tmp_path / p["file"]).exists() for p in first["photos"] + meta["photos"])
+
+
+@pytest.mark.unit
+def test_known_photos_are_linked_not_downloaded(pexels, tmp_path):
+    first = dl.download_queries(["picnic"], n=5, dest_dir=tmp_path / "run1")
+    FakePexels.hits = []
+
+    second = dl.download_queries(["picnic"], n=5, dest_dir=tmp_path / "run2")
+
+    assert FakePexels.hits == ["/v1/search"]  # search only, no image transfer
+    assert sorted(p.name for p in second["picnic"]) == sorted(
+        p.name for p in first["picnic"]
+    )
+    for new in second["picnic"]:
+        old = tmp_path / "run1" / new.name
+        assert new.stat().st_ino == old.stat().st_ino  # hard link, not a copy
+
+    (meta_path,) = (tmp_path / "run2" / dl.METADATA_DIR).iterdir()
+    meta = json.loads(meta_path.read_text())
+    assert {p["source"] for p in meta["photos"]} == {"index"}
+
+
+@pytest.mark.unit
+def test_index_entry_for_deleted_file_is_refetched(pexels, tmp_path):
+    (path,) = dl.download_image("flaky", n=1, dest_dir=tmp_path / "run1")
+    path.unlink()
+
+    (again,) = dl.download_image("flaky", n=1, dest_dir=tmp_path / "run2")
+
+    assert again.read_bytes() == b"finally"
+    assert FakePexels.hits.count("/img/flaky.jpeg") == 2
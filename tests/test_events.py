@@ -0,0 +1,162 @@
+"""Unit tests for services.events (progress hub + SSE framing)"""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ml_object_detector.api import events as events_api
+from ml_object_detector.services import events
+from ml_object_detector.services.events import EventHub
+from ml_object_detector.services.jobs import JobStore
+
+# Helpers ---------------
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    h = EventHub()
+    monkeypatch.setattr(events, "hub", h)
+    monkeypatch.setattr(events, "_forward", None)
+    return h
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    s = JobStore(tmp_path / "jobs.sqlite3")
+    monkeypatch.setattr(events_api, "get_store", lambda: s)
+    yield s
+    s.close()
+
+
+@pytest.fixture
+def client(hub, store):
+    app = FastAPI()
+    app.include_router(events_api.router)
+    return TestClient(app)
+
+
+def _publish_once_subscribed(hub, run_id, *items, timeout=5.0):
+    """Thread publishing *items* as soon as a client listens to *run_id*."""
+
+    def job():
+        deadline = time.monotonic() + timeout
+        while not hub._subscribers.get(run_id) and time.monotonic() < deadline:
+            time.sleep(0.005)
+        for event in items:
+            events.publish(run_id, event)
+
+    thread = threading.Thread(target=job, daemon=True)
+    thread.start()
+    return thread
+
+
+def _frames(body: str) -> list[tuple[str, dict]]:
+    return [
+        (f.split("\n", 1)[0].removeprefix("event: "), json.loads(f.split("data: ", 1)[1]))
+        for f in body.split("\n\n")
+        if f.startswith("event:")
+    ]
+
+
+async def _collect(stream) -> list[dict]:
+    frames = [frame async for frame in stream]
+    return [json.loads(f.split("data: ", 1)[1]) for f in frames if f.startswith("event:")]
+
+
+# Tests ------------
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_stream_relays_thread_events_until_done(hub):
+    stream = events.sse_stream("run1", initial={"type": "progress", "done": 0, "total": 2})
+
+    def job():  # runs in a job runner thread in production
+        for i in (1, 2):
+            events.publish("run1", {"type": "progress", "done": i, "total": 2})
+        events.publish("run1", {"type": "done", "report_url": "/reports/r.html"})
+
+    async def start_job_after_subscribe():
+        await asyncio.sleep(0.01)
+        threading.Thread(target=job).start()
+
+    received, _ = await asyncio.wait_for(
+        asyncio.gather(_collect(stream), start_job_after_subscribe()), 2.0
+    )
+
+    assert [e.get("done") for e in received] == [0, 1, 2, None]
+    assert received[-1] == {"type": "done", "report_url": "/reports/r.html"}
+    assert hub._subscribers == {}  # unsubscribed on completion
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_finished_run_completes_immediately(hub):
+    events.publish("run2", {"type": "failed", "error": "boom"})
+
+    received = await asyncio.wait_for(_collect(events.sse_stream("run2")), 1.0)
+
+    assert received == [{"type": "failed", "error": "boom"}]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_keepalive_and_disconnect(hub):
+    async def gone():
+        return True
+
+    frames = [
+        f async for f in events.sse_stream("run3", is_disconnected=gone, keepalive_s=0.01)
+    ]
+    assert frames == []  # nothing to send, client left
+
+
+@pytest.mark.unit
+def test_worker_processes_forward_instead_of_publishing(hub):
+    forwarded = []
+    events.forward_to(forwarded.append)
+    try:
+        events.publish("run4", {"type": "progress", "done": 1, "total": None})
+    finally:
+        events.forward_to(None)
+
+    assert forwarded == [("run4", {"type": "progress", "done": 1, "total": None})]
+    assert hub.last("run4") is None
+
+
+@pytest.mark.unit
+def test_events_route_streams_progress_until_done(client, hub, store):
+    store.enqueue("run5", "report", {})
+    store.claim()
+    store.progress("run5", 1, 3)
+    publisher = _publish_once_subscribed(
+        hub,
+        "run5",
+        {"type": "progress", "done": 2, "total": 3},
+        {"type": "progress", "done": 3, "total": 3},
+        {"type": "done", "report_url": "/reports/r.html"},
+    )
+
+    response = client.get("/events/run5")  # returns only once the stream ended
+    publisher.join()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert [(name, e.get("done")) for name, e in _frames(response.text)] == [
+        ("progress", 1),  # current state from the job store
+        ("progress", 2),
+        ("progress", 3),
+        ("done", None),
+    ]
+    assert hub._subscribers == {}
+
+
+@pytest.mark.unit
+def test_events_route_unknown_run_is_404(client):
+    assert client.get("/events/nope").status_code == 404
@@ -0,0 +1,92 @@
+"""Unit tests for postprocess.export (per-run columnar detections file)"""
+
+import csv
+
+import numpy as np
+import pytest
+
+from ml_object_detector.domain.detections import ImageDetections
+from ml_object_detector.postprocess.export import COLUMNS, DetectionExporter
+
+NAMES = {0: "person", 1: "surfboard"}
+
+# Helpers ---------------
+
+
+def _det(path, rows):
+    """rows are x1, y1, x2, y2, conf, cls"""
+    data = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+    return ImageDetections(
+        path=path,
+        names=NAMES,
+        cls=data[:, 5].astype(np.int64),
+        conf=data[:, 4],
+        xyxy=data[:, :4],
+        speed={"preprocess": 1.0, "inference": 5.0, "postprocess": 0.5},
+    )
+
+
+def _read_csv(path):
+    with open(path, newline="") as fh:
+        return list(csv.DictReader(fh))
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_csv_export_is_written_in_batches(tmp_path):
+    exporter = DetectionExporter(tmp_path, "run1", conf_threshold=0.5, fmt="csv", batch_rows=2)
+
+    exporter.add(_det("data/raw/run1/a.png", [[1, 2, 3, 4, 0.9, 1], [0, 0, 1, 1, 0.2, 0]]))
+    exporter.add(_det("data/raw/run1/empty.jpg", []))
+    exporter.add(_det("data/raw/run1/b.jpg", [[5, 6, 7, 8, 0.8, 0], [1, 1, 2, 2, 0.7, 1]]))
+    # first batch is on disk under the temporary name only
+    assert exporter.rows == 3
+    assert not exporter.path.exists()
+
+    exporter.add(_det("data/raw/run1/c.jpg", [[0, 0, 9, 9, 0.6, 0]]))
+    path = exporter.close()
+
+    assert path == tmp_path / "detections_run1.csv"
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+    rows = _read_csv(path)
+    assert list(rows[0]) == COLUMNS
+    assert [(r["image"], r["label"]) for r in rows] == [
+        ("a.png", "surfboard"),
+        ("b.jpg", "person"),
+        ("b.jpg", "surfboard"),
+        ("c.jpg", "person"),
+    ]
+    assert {r["run_id"] for r in rows} == {"run1"}
+    assert float(rows[1]["x2"]) == 7 and float(rows[1]["inference_ms"]) == 5.0
+
+
+@pytest.mark.unit
+def test_nothing_detected_leaves_no_file(tmp_path):
+    with DetectionExporter(tmp_path, "run2", conf_threshold=0.5, fmt="csv") as exporter:
+        exporter.add(_det("a.jpg", [[0, 0, 1, 1, 0.1, 0]]))
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.unit
+def test_failed_run_removes_partial_file(tmp_path):
+    with pytest.raises(RuntimeError):
+        with DetectionExporter(tmp_path, "run3", fmt="csv", batch_rows=1) as exporter:
+            exporter.add(_det("a.jpg", [[0, 0, 1, 1, 0.9, 0]]))
+            raise RuntimeError("worker died")
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.unit
+def test_parquet_export_round_trip(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    with DetectionExporter(tmp_path, "run4", fmt="parquet", batch_rows=1) as exporter:
+        exporter.add(_det("a.jpg", [[1, 2, 3, 4, 0.9, 1]]))
+        exporter.add(_det("b.jpg", [[5, 6, 7, 8, 0.8, 0]]))
+
+    table = pq.read_table(exporter.path)
+    assert table.column_names == COLUMNS
+    assert table.column("label").to_pylist() == ["surfboard", "person"]
+    assert pq.ParquetFile(exporter.path).num_row_groups == 2
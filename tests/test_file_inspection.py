@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
 """Quick test for file_inspection functionality"""
 
+import hashlib
 import io
 from pathlib import Path
 
 import pytest
 from starlette.datastructures import UploadFile
 
-from ml_object_detector.services.file_inspection import (inspect_uploaded_file, policy)
-from ml_object_detector.domain.errors import InvalidImageError
+from PIL import Image
+
+from ml_object_detector.services.file_inspection import (
+    decode_uploads,
+    ingest_decoded,
+    ingest_uploads,
+    inspect_uploaded_file,
+    policy,
+)
+from ml_object_detector.domain.errors import InvalidImageError, UploadRejected
 
 # Helpers ---------------
 
@@ -27,6 +36,12 @@ class MemUploadFile(UploadFile):
             yield self._content[i : i + chunk_size]
 
 
+def png_bytes(size=(64, 48)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color="blue").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
 def load_sample_images() -> list[Path]:
     samples_dir = Path(__file__).parent.parent / "input_images"
     return (
@@ -79,3 +94,104 @@ async def test_wrong_mime_fails():
 
     with pytest.raises(InvalidImageError, match="MIME type"):
         await inspect_uploaded_file(upload)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_ingest_streams_into_run_dir(tmp_path):
+    uploads = [MemUploadFile("a.PNG", png_bytes()), MemUploadFile("noext", png_bytes())]
+
+    paths = await ingest_uploads(uploads, tmp_path)
+
+    assert [p.parent for p in paths] == [tmp_path, tmp_path]
+    assert all(p.suffix == ".png" for p in paths)  # named after the sniffed type
+    assert all(p.read_bytes() == png_bytes() for p in paths)
+    assert sorted(tmp_path.iterdir()) == sorted(paths)  # no temp files left
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_ingest_rejects_whole_batch_on_bad_file(tmp_path):
+    uploads = [
+        MemUploadFile("ok.png", png_bytes()),
+        MemUploadFile("doc.pdf", b"%PDF-1.4"),
+        MemUploadFile("broken.png", png_bytes()[:100]),  # truncated
+    ]
+
+    with pytest.raises(UploadRejected) as info:
+        await ingest_uploads(uploads, tmp_path)
+
+    assert [e["file"] for e in info.value.errors] == ["doc.pdf", "broken.png"]
+    assert "MIME type" in info.value.errors[0]["error"]
+    assert not info.value.confirm_required
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_soft_limit_needs_confirmation(tmp_path, monkeypatch):
+    from ml_object_detector.services import file_inspection
+
+    content = png_bytes((400, 400))
+    soft = policy._replace(soft_limit_mb=len(content) / 2 / 1024 / 1024)
+    monkeypatch.setattr(file_inspection, "policy", soft)
+
+    with pytest.raises(UploadRejected) as info:
+        await ingest_uploads([MemUploadFile("big.png", content)], tmp_path)
+    assert info.value.confirm_required
+
+    (path,) = await ingest_uploads(
+        [MemUploadFile("big.png", content)], tmp_path, confirm_large=True
+    )
+    assert path.stat().st_size == len(content)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_ingest_decoded_returns_pixels_and_digest(tmp_path):
+    content = png_bytes((1400, 700))
+
+    upload = await ingest_decoded(MemUploadFile("wide.png", content), tmp_path, 640)
+
+    assert upload.path.parent == tmp_path and upload.path.read_bytes() == content
+    assert upload.sha1 == hashlib.sha1(content).hexdigest()
+    assert upload.image.orig_shape == (700, 1400)
+    assert upload.image.array.shape == (350, 700, 3)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_ingest_decoded_rejects_truncated_image(tmp_path):
+    content = png_bytes((400, 400))[:-100]
+
+    with pytest.raises(InvalidImageError):
+        await ingest_decoded(MemUploadFile("cut.png", content), tmp_path, 640)
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_decode_uploads_stays_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # would catch stray temp files in cwd
+    contents = [png_bytes((800, 600)), png_bytes((64, 48))]
+    uploads = [MemUploadFile(f"img{i}.png", c) for i, c in enumerate(contents)]
+
+    decoded = await decode_uploads(uploads, 640)
+
+    assert [d.path for d in decoded] == [None, None]
+    assert [d.sha1 for d in decoded] == [hashlib.sha1(c).hexdigest() for c in contents]
+    assert [d.image.orig_shape for d in decoded] == [(600, 800), (48, 64)]
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_decode_uploads_rejects_whole_batch(tmp_path):
+    uploads = [
+        MemUploadFile("ok.png", png_bytes()),
+        MemUploadFile("broken.png", png_bytes((400, 400))[:-100]),
+    ]
+
+    with pytest.raises(UploadRejected) as info:
+        await decode_uploads(uploads, 640)
+    assert [e["file"] for e in info.value.errors] == ["broken.png"]
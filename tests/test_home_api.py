@@ -0,0 +1,76 @@
+"""Tests for the processing page of api.home"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ml_object_detector.api import home
+from ml_object_detector.services.jobs import JobStore
+
+RUN_ID = "picnic_2026-10-17T10-00-00_0a1b2c"
+
+# Helpers ---------------
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    s = JobStore(tmp_path / "jobs.sqlite3")
+    monkeypatch.setattr(home, "get_store", lambda: s)
+    monkeypatch.setattr(home, "REPORTS_DIR", tmp_path / "reports")
+    yield s
+    s.close()
+
+
+@pytest.fixture
+def client(store):
+    app = FastAPI()
+    app.include_router(home.router)
+    return TestClient(app)
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_queued_run_gets_the_progress_page(client, store):
+    store.enqueue(RUN_ID, "report", {})
+
+    response = client.get(f"/processing/{RUN_ID}/report_{RUN_ID}.html")
+
+    assert response.status_code == 200
+    assert f'const runId = "{RUN_ID}";' in response.text
+    assert "events.onerror" in response.text  # falls back to polling /jobs
+
+
+@pytest.mark.unit
+def test_unknown_run_without_report_is_404(client):
+    assert client.get(f"/processing/{RUN_ID}/report_{RUN_ID}.html").status_code == 404
+
+
+@pytest.mark.unit
+def test_run_unknown_to_the_store_with_report_redirects(client):
+    home.REPORTS_DIR.mkdir()
+    (home.REPORTS_DIR / f"report_{RUN_ID}.html").write_text("<html></html>")
+
+    response = client.get(
+        f"/processing/{RUN_ID}/report_{RUN_ID}.html", follow_redirects=False
+    )
+
+    assert response.status_code == 303
+    assert response.headers["location"] == f"/reports/report_{RUN_ID}.html"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "path",
+    [
+        '/processing/x");alert(1);("/report_x.html',
+        "/processing/%3C%2Fscript%3E%3Cscript%3Ealert(1)%3C%2Fscript%3E/report_x.html",
+        f"/processing/{RUN_ID}/report_other.html",
+    ],
+)
+def test_unexpected_run_ids_and_report_names_are_404(client, store, path):
+    response = client.get(path)
+
+    assert response.status_code == 404
+    assert "<script>" not in response.text
@@ -0,0 +1,86 @@
+"""Unit tests for postprocess.html_report (cached env + streamed render)"""
+
+import json
+from collections.abc import Sequence
+
+import numpy as np
+import pytest
+
+from ml_object_detector.domain.detections import ImageDetections
+from ml_object_detector.postprocess.analysis import build_table
+
+from ml_object_detector.postprocess import html_report
+from ml_object_detector.postprocess.html_report import write_html_report
+
+# Helpers ---------------
+
+
+class ExplodingRows(Sequence):
+    """Rows that fail half-way through rendering."""
+
+    def __len__(self):
+        return 10
+
+    def __getitem__(self, i):
+        if i >= 3:
+            raise RuntimeError("lost the worker")
+        return {"image": f"run/img{i}.jpg", "object": "person", "conf": 0.9}
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_env_and_template_are_compiled_once():
+    env = html_report._get_env()
+
+    assert html_report._get_env() is env
+    assert env.get_template(html_report.REPORT_TEMPLATE) is env.get_template(
+        html_report.REPORT_TEMPLATE
+    )
+
+
+@pytest.mark.unit
+def test_report_is_streamed_to_final_name(tmp_path):
+    rows = [{"image": f"run/img{i}.jpg", "object": "person", "conf": 0.5} for i in range(500)]
+
+    path = write_html_report(rows, tmp_path, "run", page_size=1000)
+
+    assert path == tmp_path / "report_run.html"
+    html = path.read_text(encoding="utf-8")
+    assert "/processed/run/img499.jpg" in html and html.rstrip().endswith("</html>")
+    assert 'src="/thumbnails/run/img499.jpg"' in html
+    assert [p.name for p in tmp_path.iterdir()] == ["report_run.html"]
+
+
+@pytest.mark.unit
+def test_large_run_is_summarised_and_paginated(tmp_path):
+    det = ImageDetections(
+        path="data/raw/run/crowd.png",
+        names={0: "person", 1: "surfboard"},
+        cls=np.array([0] * 240 + [1] * 10),
+        conf=np.linspace(0.5, 0.99, 250).astype(np.float32),
+        xyxy=np.zeros((250, 4), dtype=np.float32),
+    )
+    empty = ImageDetections("data/raw/run/none.png", {}, det.cls[:0], det.conf[:0], det.xyxy[:0])
+    rows = build_table([det, empty], 0.5).rows("run")
+
+    path = write_html_report(rows, tmp_path, "run", page_size=100)
+
+    html = path.read_text(encoding="utf-8")
+    assert html.count("<img") == 100  # first page only
+    assert "250 detections" in html and "1 without any detection" in html
+    assert 'data-url="report_run_rows/"' in html
+    pages = sorted((tmp_path / "report_run_rows").iterdir())
+    assert [p.name for p in pages] == ["page_2.json", "page_3.json"]
+    last = json.loads(pages[-1].read_text())
+    assert last["pages"] == 3 and len(last["rows"]) == 50
+    assert last["rows"][-1] == {"image": "run/crowd.jpg", "object": "surfboard", "conf": pytest.approx(0.99)}
+
+
+@pytest.mark.unit
+def test_failed_render_leaves_nothing_behind(tmp_path):
+    with pytest.raises(RuntimeError):
+        write_html_report(ExplodingRows(), tmp_path, "run")
+
+    assert list(tmp_path.iterdir()) == []
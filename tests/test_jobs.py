@@ -0,0 +1,194 @@
+"""Unit tests for services.jobs (SQLite job store + runner threads)"""
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ml_object_detector.api import jobs as jobs_api
+from ml_object_detector.services import events, jobs
+from ml_object_detector.services.jobs import JobRunner, JobStore
+from ml_object_detector.services.scheduler import FairScheduler, QueueFull
+
+# Helpers ---------------
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = JobStore(tmp_path / "jobs.sqlite3", max_attempts=2)
+    yield s
+    s.close()
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    """/jobs routes backed by the temporary store."""
+    monkeypatch.setattr(jobs_api, "get_store", lambda: store)
+    app = FastAPI()
+    app.include_router(jobs_api.router)
+    return TestClient(app)
+
+
+def _wait_for(store, run_id, states=("done", "failed"), timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(run_id)
+        if job.state in states:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"{run_id} still {store.get(run_id).state}")
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_claim_is_fifo_and_exclusive(store):
+    store.enqueue("a", "report", {"src_dir": "x", "conf": 0.5})
+    store.enqueue("b", "report", {"src_dir": "y", "conf": 0.5})
+
+    first, second = store.claim(), store.claim()
+    assert (first.run_id, second.run_id) == ("a", "b")
+    assert first.state == "running" and first.attempts == 1
+    assert first.payload == {"src_dir": "x", "conf": 0.5}
+    assert store.claim() is None
+    assert store.counts() == {"queued": 0, "running": 2, "done": 0, "failed": 0}
+
+
+@pytest.mark.unit
+def test_runner_executes_and_reports_progress(store, monkeypatch):
+    hub = events.EventHub()
+    monkeypatch.setattr(events, "hub", hub)
+
+    def handler(job):
+        for i in range(3):
+            store.progress(job.run_id, i + 1, 3)
+        return f"reports/report_{job.run_id}.html"
+
+    finished = []
+    runner = JobRunner(store, {"report": handler}, FairScheduler(capacity=2), poll_s=0.05)
+    runner.start()
+    try:
+        runner.submit("run1", "report", {}, on_finish=finished.append)
+        job = _wait_for(store, "run1")
+    finally:
+        runner.stop()
+
+    data = job.to_dict()
+    assert data["state"] == "done"
+    assert data["progress"] == {"done": 3, "total": 3}
+    assert data["report"] == "reports/report_run1.html"
+    assert [j.run_id for j in finished] == ["run1"]
+    assert hub.last("run1") == {"type": "done", "report_url": "/reports/report_run1.html"}
+
+
+@pytest.mark.unit
+def test_failed_job_keeps_error_and_in_memory_results(store):
+    seen = {}
+
+    def handler(job):
+        seen["results"] = job.results
+        raise ValueError("boom")
+
+    runner = JobRunner(store, {"report": handler}, FairScheduler(), poll_s=0.05)
+    runner.start()
+    try:
+        runner.submit("run2", "report", {}, results=["precomputed"])
+        job = _wait_for(store, "run2")
+    finally:
+        runner.stop()
+
+    assert job.state == "failed"
+    assert job.error == "ValueError: boom"
+    assert seen["results"] == ["precomputed"]
+
+
+@pytest.mark.unit
+def test_unknown_kind_is_rejected(store):
+    runner = JobRunner(store, {"report": lambda job: None}, FairScheduler())
+    with pytest.raises(ValueError):
+        runner.submit("run3", "nope", {})
+    assert store.get("run3") is None
+
+
+@pytest.mark.unit
+def test_full_client_queue_is_not_persisted(store):
+    # runner not started: nothing is taken off the queues
+    scheduler = FairScheduler(capacity=1, per_client_queued=1)
+    runner = JobRunner(store, {"report": lambda job: None}, scheduler)
+    runner.submit("a1", "report", {}, client="alice")  # runs
+    runner.submit("a2", "report", {}, client="alice")  # waits
+
+    with pytest.raises(QueueFull):
+        runner.submit("a3", "report", {}, client="alice")
+    assert store.get("a3") is None
+    runner.submit("b1", "report", {}, client="bob")  # other clients unaffected
+    assert store.get("a2").client == "alice"
+
+
+@pytest.mark.unit
+def test_recover_requeues_jobs_of_dead_process(store, monkeypatch):
+    store.enqueue("crashed", "report", {})
+    store.enqueue("hopeless", "report", {})
+    store.claim()
+    store.claim()
+    # simulate a dead API process owning both jobs
+    store._conn.execute("UPDATE jobs SET owner_pid = 999999")
+    store._conn.execute("UPDATE jobs SET attempts = 2 WHERE run_id = 'hopeless'")
+    monkeypatch.setattr(jobs, "_pid_alive", lambda pid: False)
+
+    assert store.recover() == 1
+    assert store.get("crashed").state == "queued"
+    assert store.get("hopeless").state == "failed"
+    assert store.claim().attempts == 2
+
+
+@pytest.mark.unit
+def test_status_of_unknown_run_is_404(client):
+    response = client.get("/jobs/nope")
+
+    assert response.status_code == 404
+    assert "nope" in response.json()["detail"]
+
+
+@pytest.mark.unit
+def test_status_payload(client, store):
+    store.enqueue("run1", "report", {"src_dir": "x", "conf": 0.5}, client="alice")
+    store.claim()
+    store.progress("run1", 3, 10)
+
+    data = client.get("/jobs/run1").json()
+
+    assert data["run_id"] == "run1" and data["kind"] == "report"
+    assert data["state"] == "running" and data["attempts"] == 1
+    assert data["progress"] == {"done": 3, "total": 10}
+    assert data["report"] is None and data["error"] is None
+    assert data["started"] is not None and data["finished"] is None
+    # arguments, client key and owner are internal
+    assert not {"payload", "client", "owner_pid", "results"} & set(data)
+
+
+@pytest.mark.unit
+def test_status_lookups_run_off_the_event_loop(client, store, monkeypatch):
+    import asyncio
+
+    on_loop = []
+
+    def off_loop(name, result):
+        def call(*args):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(name)
+            except RuntimeError:  # worker thread, no loop
+                pass
+            return result
+
+        return call
+
+    monkeypatch.setattr(store, "get", off_loop("get", None))
+    monkeypatch.setattr(store, "list_jobs", off_loop("list_jobs", []))
+
+    assert client.get("/jobs/run1").status_code == 404
+    assert client.get("/jobs").status_code == 200
+    assert on_loop == []
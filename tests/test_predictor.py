@@ -22,34 +22,39 @@ class DummyYOLO:
         """No-op; predictor calls this on init."""
         return None
 
-    # Records args, returns a fake “Results”
-    def predict(
-        self, source, save, save_txt, save_conf, project, name, conf, verbose, exist_ok
-    ):
+    # Records args, returns one fake “Results” per source
+    def predict(self, source, conf, verbose, **kwargs):
 
         # Record the call so test can assert on it
         self.predict_calls.append(
             {
-                "source": Path(source),
-                "project": Path(project),
-                "name": name,
+                "source": [Path(s) for s in source]
+                if isinstance(source, list)
+                else Path(source),
+                "project": kwargs.get("project"),
+                "name": kwargs.get("name"),
                 "conf": conf,
+                "batch": kwargs.get("batch"),
             }
         )
 
         # Fabricate a minimal Results-like object
         Box = type("Box", (), {})  # empty stub
+        project, name = kwargs.get("project"), kwargs.get("name")
         dummy_res = type(
             "Res",
             (),
             {
                 "boxes": [Box(), Box()],
-                "save_dir": Path(project) / name,
+                "save_dir": Path(project) / name if project else None,
                 "speed": {"preprocess": 1.0, "inference": 2.0, "postprocess": 1.0},
                 "orig_shape": (640, 480, 3),
+                "save": lambda self, filename: Path(filename).touch() or filename,
+                "save_txt": lambda self, txt_file, save_conf=False: Path(txt_file).touch() or str(txt_file),
             },
         )
-        return [dummy_res]
+        n = len(source) if isinstance(source, list) else 1
+        return [dummy_res() for _ in range(n)]
 
 
 # ----------------------------------------------------------------------#
@@ -65,6 +70,9 @@ def predictor_with_dummy(monkeypatch, tmp_path):
         "ml_object_detector.models.predictor.YOLO", lambda *args, **kwargs: dummy
     )
 
+    # Keep the persistent detection cache out of unit tests
+    monkeypatch.setattr("ml_object_detector.models.predictor.CACHE", {})
+
     # Also patch SOURCE_DIR to point to an empy temp dir
     monkeypatch.setattr("ml_object_detector.models.predictor.SOURCE_DIR", tmp_path)
 
@@ -103,6 +111,34 @@ def test_predict_images_infolder_uses_dummy(predictor_with_dummy):
     assert len(results[0].boxes) == 2
 
 
+@pytest.mark.unit
+def test_predict_one_json_only_writes_nothing(predictor_with_dummy):
+    predictor, dummy, src_dir = predictor_with_dummy
+
+    one = predictor.predict_one(
+        img_path=src_dir / "img1.jpg", out_dir=src_dir / "out", artifacts="json"
+    )
+
+    assert one.boxed_path is None and one.labels == 2
+    assert not (src_dir / "out").exists()
+
+
+@pytest.mark.unit
+def test_predict_one_exposes_raw_result(predictor_with_dummy):
+    """predict_one must hand back the raw Results so reports can reuse it."""
+    predictor, dummy, src_dir = predictor_with_dummy
+
+    one = predictor.predict_one(
+        img_path=src_dir / "img1.jpg", out_dir=src_dir / "out", wait_artifacts=True
+    )
+
+    assert len(dummy.predict_calls) == 1
+    assert one.result is not None
+    assert len(one.result.boxes) == one.labels == 2
+    assert one.boxed_path == src_dir / "out" / "img1.jpg"
+    assert one.boxed_path.exists()
+
+
 # ----------------------------------------------------------------------#
 # 4.  Optional “smoke” integration test (slow — real model)
 # ----------------------------------------------------------------------#
@@ -127,3 +163,153 @@ def test_predictor_smoke(tmp_path):
     results = predictor.predict_images_in_folder(folder=src_dir, out_dir=out_dir)
     assert len(results) == 1
     assert (out_dir / "labels").exists()
+
+
+@pytest.mark.unit
+def test_predict_one_runs_on_decoded_pixels(predictor_with_dummy, monkeypatch):
+    """Pixels decoded at ingest go straight to the model; boxes come back full-size."""
+    import torch
+    from ultralytics.engine.results import Results
+    from ml_object_detector.models.decode import DecodedImage
+
+    predictor, _, src_dir = predictor_with_dummy
+    predictor.batcher = None
+    image = DecodedImage(np.zeros((120, 160, 3), dtype=np.uint8), orig_shape=(480, 640))
+    seen = {}
+
+    def fake_predict(source, conf, **kwargs):
+        seen["source"] = source
+        boxes = torch.tensor([[10.0, 20.0, 50.0, 60.0, 0.9, 0.0]])
+        speed = {"preprocess": 1.0, "inference": 2.0, "postprocess": 1.0}
+        return [
+            Results(
+                orig_img=source, path="image0.jpg", names={0: "person"},
+                boxes=boxes, speed=speed,
+            )
+        ]
+
+    monkeypatch.setattr(predictor.model, "predict", fake_predict)
+
+    one = predictor.predict_one(
+        img_path=src_dir / "img1.jpg", out_dir=src_dir / "out", conf=0.5, image=image
+    )
+
+    assert seen["source"] is image.array  # no path, no second decode
+    assert one.boxed_path == src_dir / "out" / "img1.jpg"
+    assert one.result.path == str(src_dir / "img1.jpg")
+    np.testing.assert_allclose(one.detections.xyxy, [[40, 80, 200, 240]])
+    assert one.detached().detections.orig_shape == (480, 640)
+
+
+@pytest.fixture()
+def predictor_with_cache(predictor_with_dummy):
+    """Dummy predictor whose cache already holds the boxes of img1.jpg."""
+    from ml_object_detector.domain.detections import ImageDetections
+    from ml_object_detector.models.cache import DetectionCache
+
+    predictor, dummy, src_dir = predictor_with_dummy
+    predictor.cache = DetectionCache(src_dir / "cache" / "det.sqlite3", model_id="dummy")
+    det = ImageDetections(
+        path=str(src_dir / "img1.jpg"),
+        names={0: "person"},
+        cls=np.array([0]),
+        conf=np.array([0.9], dtype=np.float32),
+        xyxy=np.array([[10, 20, 50, 60]], dtype=np.float32),
+        orig_shape=(480, 640),
+    )
+    predictor.cache.put(predictor.cache.key_for(src_dir / "img1.jpg"), det)
+    yield predictor, dummy, src_dir
+    predictor.cache.close()
+
+
+@pytest.mark.unit
+def test_cache_hit_without_annotated_copy_skips_decode(predictor_with_cache, monkeypatch):
+    predictor, dummy, src_dir = predictor_with_cache
+    monkeypatch.setattr(
+        "ml_object_detector.models.predictor.cv2.imread",
+        lambda *a: pytest.fail("image decoded for a json/labels-only hit"),
+    )
+
+    one = predictor.predict_one(src_dir / "img1.jpg", src_dir / "out", conf=0.5, artifacts="json")
+
+    assert dummy.predict_calls == []
+    assert one.labels == 1 and one.result.orig_shape == (480, 640)
+
+
+@pytest.mark.unit
+def test_threshold_below_cache_floor_skips_the_cache(predictor_with_cache):
+    predictor, dummy, src_dir = predictor_with_cache
+    predictor.cache.min_conf = 0.25
+
+    predictor.predict_one(src_dir / "img1.jpg", src_dir / "out", conf=0.1, artifacts="json")
+
+    assert [call["conf"] for call in dummy.predict_calls] == [0.1]
+    assert (predictor.cache.hits, predictor.cache.misses) == (0, 0)
+
+
+@pytest.mark.unit
+def test_predict_images_in_folder_serves_cache_hits(predictor_with_cache, monkeypatch):
+    from ml_object_detector.models.artifacts import LABELS, artifact_path
+
+    predictor, dummy, src_dir = predictor_with_cache
+    monkeypatch.setattr(
+        "ml_object_detector.models.predictor.cv2.imread",
+        lambda *a: pytest.fail("image decoded for a labels-only hit"),
+    )
+    out_dir = src_dir / "out"
+
+    results = predictor.predict_images_in_folder(src_dir, out_dir, conf=0.5, artifacts="labels")
+
+    assert dummy.predict_calls == []
+    assert len(results) == 1 and len(results[0].boxes) == 1
+    assert artifact_path(out_dir, "img1", LABELS).read_text().startswith("0 ")
+
+
+@pytest.mark.unit
+def test_predict_many_shares_one_forward_pass(predictor_with_dummy):
+    predictor, dummy, src_dir = predictor_with_dummy
+    (src_dir / "img2.jpg").touch()
+
+    results = predictor.predict_many(
+        [
+            {"img_path": src_dir / "img1.jpg", "conf": 0.5, "artifacts": "json"},
+            {"img_path": src_dir / "img2.jpg", "conf": 0.5, "artifacts": "json"},
+            {"img_path": src_dir / "img1.jpg", "artifacts": "no-such-kind"},
+        ]
+    )
+
+    assert len(dummy.predict_calls) == 1
+    assert dummy.predict_calls[0]["source"] == [src_dir / "img1.jpg", src_dir / "img2.jpg"]
+    assert [r.labels for r in results[:2]] == [2, 2]
+    assert isinstance(results[2], ValueError)  # only the bad request fails
+
+
+@pytest.mark.unit
+def test_unreadable_image_fails_only_its_own_slot(predictor_with_dummy, monkeypatch):
+    from ml_object_detector.domain.errors import InvalidImageError
+
+    predictor, _, src_dir = predictor_with_dummy
+    _write_tiny_jpeg(src_dir / "ok.jpg")
+    (src_dir / "broken.jpg").write_bytes(b"not a jpeg")
+    pixels = np.zeros((8, 8, 3), dtype=np.uint8)
+    seen = []
+
+    def fake_predict(source, conf, **kwargs):
+        seen.append(source)
+        return [f"res{i}" for i in range(len(source))]
+
+    monkeypatch.setattr(predictor.model, "predict", fake_predict)
+
+    out = predictor._predict_batch(
+        [
+            (pixels, 0.5),
+            (str(src_dir / "broken.jpg"), 0.5),
+            (str(src_dir / "missing.jpg"), 0.5),
+            (str(src_dir / "ok.jpg"), 0.5),
+        ]
+    )
+
+    assert len(seen) == 1 and len(seen[0]) == 2  # arrays only, the bad ones left out
+    assert seen[0][0] is pixels and seen[0][1].shape == (1, 1, 3)
+    assert out[0] == "res0" and out[3] == "res1"
+    assert isinstance(out[1], InvalidImageError) and isinstance(out[2], InvalidImageError)
@@ -0,0 +1,200 @@
+"""Unit tests for services.scheduler.FairScheduler"""
+
+import asyncio
+import time
+
+import pytest
+
+from ml_object_detector.services import detector, scheduler
+from ml_object_detector.services.scheduler import FairScheduler, QueueFull
+
+# Helpers ---------------
+
+
+def _drain(s: FairScheduler) -> list[str]:
+    """Grant order when every unit finishes right after it starts."""
+    order = []
+    while (granted := s.next(timeout=0)) is not None:
+        client, item = granted
+        order.append(item)
+        s.done(client)
+    return order
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    """Fresh detector dispatcher over two fake workers; records batch sizes."""
+    sizes = []
+
+    def fake_run_batch(requests):
+        sizes.append(len(requests))
+        time.sleep(0.05)
+        return [f"r{request['n']}" for request in requests]
+
+    monkeypatch.setattr(detector, "_run_batch", fake_run_batch)
+    monkeypatch.setattr(detector, "pool_size", lambda: 2)
+    monkeypatch.setattr(
+        detector, "BATCHING", {"enabled": True, "max_batch_size": 8, "max_wait_ms": 50}
+    )
+    monkeypatch.setattr(detector, "_dispatcher", None)
+    yield sizes
+    detector.get_dispatcher().close()
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_round_robin_between_clients():
+    s = FairScheduler(capacity=1, per_client_queued=10)
+    for i in range(3):
+        s.submit("alice", f"a{i}")
+    for i in range(2):
+        s.submit("bob", f"b{i}")
+
+    # a0 was granted on submit; afterwards alice and bob alternate
+    assert _drain(s) == ["a0", "b0", "a1", "b1", "a2"]
+
+
+@pytest.mark.unit
+def test_weights_share_slots_proportionally():
+    s = FairScheduler(capacity=1, per_client_queued=10, weights={"vip": 2})
+    s.submit("hold", "h")  # keep the single slot busy while queuing
+    for i in range(4):
+        s.submit("vip", f"v{i}")
+        s.submit("std", f"s{i}")
+
+    first_six = _drain(s)[1:7]
+    assert sum(item.startswith("v") for item in first_six) == 4  # 2:1 share
+
+
+@pytest.mark.unit
+def test_limits_and_queue_full():
+    s = FairScheduler(capacity=4, per_client_running=1, per_client_queued=1)
+    s.submit("alice", "a0")  # runs
+    s.submit("alice", "a1")  # waits: one running per client
+    with pytest.raises(QueueFull):
+        s.submit("alice", "a2")
+    with pytest.raises(QueueFull):
+        s.check("alice")
+
+    s.submit("bob", "b0")  # a full queue of alice does not block bob
+    assert s.stats() | {"granted": None} == {
+        "capacity": 4,
+        "running": 2,
+        "queued": 1,
+        "clients": 2,
+        "granted": None,
+        "rejected": 2,
+    }
+
+
+@pytest.mark.unit
+def test_check_admits_a_batch_as_a_whole():
+    s = FairScheduler(capacity=2, per_client_running=1, per_client_queued=3)
+    s.check("alice", units=4)  # one runs, three wait
+    with pytest.raises(QueueFull):
+        s.check("alice", units=5)
+
+    s.submit("alice", "a0")
+    s.submit("alice", "a1")
+    s.check("alice", units=2)
+    with pytest.raises(QueueFull):
+        s.check("alice", units=3)
+
+
+@pytest.mark.unit
+def test_units_are_reserved_at_submit():
+    s = FairScheduler(capacity=4, per_client_running=1, per_client_queued=3)
+    s.submit("hold", "h", units=4)  # the scheduler is full
+    s.submit("alice", "a0", units=3)  # waits, taking all of alice's queue
+    with pytest.raises(QueueFull):
+        s.submit("alice", "a1")
+    assert s.stats()["queued"] == 3
+
+    assert s.next(timeout=0) == ("hold", "h")
+    s.done("hold", units=4)
+    # bigger than per_client_running: starts alone, holds three units
+    assert s.next(timeout=0) == ("alice", "a0")
+    assert s.stats()["running"] == 3
+    s.submit("bob", "b0")
+    assert s.next(timeout=0) == ("bob", "b0")
+    s.submit("carol", "c0")  # no room next to alice's three units and b0
+    assert s.next(timeout=0) is None
+
+
+@pytest.mark.unit
+def test_cancel_gives_the_units_back():
+    s = FairScheduler(capacity=1, per_client_queued=2)
+    s.submit("hold", "h")
+    s.submit("alice", "a0", units=2)
+    assert s.cancel("alice", "a0")
+    s.submit("alice", "a1", units=2)
+    assert s.stats()["queued"] == 2
+
+
+@pytest.mark.unit
+def test_idle_clients_are_evicted():
+    s = FairScheduler(capacity=1, idle_ttl_s=0.0)
+    s.submit("alice", "a0")
+    client, _ = s.next(timeout=0)
+    s.done(client)
+    assert s.stats()["clients"] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_async_slot_waits_for_capacity():
+    s = FairScheduler(capacity=1)
+    s.submit("job", "j0")  # occupies the only slot
+    entered = asyncio.Event()
+
+    async def inline():
+        async with s.slot("alice"):
+            entered.set()
+
+    task = asyncio.create_task(inline())
+    await asyncio.sleep(0.01)
+    assert not entered.is_set()
+
+    client, _ = s.next(timeout=0)
+    s.done(client)  # frees the slot from "another thread"
+    await asyncio.wait_for(task, 1.0)
+    assert entered.is_set()
+    assert s.stats()["running"] == 0
+
+
+@pytest.mark.unit
+def test_default_capacity_is_one_batch_per_worker(monkeypatch):
+    monkeypatch.setattr(scheduler, "SCHEDULER", {})
+    monkeypatch.setattr(
+        scheduler,
+        "cfg",
+        {"workers": {"processes": 2}, "batching": {"enabled": True, "max_batch_size": 8}},
+    )
+    assert scheduler.default_capacity() == 16
+
+    monkeypatch.setitem(scheduler.cfg["batching"], "enabled", False)
+    assert scheduler.default_capacity() == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_concurrent_clients_fill_a_batch(monkeypatch, dispatcher):
+    """Single-image detections of several clients are batched together."""
+    monkeypatch.setattr(scheduler, "SCHEDULER", {"per_client_running": 1})
+    monkeypatch.setattr(
+        scheduler,
+        "cfg",
+        {"workers": {"processes": 2}, "batching": {"enabled": True, "max_batch_size": 8}},
+    )
+    s = FairScheduler(capacity=scheduler.default_capacity(), per_client_running=1)
+
+    async def upload(n):
+        async with s.slot(f"client{n}"):
+            return await detector.detect(n=n)
+
+    results = await asyncio.wait_for(asyncio.gather(*(upload(n) for n in range(8))), 5.0)
+
+    assert results == [f"r{n}" for n in range(8)]
+    assert max(dispatcher) > 2
@@ -0,0 +1,67 @@
+"""Import-time checks: the API and the ETL start without torch/ultralytics"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ("torch", "ultralytics", "cv2")
+IMPORT_BUDGET_S = 5.0  # generous for slow CI; importing torch alone takes seconds
+
+# Helpers ---------------
+
+
+def import_in_fresh_process(module: str) -> tuple[list[str], float]:
+    """Heavy modules loaded by ``import <module>`` and how long it took (s)."""
+    code = (
+        "import sys, time\n"
+        "t0 = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - t0\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))\n"
+        "print(elapsed)\n"
+    )
+    env = {k: v for k, v in os.environ.items() if k != "PEXELS_API_KEY"}
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, timeout=120
+    )
+    assert out.returncode == 0, out.stderr
+    heavy, elapsed = out.stdout.splitlines()[-2:]
+    return [m for m in heavy.split(",") if m], float(elapsed)
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "module",
+    [
+        "ml_object_detector.fastapi_app",
+        "ml_object_detector.services.detector",
+        "ml_object_detector.cli.run_etl",
+    ],
+)
+def test_import_does_not_load_the_model(module, record_property):
+    heavy, elapsed = import_in_fresh_process(module)
+    record_property("import_s", round(elapsed, 3))  # in the JUnit XML report
+
+    assert heavy == []
+    assert elapsed < IMPORT_BUDGET_S
+
+
+@pytest.mark.unit
+def test_model_is_loaded_on_first_use(monkeypatch):
+    from ml_object_detector.models import predictor
+    from ml_object_detector.services import detector
+
+    created = []
+    monkeypatch.setattr(detector, "_model", None)
+    monkeypatch.setattr(predictor, "YoloPredictor", lambda **kw: created.append(kw) or object())
+
+    assert detector.loaded_model() is None
+    model = detector.get_model()
+
+    assert detector.get_model() is model and detector.loaded_model() is model
+    assert created == [{"batching": False}]  # batches are formed by the dispatcher
@@ -0,0 +1,147 @@
+"""Unit tests for services.thumbnails (preview rendering + LRU disk cache)"""
+
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from ml_object_detector.api import thumbnails as thumbnails_api
+from ml_object_detector.services.thumbnails import SIZES, ThumbnailCache
+
+# Helpers ---------------
+
+
+def make_image(path, size=(1200, 800)):
+    Image.new("RGB", size, (200, 30, 30)).save(path, quality=95)
+    return path
+
+
+@pytest.fixture
+def processed(tmp_path, monkeypatch):
+    """/thumbnails routes over a temporary processed folder and cache."""
+    root = tmp_path / "processed"
+    make_image((root / "run1").mkdir(parents=True) or root / "run1" / "a.jpg")
+    (tmp_path / "secret.txt").write_text("not for you")
+    cache = ThumbnailCache(tmp_path / "thumbs")
+    monkeypatch.setattr(thumbnails_api, "PROCESSED_IMAGES_DIR", root)
+    monkeypatch.setattr(thumbnails_api, "get_thumbnails", lambda: cache)
+    return root
+
+
+@pytest.fixture
+def client(processed):
+    app = FastAPI()
+    app.include_router(thumbnails_api.router)
+    return TestClient(app)
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_thumbnail_is_downscaled_webp(tmp_path):
+    src = make_image(tmp_path / "a.jpg")
+    cache = ThumbnailCache(tmp_path / "thumbs")
+
+    path = cache.get(src, 160)
+
+    with Image.open(path) as img:
+        assert img.format == "WEBP"
+        assert max(img.size) == 160 and img.size == (160, 107)
+    assert path.stat().st_size < src.stat().st_size
+
+
+@pytest.mark.unit
+def test_cached_thumbnail_is_reused(tmp_path):
+    src = make_image(tmp_path / "a.jpg")
+    cache = ThumbnailCache(tmp_path / "thumbs", fmt="jpeg")
+
+    first = cache.get(src, 160)
+    second = cache.get(src, 160)
+
+    assert first == second and first.suffix == ".jpeg"
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 1
+
+
+@pytest.mark.unit
+def test_key_changes_with_source_and_size(tmp_path):
+    src = make_image(tmp_path / "a.jpg")
+    cache = ThumbnailCache(tmp_path / "thumbs")
+    key = cache.key(src, 160)
+
+    assert cache.key(src, 160) == key
+    assert cache.key(src, 480) != key
+
+    make_image(src, size=(600, 400))
+    os.utime(src, ns=(0, 10**18))
+    assert cache.key(src, 160) != key
+
+
+@pytest.mark.unit
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbs", fmt="jpeg")
+    paths = [cache.get(make_image(tmp_path / f"{i}.jpg"), 160) for i in range(4)]
+    one = paths[0].stat().st_size
+
+    # oldest access first, then touch the first thumbnail again
+    for age, p in enumerate(reversed(paths)):
+        os.utime(p, (1000 - age, 1000 - age))
+    os.utime(paths[0])
+
+    cache.max_bytes = int(one * 3.5)
+    cache.get(make_image(tmp_path / "new.jpg"), 160)
+
+    assert paths[0].exists()
+    assert not paths[1].exists() and not paths[2].exists()
+    assert cache.stats()["evicted"] == 2
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+@pytest.mark.unit
+def test_unknown_format_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        ThumbnailCache(tmp_path, fmt="gif")
+
+
+@pytest.mark.unit
+def test_route_sets_cache_headers(client):
+    response = client.get("/thumbnails/run1/a.jpg", params={"size": SIZES[0]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["cache-control"] == thumbnails_api.CACHE_CONTROL
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"') and len(etag) == 42
+
+
+@pytest.mark.unit
+def test_route_revalidates_with_if_none_match(client, processed):
+    etag = client.get("/thumbnails/run1/a.jpg").headers["etag"]
+
+    response = client.get("/thumbnails/run1/a.jpg", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b"" and response.headers["etag"] == etag
+    # a different size is a different thumbnail
+    other = client.get(
+        "/thumbnails/run1/a.jpg", params={"size": SIZES[-1]}, headers={"If-None-Match": etag}
+    )
+    assert other.status_code == 200 and other.headers["etag"] != etag
+
+
+@pytest.mark.unit
+def test_route_rejects_unknown_size(client):
+    response = client.get("/thumbnails/run1/a.jpg", params={"size": 161})
+
+    assert response.status_code == 400
+    assert str(SIZES[0]) in response.json()["detail"]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "image", ["..%2F..%2Fetc%2Fpasswd", "..%2Fsecret.txt", "run1%2Fmissing.jpg"]
+)
+def test_route_refuses_paths_outside_processed(client, image):
+    assert client.get(f"/thumbnails/{image}").status_code == 404
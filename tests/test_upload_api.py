@@ -7,9 +7,17 @@ from fastapi.testclient import TestClient
 from fastapi import FastAPI
 from PIL import Image
 
+from ml_object_detector.api import upload
 from ml_object_detector.api.upload import router
 
 
+@pytest.fixture(autouse=True)
+def uploads_dir(tmp_path, monkeypatch):
+    """Keep uploads out of the repository's uploads/ folder"""
+    monkeypatch.setattr(upload, "UPLOADS_DIR", tmp_path / "uploads")
+    return tmp_path / "uploads"
+
+
 @pytest.fixture
 def app():
     """FastAPI app with upload router for testing"""
@@ -54,6 +62,18 @@ def test_upload_valid_image(client, valid_image_bytes):
     assert data["size_bytes"] == len(valid_image_bytes)
 
 
+@pytest.mark.unit
+def test_upload_is_deleted_after_response(client, valid_image_bytes, uploads_dir):
+    """Uploads only live for the duration of their request"""
+    response = client.post(
+        "/images/upload_image",
+        files={"file": ("test.png", valid_image_bytes, "image/png")}
+    )
+
+    assert response.status_code == 200
+    assert list(uploads_dir.iterdir()) == []
+
+
 @pytest.mark.unit
 def test_upload_invalid_file(client, invalid_file_bytes):
     """Test rejection of invalid file"""
@@ -0,0 +1,160 @@
+"""Tests for the /v1/detect endpoint (inference replaced by a stub)"""
+
+import io
+import json
+import types
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from ml_object_detector.api import v1
+from ml_object_detector.domain.detections import ImageDetections
+from ml_object_detector.models.predictor import OneResult
+from ml_object_detector.services.scheduler import FairScheduler
+
+# Helpers ---------------
+
+
+def _png(width: int = 80, height: int = 60) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color="blue").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _result(request: dict) -> OneResult:
+    det = ImageDetections(
+            path=str(request["img_path"]),
+            names={0: "person"},
+            cls=np.array([0]),
+            conf=np.array([0.91234], dtype=np.float32),
+            xyxy=np.array([[1.0, 2.0, 30.0, 40.0]], dtype=np.float32),
+        speed={"preprocess": 1.234, "inference": 5.678, "postprocess": 0.9},
+    )
+    return OneResult(boxed_path=None, labels=1, speed_ms=7.8, detections=det)
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Stub for services.detector.detect_many: one box per image, records each batch."""
+    seen = []
+
+    async def fake_detect_many(requests):
+        seen.append(requests)
+        return [_result(request) for request in requests]
+
+    monkeypatch.setattr(v1.detector, "detect_many", fake_detect_many)
+    return seen
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    s = FairScheduler(capacity=1, per_client_running=1, per_client_queued=2)
+    monkeypatch.setattr(v1, "get_scheduler", lambda: s)
+    return s
+
+
+@pytest.fixture
+def client(batches, scheduler):
+    app = FastAPI()
+    app.include_router(v1.router)
+    return TestClient(app)
+
+
+def _post(client, n: int = 1, headers: dict | None = None, files: list | None = None):
+    files = files or [("files", (f"img{i}.png", _png(), "image/png")) for i in range(n)]
+    return client.post("/v1/detect", files=files, data={"conf": "0.5"}, headers=headers)
+
+
+# Tests ------------
+
+
+@pytest.mark.unit
+def test_json_body_shape(client, batches):
+    response = _post(client, n=2)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["conf"] == 0.5 and set(body) == {"conf", "images", "decode_ms", "total_ms"}
+    assert [img["file"] for img in body["images"]] == ["img0.png", "img1.png"]
+    image = body["images"][0]
+    assert (image["width"], image["height"]) == (80, 60)
+    assert image["detections"] == [
+        {"class_id": 0, "label": "person", "score": 0.9123, "box": [1.0, 2.0, 30.0, 40.0]}
+    ]
+    assert image["timing_ms"] == {"preprocess": 1.23, "inference": 5.68, "postprocess": 0.9}
+    # one batched call, inference only: nothing written
+    assert len(batches) == 1
+    assert all(r["artifacts"] == "json" and r["out_dir"] is None for r in batches[0])
+
+
+@pytest.mark.unit
+def test_msgpack_when_accepted(client, monkeypatch):
+    packer = types.SimpleNamespace(
+        packb=lambda content, use_bin_type: json.dumps(content).encode()
+    )
+    monkeypatch.setattr(v1, "msgpack", packer)
+
+    response = _post(client, headers={"Accept": v1.MSGPACK})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == v1.MSGPACK
+    assert json.loads(response.content)["images"][0]["file"] == "img0.png"
+
+
+@pytest.mark.unit
+def test_msgpack_unavailable_is_406(client, batches, monkeypatch):
+    monkeypatch.setattr(v1, "msgpack", None)
+
+    response = _post(client, headers={"Accept": v1.MSGPACK})
+
+    assert response.status_code == 406
+    assert batches == []
+
+
+@pytest.mark.unit
+def test_rejected_file_is_422(client, batches):
+    files = [
+        ("files", ("ok.png", _png(), "image/png")),
+        ("files", ("notes.txt", b"not an image", "text/plain")),
+    ]
+
+    response = _post(client, files=files)
+
+    assert response.status_code == 422
+    assert [e["file"] for e in response.json()["errors"]] == ["notes.txt"]
+    assert batches == []  # all or nothing
+
+
+@pytest.mark.unit
+def test_too_many_files_is_413(client, batches, monkeypatch):
+    monkeypatch.setattr(v1, "MAX_FILES", 2)
+
+    assert _post(client, n=3).status_code == 413
+    assert batches == []
+
+
+@pytest.mark.unit
+def test_batch_larger_than_client_queue_is_429(client, batches, scheduler):
+    # capacity 1 + 2 queued places: a fourth image has no room
+    assert _post(client, n=3).status_code == 200
+    response = _post(client, n=4)
+
+    assert response.status_code == 429
+    assert [len(batch) for batch in batches] == [3]
+    assert scheduler.stats()["rejected"] == 1
+    assert scheduler.stats()["running"] == 0
+
+
+@pytest.mark.unit
+def test_queued_units_count_against_the_client(client, batches, scheduler):
+    """Images of a request still waiting for a slot use up the client's queue."""
+    scheduler.submit("job", "j0")  # holds the only slot
+    scheduler.submit("alice", "a0", units=2)  # alice's queue is now full
+
+    response = _post(client, n=1, headers={"X-Client-ID": "alice"})
+
+    assert response.status_code == 429
+    assert batches == []
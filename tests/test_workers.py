@@ -0,0 +1,73 @@
+"""Unit tests for services.workers (in-process fallback, no model load)"""
+
+import os
+
+import pytest
+
+from ml_object_detector.services import workers
+
+
+@pytest.fixture
+def no_pool(monkeypatch):
+    monkeypatch.setattr(workers, "WORKERS", {"processes": 0})
+    monkeypatch.setattr(workers, "_pool", None)
+
+
+@pytest.mark.unit
+def test_disabled_pool_runs_inline(no_pool):
+    assert workers.get_pool() is None
+    assert workers.run_in_worker(os.getpid) == os.getpid()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_async_fallback_uses_threadpool(no_pool):
+    assert await workers.run_in_worker_async(pow, 2, 5) == 32
+
+
+@pytest.mark.unit
+def test_threads_split_across_workers(monkeypatch):
+    monkeypatch.setattr(workers, "WORKERS", {"processes": 4})
+    monkeypatch.setattr(workers.os, "cpu_count", lambda: 16)
+    assert workers._worker_threads(4) == 4
+
+    monkeypatch.setattr(workers, "WORKERS", {"processes": 4, "threads_per_worker": 2})
+    assert workers._worker_threads(4) == 2
+
+
+@pytest.mark.unit
+def test_worker_stats_are_relayed_and_aggregated(monkeypatch):
+    import queue
+
+    from ml_object_detector.api.metrics import aggregate
+
+    q = queue.Queue()
+    monkeypatch.setattr(workers, "_stats", {})
+    monkeypatch.setattr(workers, "_report", q.put)
+    monkeypatch.setattr(workers.os, "getpid", lambda: 101)
+    workers.report_stats({"cache": {"hits": 3, "misses": 1, "entries": 4, "max_entries": 10}})
+    monkeypatch.setattr(workers.os, "getpid", lambda: 102)
+    workers.report_stats({"cache": {"hits": 0, "misses": 4, "entries": 7, "max_entries": 10}})
+    q.put(None)
+
+    workers._relay_events(q)
+    per_worker = workers.worker_stats()
+    totals = aggregate(list(per_worker.values()))
+
+    assert sorted(per_worker) == [101, 102]
+    assert totals["cache"] == {
+        "hits": 3, "misses": 5, "entries": 7, "max_entries": 10, "hit_rate": 3 / 8
+    }
+
+
+@pytest.mark.unit
+def test_backend_exported_once_before_the_pool_starts(monkeypatch):
+    calls = []
+    monkeypatch.setattr(workers, "resolve_weights", lambda *args: calls.append(args))
+
+    monkeypatch.setattr(workers, "INFERENCE", {"backend": "torch"})
+    workers._export_weights()
+    monkeypatch.setattr(workers, "INFERENCE", {"backend": "onnx"})
+    workers._export_weights()
+
+    assert len(calls) == 1 and calls[0][1] == "onnx"